@@ -0,0 +1,378 @@
+"""Performance benchmarks for readers, type converters and writers.
+
+Run from repository root:
+
+    python benchmarks/bench_sdp.py --output results.json
+    python benchmarks/bench_sdp.py --save-baseline
+    python benchmarks/bench_sdp.py --baseline benchmarks/baseline.json --threshold 0.2
+
+Every benchmark is parametrized by number of rows and column mix.
+Results are stored as JSON, comparison with a baseline fails (exit code 1)
+when a benchmark becomes slower than ``threshold`` relative to the baseline.
+"""
+import argparse
+import datetime
+import io
+import itertools
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Optional
+
+import sqlalchemy
+from sqlalchemy import MetaData, Table, Column
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))  # Package sdp of this repository
+
+from sdp.database import Database, DatabaseSettings, Drivers
+from sdp.description import Description
+from sdp.description_typing import DEFAULT_PEEKER
+from sdp import load_plan
+from sdp.source_readers import CSVReader, XMLReader
+
+ROOT_DIR = pathlib.Path(__file__).parent
+DEFAULT_BASELINE = ROOT_DIR / "baseline.json"
+WORK_DIR = tempfile.TemporaryDirectory()
+
+SIZES = (1000, 10000)
+
+COLUMN_MIXES = {
+    "narrow": ["integer", "float", "string"],
+    "wide": ["integer", "float", "string", "integer", "float"] * 4,
+    "datetime": ["integer", "datetime", "datetime", "float"],
+}
+
+SQL_TYPES = {
+    "boolean": sqlalchemy.Boolean,
+    "integer": sqlalchemy.Integer,
+    "float": sqlalchemy.Float,
+    "string": lambda: sqlalchemy.String(32),
+    "binary": sqlalchemy.LargeBinary,
+    "datetime": sqlalchemy.DateTime,
+}
+
+
+def make_description(mix: str, format_: str = "CSV", table: Optional[str] = None) -> Description:
+    columns = [{"name": "{}_{}".format(type_, n), "type": type_} for n, type_ in enumerate(COLUMN_MIXES[mix])]
+    schema = Description.load_scheme()
+    data = {"table": table or "sdp_benchmark_{}".format(mix), "format": format_, "columns": columns}
+    if format_ == "XML":
+        data["parser_settings"] = {"XML": {"header": False}}
+    return Description(data, schema)
+
+
+def make_value(type_: str, n: int) -> str:
+    if type_ == "integer":
+        return str(n)
+    elif type_ == "float":
+        return repr(n * 0.25)
+    elif type_ == "boolean":
+        return "1" if n % 2 else ""
+    elif type_ == "datetime":
+        time_ = datetime.datetime(2021, 1, 1) + datetime.timedelta(seconds=n)
+        return time_.isoformat(" ")
+    return "value_{}".format(n)
+
+
+def make_rows(mix: str, size: int) -> list:
+    types = COLUMN_MIXES[mix]
+    return [[make_value(type_, n) for type_ in types] for n in range(size)]
+
+
+def make_csv(mix: str, size: int) -> str:
+    return "\n".join(",".join(row) for row in make_rows(mix, size)) + "\n"
+
+
+def make_xml(mix: str, size: int) -> str:
+    lines = ["<html><body><table><tbody>"]
+    for row in make_rows(mix, size):
+        lines.append("<tr>" + "".join("<td>{}</td>".format(item) for item in row) + "</tr>")
+    lines.append("</tbody></table></body></html>")
+    return "\n".join(lines)
+
+
+def consume(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+class Benchmark:
+    """Parametrized benchmark case. ``setup`` prepare state and return callable for timing"""
+
+    def __init__(self, name: str, setup: Callable[..., Callable[[], int]], params: dict):
+        self.name = name
+        self.setup = setup
+        self.params = params
+
+    def cases(self):
+        keys = list(self.params.keys())
+        for values in itertools.product(*self.params.values()):
+            kwargs = dict(zip(keys, values))
+            name = "{}[{}]".format(self.name, ",".join(str(value) for value in values))
+            yield name, kwargs
+
+
+def bench_csv_reader(size, mix):
+    reader = CSVReader(make_description(mix))
+    text = make_csv(mix, size)
+    return lambda: consume(reader.parse_source(io.StringIO(text)))
+
+
+def bench_csv_reader_parallel(size, workers):
+    reader = CSVReader(make_description("wide"), workers)
+    path = pathlib.Path(WORK_DIR.name) / "parallel_{}.csv".format(size)
+    path.write_text(make_csv("wide", size))
+
+    def run():
+        with path.open(newline="") as fin:
+            batches = reader.parse_batches(fin, 1000)
+            if batches is None:
+                return consume(reader.parse_source(fin))
+            return sum(len(batch) for batch in batches)
+
+    return run
+
+
+def bench_xml_reader(size, mix):
+    reader = XMLReader(make_description(mix, "XML"))
+    text = make_xml(mix, size)
+    return lambda: consume(reader.parse_source(io.StringIO(text)))
+
+
+def bench_type_conversion(size, mix):
+    description = make_description(mix)
+    rows = make_rows(mix, size)
+
+    def run():
+        typers = [DEFAULT_PEEKER.peek_from_column(column) for column in description["columns"]]
+        for row in rows:
+            for typer, value in zip(typers, row):
+                typer(value)
+        return len(rows)
+
+    return run
+
+
+DATETIME_SAMPLES = {
+    "iso": ("%Y-%m-%dT%H:%M:%S.%f", {"datetime_flavour": "iso"}),
+    "sql": ("%Y-%m-%d %H:%M:%S", {"datetime_flavour": "sql"}),
+    "unixtime": (None, {"datetime_flavour": "unixtime"}),
+    "custom": ("%d.%m.%Y %H:%M:%S", {"datetime_flavour": "custom", "datetime_format": "%d.%m.%Y %H:%M:%S"}),
+}
+
+
+def bench_datetime_parsing(size, flavour, parser):
+    """Compare parsers of datetime flavours with previous implementation:
+    ``fromisoformat`` for every value (ISO only) and ``strptime`` for other formats
+    """
+    date_format, properties = DATETIME_SAMPLES[flavour]
+    start = datetime.datetime(2021, 1, 1)
+    times = [start + datetime.timedelta(seconds=n * 7.25) for n in range(size)]
+    if date_format is None:
+        values = [repr((time_ - datetime.datetime(1970, 1, 1)).total_seconds()) for time_ in times]
+    else:
+        values = [time_.strftime(date_format) for time_ in times]
+
+    if parser == "previous":
+        if flavour == "unixtime":
+            convert = lambda value: datetime.datetime.utcfromtimestamp(float(value))
+        elif flavour == "iso":
+            convert = datetime.datetime.fromisoformat
+        else:
+            convert = lambda value: datetime.datetime.strptime(value, date_format)
+        return lambda: len([convert(value) for value in values])
+
+    description = make_description("datetime")
+    column = description["columns"][1]
+    for key, value in properties.items():
+        column["type_properties"][key] = value
+    typer = DEFAULT_PEEKER.peek_from_column(column)
+    return lambda: len(typer.convert_many(values))
+
+
+def bench_description_access(size, mix):
+    description = make_description(mix)
+
+    def run():
+        for _ in range(size):
+            for column in description["columns"]:
+                column["name"]
+                column["type"]
+                column["type_properties"]["datetime_flavour"]
+            description["parser_settings"]["CSV"]
+        return size
+
+    return run
+
+
+def bench_reader_setup(size, peeker):
+    """Setup of reader for each of ``size`` small files: compile description and resolve converters.
+    Uncached setup resolves converters and column defaults for every description
+    """
+    descriptions = [make_description("wide") for _ in range(size)]
+    cached = peeker == "cached"
+    type_peeker = DEFAULT_PEEKER if cached else DEFAULT_PEEKER.peeker
+
+    def run():
+        for description in descriptions:
+            if not cached:
+                load_plan.clear_cache()
+            CSVReader(description.compile(type_peeker))
+        return size
+
+    return run
+
+
+class LoadBenchmarkDatabase:
+    """Target database for end-to-end load benchmarks: local SQLite file or database from configuration file"""
+    config = None
+
+    def __init__(self):
+        if self.config is not None:
+            self.database = Database.connect_from_file(self.config)
+            if self.database is None:
+                raise RuntimeError("Cannot connect to the database from {}".format(self.config))
+        else:
+            settings = DatabaseSettings(driver=Drivers.SQLITE, host=None, port=None, username=None,
+                                        password=None, database=str(pathlib.Path(WORK_DIR.name) / "bench.db"))
+            self.database = Database(settings)
+
+    def create_table(self, description: Description) -> Table:
+        metadata = MetaData()
+        table = Table(description["table"], metadata,
+                      *[Column(column["name"], SQL_TYPES[column["type"]]()) for column in description["columns"]])
+        metadata.drop_all(self.database.engine, tables=[table])
+        metadata.create_all(self.database.engine, tables=[table])
+        return table
+
+    def clear(self, table: Table):
+        with self.database.engine.connect() as conn:
+            with conn.begin():
+                conn.execute(table.delete())
+
+
+def bench_load_data(size, mix):
+    target = LoadBenchmarkDatabase()
+    description = make_description(mix)
+    table = target.create_table(description)
+    path = pathlib.Path(WORK_DIR.name) / "{}_{}.csv".format(mix, size)
+    path.write_text(make_csv(mix, size))
+
+    def run():
+        target.clear(table)
+        result = target.database.load_data(description, path)
+        if result.exceptions or result.errors:
+            raise RuntimeError(result.to_string(path))
+        return size
+
+    return run
+
+
+BENCHMARKS = [
+    Benchmark("csv_reader", bench_csv_reader, {"size": SIZES, "mix": COLUMN_MIXES.keys()}),
+    Benchmark("csv_reader_parallel", bench_csv_reader_parallel, {"size": (100000,), "workers": (1, 2, 4)}),
+    Benchmark("xml_reader", bench_xml_reader, {"size": SIZES, "mix": COLUMN_MIXES.keys()}),
+    Benchmark("type_conversion", bench_type_conversion, {"size": SIZES, "mix": COLUMN_MIXES.keys()}),
+    Benchmark("datetime_parsing", bench_datetime_parsing,
+              {"size": (100000,), "flavour": DATETIME_SAMPLES.keys(), "parser": ("previous", "new")}),
+    Benchmark("description_access", bench_description_access, {"size": SIZES, "mix": ("narrow", "wide")}),
+    Benchmark("reader_setup", bench_reader_setup, {"size": (1000,), "peeker": ("uncached", "cached")}),
+    Benchmark("load_data", bench_load_data, {"size": SIZES, "mix": COLUMN_MIXES.keys()}),
+]
+
+
+def run_benchmarks(pattern: str = "", repeat: int = 5) -> dict:
+    results = {}
+    for benchmark in BENCHMARKS:
+        for name, kwargs in benchmark.cases():
+            if pattern not in name:
+                continue
+            func = benchmark.setup(**kwargs)
+            func()  # warm up
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows = func()
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            results[name] = {
+                "min": best,
+                "median": statistics.median(timings),
+                "rows": rows,
+                "rows_per_second": rows / best if best > 0 else None,
+            }
+            print("{:<45} {:>10.4f} s {:>14.0f} rows/s".format(name, best, results[name]["rows_per_second"] or 0))
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return list of regressions: benchmarks slower than baseline by more than threshold"""
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        ratio = result["min"] / reference["min"]
+        if ratio > 1 + threshold:
+            regressions.append("{}: {:.4f} s vs baseline {:.4f} s ({:+.0%})".format(
+                name, result["min"], reference["min"], ratio - 1))
+    return regressions
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description="Benchmarks for smart-data-parser")
+    parser.add_argument("-k", "--filter", default="", help="Run only benchmarks which name contain this substring")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of timed runs for each benchmark")
+    parser.add_argument("-o", "--output", help="Write results to this JSON file")
+    parser.add_argument("-b", "--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file for comparison")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as new baseline")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2,
+                        help="Allowed slowdown relative to the baseline (0.2 means 20%%)")
+    parser.add_argument("-c", "--config", default=None,
+                        help="Configuration file with database settings for load benchmarks (SQLite by default)")
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    LoadBenchmarkDatabase.config = args.config
+    results = run_benchmarks(args.filter, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w") as fout:
+            json.dump(results, fout, indent=2)
+
+    baseline_path = pathlib.Path(args.baseline)
+    if args.save_baseline:
+        with baseline_path.open("w") as fout:
+            json.dump(results, fout, indent=2)
+        print("Baseline saved to {}".format(baseline_path))
+        return 0
+
+    if baseline_path.exists():
+        with baseline_path.open() as fin:
+            baseline = json.load(fin)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Performance regressions:")
+            print("\n".join(regressions))
+            return 1
+        print("No regressions relative to {}".format(baseline_path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Offline validation of input files.
+
+Files are parsed by the same readers and converted by compiled column types as in loading,
+but rows aren't written anywhere, so files which would be rejected are found without database.
+Files are checked in parallel by worker processes.
+"""
+import dataclasses
+import os
+import pathlib
+import time
+from typing import Any, Iterable, List, Optional, Union
+
+from sdp.compression import open_source
+from sdp.description import Description
+from sdp.parallel import worker_pool, worker_reader
+from sdp.reader_registry import Capability
+from sdp.source_readers import SourceReader
+
+DEFAULT_MAX_ERRORS = 10
+COLUMNAR_BATCH_SIZE = 65536
+
+
+@dataclasses.dataclass
+class ConversionError:
+    record: int  # Number of data record in file starting from 1 (skipped and header rows aren't counted)
+    line: Optional[int]  # Number of file line where record starts (all lines are counted), None for binary formats
+    column: Optional[str]
+    value: Any
+    message: str
+
+    def __str__(self):
+        location = "record {}".format(self.record) if self.line is None else "line {}".format(self.line)
+        if self.value is None:
+            return "{}, column {}: {}".format(location, self.column, self.message)
+        return "{}, column {}: {} (value {!r})".format(location, self.column, self.message, self.value)
+
+
+@dataclasses.dataclass
+class CheckResult:
+    path: str
+    records: int = 0
+    error_count: int = 0
+    errors: List[ConversionError] = dataclasses.field(default_factory=list)  # First errors of file
+    exception: Optional[str] = None  # Error which stopped parsing of file
+    seconds: float = 0.0
+    size: int = 0
+
+    @property
+    def success(self) -> bool:
+        return self.error_count == 0 and self.exception is None
+
+    def to_string(self) -> str:
+        lines = ["Checking {}: {}".format(self.path, "OK" if self.success else "FAILED")]
+        lines += ["ERROR: {}".format(error) for error in self.errors]
+        if self.error_count > len(self.errors):
+            lines.append("... {} more errors".format(self.error_count - len(self.errors)))
+        if self.exception is not None:
+            lines.append("EXCEPTION: {}".format(self.exception))
+        lines.append("records: {}".format(self.records))
+        lines.append("throughput: {:.0f} records/s, {:.1f} MB/s".format(*throughput(self.records, self.size,
+                                                                                   self.seconds)))
+        return "\n".join(lines)
+
+
+def throughput(records: int, size: int, seconds: float) -> tuple:
+    if seconds <= 0:
+        return 0.0, 0.0
+    return records / seconds, size / seconds / 2 ** 20
+
+
+class _Checker:
+
+    def __init__(self, result: CheckResult, max_errors: int):
+        self.result = result
+        self.max_errors = max_errors
+
+    def error(self, record: int, line: Optional[int], column: str, value: Any, message: str):
+        self.result.error_count += 1
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append(ConversionError(record, line, column, value, message))
+
+    def check_rows(self, reader: SourceReader, source: Any):
+        convert = reader.convert
+        for record, (line, row) in enumerate(reader.numbered_rows(source), 1):
+            self.result.records = record
+            try:
+                convert(row)
+            except Exception:  # Find failed columns
+                for name, value in row.items():
+                    try:
+                        convert({name: value})
+                    except Exception as e:
+                        self.error(record, line, name, value, "{}: {}".format(type(e).__name__, e))
+
+    def check_batches(self, reader, source: Any):
+        for batch in reader.record_batches(source, COLUMNAR_BATCH_SIZE):
+            start = self.result.records + 1
+            self.result.records += batch.num_rows
+            try:
+                reader.convert_batch(batch)
+            except Exception:  # Find failed columns, rows of error aren't reported by pyarrow
+                for index, column in enumerate(reader.columns):
+                    try:
+                        reader.convert_array(batch, index)
+                    except Exception as e:
+                        self.error(start, None, column.name, None, "{}: {} (records {}-{})".format(
+                            type(e).__name__, e, start, self.result.records))
+
+
+def check_source(reader: SourceReader, path: Union[str, pathlib.Path],
+                 max_errors: int = DEFAULT_MAX_ERRORS) -> CheckResult:
+    """Parse and convert file by reader, collect first ``max_errors`` conversion errors"""
+    path = pathlib.Path(path)
+    result = CheckResult(str(path))
+    checker = _Checker(result, max_errors)
+    start = time.perf_counter()
+    try:
+        result.size = path.stat().st_size
+        with open_source(path, binary=Capability.BINARY in reader.capabilities) as fin:
+            if Capability.COLUMNAR in reader.capabilities:
+                checker.check_batches(reader, fin)
+            else:
+                checker.check_rows(reader, fin)
+    except Exception as e:
+        result.exception = "{}: {}".format(type(e).__name__, e)
+        if result.records > 0:
+            result.exception += " (after record {})".format(result.records)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _check_task(path: str, max_errors: int) -> CheckResult:
+    return check_source(worker_reader(), path, max_errors)
+
+
+def check_files(description: Description, paths: Iterable[Union[str, pathlib.Path]],
+                max_errors: int = DEFAULT_MAX_ERRORS, workers: Optional[int] = None) -> Iterable[CheckResult]:
+    """Check files in ``workers`` processes (number of CPUs by default), results are returned in order of paths"""
+    reader = SourceReader.get_reader(description.compile())
+    paths = [str(path) for path in paths]
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        for path in paths:
+            yield check_source(reader, path, max_errors)
+        return
+    with worker_pool(reader, workers) as executor:
+        futures = [executor.submit(_check_task, path, max_errors) for path in paths]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,204 @@
+"""Column statistics collected in the same pass as loading.
+
+For every column of description: number of values and nulls, minimum and maximum,
+mean and variance of numbers (Chan's parallel update of Welford's algorithm by batches)
+and estimate of distinct values by HyperLogLog. Statistics are reported in load statistics
+and optionally stored in statistics table of target database.
+"""
+import datetime
+import hashlib
+import math
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, MetaData, String, Table, Text, insert
+
+from sdp.load_plan import LoadPlan
+
+HLL_PRECISION = 12  # 4096 registers, standard error 1.04 / sqrt(4096) = 1.6%
+EXACT_LIMIT = 4096  # Number of distinct hashes counted exactly
+
+
+def order_key(value):
+    """Key comparing aware and naive datetimes, naive datetimes are UTC like unix time converted by loader"""
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def hash64(value) -> int:
+    """Stable 64-bit hash of value (BLAKE2b of repr).
+
+    Built-in ``hash`` isn't used: it's randomized for strings in every process (``PYTHONHASHSEED``),
+    so registers of different processes couldn't be merged, and ``hash(-1) == hash(-2)``.
+    """
+    return int.from_bytes(hashlib.blake2b(repr(value).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HyperLogLog:
+    """Estimate of number of distinct values in constant memory.
+
+    Hashes are kept exactly until their number exceeds ``EXACT_LIMIT`` (small columns are counted exactly),
+    then they are moved to registers.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self.exact = set()
+
+    def _add_hashes(self, hashes: Iterable[int]):
+        registers = self.registers
+        shift = 64 - self.precision
+        low_mask = (1 << shift) - 1
+        for h in hashes:
+            index = h >> shift
+            rank = shift - (h & low_mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def _fold(self):
+        if self.exact is not None and len(self.exact) > EXACT_LIMIT:
+            self._add_hashes(self.exact)
+            self.exact = None
+
+    def update(self, values: Iterable):
+        hashes = map(hash64, values)
+        if self.exact is not None:
+            self.exact.update(hashes)
+            self._fold()
+        else:
+            self._add_hashes(hashes)
+
+    def merge(self, other: "HyperLogLog"):
+        if other.exact is not None:
+            if self.exact is not None:
+                self.exact |= other.exact
+                self._fold()
+            else:
+                self._add_hashes(other.exact)
+            return
+        if self.exact is not None:
+            self._add_hashes(self.exact)
+            self.exact = None
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        if self.exact is not None:
+            return len(self.exact)
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class ColumnStatistics:
+
+    def __init__(self, name: str, numeric: bool):
+        self.name = name
+        self.numeric = numeric
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.comparable = True
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from mean
+        self.distinct = HyperLogLog()
+
+    def update(self, values: List):
+        present = [value for value in values if value is not None]
+        self.nulls += len(values) - len(present)
+        if not present:
+            return
+        if self.comparable:
+            try:
+                low, high = min(present, key=order_key), max(present, key=order_key)
+                self.min = low if self.min is None else min(self.min, low, key=order_key)
+                self.max = high if self.max is None else max(self.max, high, key=order_key)
+            except TypeError:
+                self.comparable = False  # Statistics never fail load, minimum and maximum aren't reported
+                self.min = self.max = None
+        if self.numeric:
+            n = len(present)
+            mean = math.fsum(present) / n
+            m2 = math.fsum((value - mean) ** 2 for value in present)
+            total = self.count + n
+            delta = mean - self.mean
+            self.mean += delta * n / total
+            self.m2 += m2 + delta * delta * self.count * n / total
+        self.count += len(present)
+        self.distinct.update(present)
+
+    @property
+    def variance(self) -> Optional[float]:
+        if not self.numeric or self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+    def result(self) -> dict:
+        result = {"count": self.count, "nulls": self.nulls, "min": self.min, "max": self.max,
+                  "distinct": self.distinct.estimate()}
+        if self.numeric:
+            result["mean"] = self.mean if self.count > 0 else None
+            result["variance"] = self.variance
+        return result
+
+
+class StatisticsCollector:
+    """Statistics of all columns of description, updated by batches of converted rows"""
+
+    def __init__(self, plan: LoadPlan):
+        self.columns = [ColumnStatistics(column.name, column.type_name in ("integer", "float", "decimal"))
+                        for column in plan.columns]
+
+    def update(self, batch: List[dict]):
+        for column in self.columns:
+            name = column.name
+            column.update([row.get(name) for row in batch])
+
+    def track(self, batches: Iterable[list]) -> Iterator[list]:
+        """Update statistics by batches passed to writer"""
+        for batch in batches:
+            self.update(batch)
+            yield batch
+
+    def result(self) -> dict:
+        return {column.name: column.result() for column in self.columns}
+
+
+def statistics_table(name: str, metadata: Optional[MetaData] = None) -> Table:
+    return Table(name, metadata if metadata is not None else MetaData(),
+                 Column("loaded_at", DateTime),
+                 Column("table_name", String(128)),
+                 Column("source", String(1024)),
+                 Column("column_name", String(128)),
+                 Column("values_count", BigInteger),
+                 Column("nulls", BigInteger),
+                 Column("min_value", Text),
+                 Column("max_value", Text),
+                 Column("mean", Float),
+                 Column("variance", Float),
+                 Column("distinct_estimate", BigInteger))
+
+
+def store_statistics(conn, name: str, table_name: str, source: str, statistics: dict):
+    """Append statistics of loaded columns to statistics table ``name`` (it's created if it doesn't exist)"""
+    table = statistics_table(name)
+    loaded_at = datetime.datetime.now()
+    rows = []
+    for column_name, column in statistics.items():
+        rows.append({
+            "loaded_at": loaded_at, "table_name": table_name, "source": source, "column_name": column_name,
+            "values_count": column["count"], "nulls": column["nulls"],
+            "min_value": None if column["min"] is None else str(column["min"]),
+            "max_value": None if column["max"] is None else str(column["max"]),
+            "mean": column.get("mean"), "variance": column.get("variance"),
+            "distinct_estimate": column["distinct"],
+        })
+    with conn.begin():
+        table.create(conn, checkfirst=True)
+        conn.execute(insert(table), rows)
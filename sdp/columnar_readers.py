@@ -0,0 +1,132 @@
+"""Readers for columnar formats: Apache Parquet and Arrow IPC (require optional package pyarrow)."""
+import abc
+import itertools
+from typing import Any, Iterable, Iterator, Optional
+
+from sdp.reader_registry import Capability
+from sdp.source_readers import SourceReader
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("{}. Use pip for installing module manually.".format(e)) from e
+    return pyarrow
+
+
+def arrow_type(pa, type_name: str):
+    types = {
+        "boolean": pa.bool_(),
+        "integer": pa.int64(),
+        "float": pa.float64(),
+        "string": pa.string(),
+        "binary": pa.binary(),
+        "datetime": pa.timestamp("us"),
+    }
+    return types.get(type_name)
+
+
+def arrow_datetime(pa, array, datetime_type):
+    """Convert array to timestamps by columns with pyarrow compute functions for flavour of ``datetime_type``,
+    values which pyarrow can't parse are converted by Python parser of the type
+    """
+    if pa.types.is_timestamp(array.type):
+        return array
+    target = pa.timestamp("us")
+    flavour = datetime_type.flavour
+    try:
+        if flavour == "unixtime":
+            seconds = pa.compute.cast(array, pa.float64())
+            microseconds = pa.compute.round(pa.compute.multiply(seconds, 1e6))
+            return pa.compute.cast(pa.compute.cast(microseconds, pa.int64()), target)
+        if flavour == "custom":
+            return pa.compute.strptime(array, format=datetime_type.properties["datetime_format"], unit="us")
+        return pa.compute.cast(array, target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pa.array(datetime_type.convert_many(array.to_pylist()), target)
+
+
+class ColumnarReader(SourceReader):
+    """Base class for readers of columnar formats.
+
+    Columns of file are mapped to description columns by name (or ``source`` property of column),
+    only these columns are read. Batches are converted by columns with pyarrow casts
+    and passed to writer without per-cell conversion in Python.
+    """
+    capabilities = Capability.COLUMNAR | Capability.STREAMING | Capability.BINARY
+
+    def __init__(self, description, workers: int = 1):
+        super(ColumnarReader, self).__init__(description, workers)
+        self.fields = [column.source or column.name for column in self.columns]
+        self.type_names = [column.type_name for column in self.columns]
+
+    @abc.abstractmethod
+    def record_batches(self, source: Any, batch_size: int) -> Iterator:
+        """Iterate over pyarrow.RecordBatch with projected columns"""
+        pass
+
+    def check_schema(self, schema):
+        """Raise exception if fields of description columns don't exist in schema of file"""
+        missing = [field for field in self.fields if schema.get_field_index(field) < 0]
+        if missing:
+            raise Exception("Columns {} don't exist in file, columns of file: {}".format(
+                ", ".join(missing), ", ".join(schema.names)))
+
+    def convert_array(self, batch, index: int):
+        """Convert array of batch for description column ``index`` by its type"""
+        pa = import_pyarrow()
+        array = batch.column(batch.schema.get_field_index(self.fields[index]))
+        type_name = self.type_names[index]
+        if type_name == "datetime":
+            return arrow_datetime(pa, array, self.columns[index].type)
+        target = arrow_type(pa, type_name)
+        if target is not None and not array.type.equals(target):
+            array = pa.compute.cast(array, target)
+        return array
+
+    def convert_batch(self, batch) -> list:
+        pa = import_pyarrow()
+        arrays = [self.convert_array(batch, index) for index in range(len(self.columns))]
+        names = [column.name for column in self.columns]
+        return pa.RecordBatch.from_arrays(arrays, names=names).to_pylist()
+
+    def parse_batches(self, source: Any, batch_size: int) -> Optional[Iterator[list]]:
+        return (self.convert_batch(batch) for batch in self.record_batches(source, batch_size) if batch.num_rows > 0)
+
+    def read_source(self, source: Any) -> Iterable[dict]:
+        return itertools.chain.from_iterable(self.parse_batches(source, 65536))
+
+    def convert(self, row: dict) -> dict:
+        return row  # Rows are converted by batches
+
+
+class ParquetReader(ColumnarReader):
+    """Reader for Apache Parquet files, row groups are read lazily"""
+
+    def record_batches(self, source: Any, batch_size: int) -> Iterator:
+        pa = import_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(source)
+        self.check_schema(parquet_file.schema_arrow)
+        use_threads = self.parser_settings["PARQUET"]["use_threads"]
+        return parquet_file.iter_batches(batch_size=batch_size, columns=self.fields, use_threads=use_threads)
+
+
+class ArrowReader(ColumnarReader):
+    """Reader for Arrow IPC files (file or stream format)"""
+
+    def record_batches(self, source: Any, batch_size: int) -> Iterator:
+        pa = import_pyarrow()
+        if self.parser_settings["ARROW"]["stream"]:
+            reader = pa.ipc.open_stream(source)
+            batches = iter(reader)
+        else:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        self.check_schema(reader.schema)
+        for batch in batches:
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
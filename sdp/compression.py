@@ -0,0 +1,183 @@
+"""Transparent streaming decompression of input files.
+
+Compression is detected by magic bytes (by file extension if file is too short),
+decompressed data is streamed to readers without temporary files.
+Decompression can run in separate thread (zlib, bz2 and lzma release GIL),
+so it overlaps with parsing.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import pathlib
+import queue
+import threading
+from typing import Optional, Union, IO
+
+COMPRESSIONS = {
+    "gzip": (b"\x1f\x8b", (".gz", ".gzip")),
+    "bz2": (b"BZh", (".bz2",)),
+    "xz": (b"\xfd7zXZ\x00", (".xz", ".lzma")),
+    "zstd": (b"\x28\xb5\x2f\xfd", (".zst", ".zstd")),
+}
+
+MAGIC_SIZE = max(len(magic) for magic, _ in COMPRESSIONS.values())
+CHUNK_SIZE = 2 ** 20
+
+
+def detect_compression(path: Union[str, pathlib.Path]) -> Optional[str]:
+    """Return name of compression format or None for uncompressed file"""
+    path = pathlib.Path(path)
+    with path.open("rb") as fin:
+        head = fin.read(MAGIC_SIZE)
+    for name, (magic, extensions) in COMPRESSIONS.items():
+        if head.startswith(magic):
+            return name
+    if len(head) < MAGIC_SIZE:
+        for name, (magic, extensions) in COMPRESSIONS.items():
+            if path.suffix.lower() in extensions:
+                return name
+    return None
+
+
+def _open_zstd(path: pathlib.Path) -> IO[bytes]:
+    try:
+        import zstandard
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("{}. Use pip for installing module manually.".format(e)) from e
+    return zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+
+
+def open_decompressed(path: Union[str, pathlib.Path], compression: str) -> IO[bytes]:
+    """Open binary stream of decompressed data"""
+    path = pathlib.Path(path)
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    elif compression == "bz2":
+        return bz2.open(path, "rb")
+    elif compression == "xz":
+        return lzma.open(path, "rb")
+    elif compression == "zstd":
+        return _open_zstd(path)
+    raise ValueError("Unknown compression {}".format(compression))
+
+
+class ThreadedReader(io.RawIOBase):
+    """Raw binary stream reading underlying stream in background thread with bounded read-ahead"""
+
+    def __init__(self, stream: IO[bytes], chunk_size: int = CHUNK_SIZE, read_ahead: int = 4):
+        super(ThreadedReader, self).__init__()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._chunks = queue.Queue(maxsize=read_ahead)
+        self._buffer = b""
+        self._position = 0
+        self._eof = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._read_ahead, name="sdp-decompression", daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_ahead(self):
+        try:
+            while not self._stopped.is_set():
+                chunk = self.stream.read(self.chunk_size)
+                if not self._put(chunk) or not chunk:
+                    return
+        except BaseException as e:
+            self._put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._position >= len(self._buffer):
+            if self._eof:
+                return 0
+            chunk = self._chunks.get()
+            if isinstance(chunk, BaseException):
+                raise chunk
+            if not chunk:
+                self._eof = True
+                return 0
+            self._buffer = chunk
+            self._position = 0
+        size = min(len(buffer), len(self._buffer) - self._position)
+        buffer[:size] = self._buffer[self._position: self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+            self.stream.close()
+        super(ThreadedReader, self).close()
+
+
+def open_source(path: Union[str, pathlib.Path], binary: bool = False, threaded: bool = True,
+                encoding: Optional[str] = None, newline: Optional[str] = None) -> IO:
+    """Open input file, decompress it on the fly if file is compressed
+
+    :param binary: return binary stream, otherwise text stream
+    :param threaded: decompress in background thread
+    """
+    path = pathlib.Path(path)
+    compression = detect_compression(path)
+    if compression is None:
+        if binary:
+            return path.open("rb")
+        return path.open(encoding=encoding, newline=newline)
+
+    stream = open_decompressed(path, compression)
+    if threaded:
+        stream = io.BufferedReader(ThreadedReader(stream), CHUNK_SIZE)
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+
+def compression_by_extension(path: Union[str, pathlib.Path]) -> Optional[str]:
+    suffix = pathlib.Path(path).suffix.lower()
+    for name, (magic, extensions) in COMPRESSIONS.items():
+        if suffix in extensions:
+            return name
+    return None
+
+
+def open_compressed(path: Union[str, pathlib.Path], compression: Optional[str]) -> IO[bytes]:
+    """Open binary stream writing compressed data to file, uncompressed for ``compression=None``"""
+    path = pathlib.Path(path)
+    if compression is None:
+        return path.open("wb")
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    elif compression == "bz2":
+        return bz2.open(path, "wb")
+    elif compression == "xz":
+        return lzma.open(path, "wb")
+    elif compression == "zstd":
+        try:
+            import zstandard
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError("{}. Use pip for installing module manually.".format(e)) from e
+        return zstandard.ZstdCompressor().stream_writer(path.open("wb"), closefd=True)
+    raise ValueError("Unknown compression {}".format(compression))
+
+
+def open_output(path: Union[str, pathlib.Path], compression: Optional[str] = None, encoding: Optional[str] = None,
+                newline: Optional[str] = None) -> IO[str]:
+    """Open buffered text stream for writing, compression is chosen by file extension if it isn't set"""
+    if compression is None:
+        compression = compression_by_extension(path)
+    stream = io.BufferedWriter(open_compressed(path, compression), CHUNK_SIZE) if compression is not None \
+        else open_compressed(path, None)
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline, write_through=False)
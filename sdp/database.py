@@ -3,20 +3,34 @@ import json
 import logging
 import pathlib
 import random
+import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Union, Iterable
+from typing import List, Optional, Tuple, Union, Iterable
 
 import sqlalchemy
-from sqlalchemy import create_engine, MetaData, insert, Table
+from sqlalchemy import create_engine, event, MetaData, insert, Table
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine.url import URL
 from sqlalchemy.exc import DBAPIError, ArgumentError
 
+from sdp.column_stats import StatisticsCollector, store_statistics
+from sdp.compression import detect_compression, open_source
 from sdp.description import Description
 from sdp.description_typing import TypePeeker, DEFAULT_PEEKER
 from sdp.source_readers import SourceReader
 from sdp.file_status import LoadStatus, LoadResult
+from sdp.health import HealthMonitor
+from sdp.load_plan import LoadPlan, TargetPlan
+from sdp.load_settings import ConversionMode, LoadSettings
+from sdp.pipeline import Pipeline
+from sdp.reader_registry import Capability
+from sdp.reflection_cache import ReflectionCache
+from sdp.staging import StagingWriter
+from sdp.tail import TailStore
+from sdp.throttle import shared_throttle
+from sdp.verify import Checksum, store_checksum
+from sdp.writers import BatchWriter, MultiTableWriter, ParallelWriter, add_constants
 
 
 def get_metadata(conn):
@@ -40,6 +54,12 @@ class Drivers(Enum):
     SQLITE = "sqlite"
 
 
+STATEMENT_TIMEOUT_QUERIES = {
+    "postgresql": "SET statement_timeout = {}",
+    "mysql": "SET SESSION max_execution_time = {}",
+}
+
+
 @dataclass
 class DatabaseSettings:
     driver: Drivers = Drivers.POSTGRES_PSYCOPG2
@@ -48,13 +68,27 @@ class DatabaseSettings:
     database: str = "postgres"
     username: str = "postgres"
     password: str = ""
+    pool_size: int = 5  # Number of connections kept in pool
+    max_overflow: int = 10  # Number of connections opened over pool_size at peak
+    pool_pre_ping: bool = True  # Check connection liveness before taking it from pool
+    pool_recycle: int = -1  # Reopen connections older than this number of seconds (-1 disables)
+    statement_timeout: int = 0  # Statement timeout in milliseconds (0 disables), PostgreSQL and MySQL
+    health_check_ttl: int = 30  # Seconds while result of connection check is reused
+
+    URL_FIELDS = ("host", "port", "database", "username", "password")
 
     def to_url(self):
-        settings = dataclasses.asdict(self)
-        settings.pop("driver")
+        settings = {name: getattr(self, name) for name in DatabaseSettings.URL_FIELDS}
         settings["drivername"] = self.driver.value
         return URL(**settings)
 
+    def engine_args(self) -> dict:
+        args = {"pool_pre_ping": self.pool_pre_ping, "pool_recycle": self.pool_recycle}
+        if self.driver != Drivers.SQLITE:  # SQLite doesn't use queue pool
+            args["pool_size"] = self.pool_size
+            args["max_overflow"] = self.max_overflow
+        return args
+
 
 @dataclass
 class ConnectionTest:
@@ -70,30 +104,60 @@ class Database:
     engine: Optional[Engine] = None
     NO_EXIST_ERROR = "Database engine don't exist"
 
-    def __init__(self, settings: DatabaseSettings = None, type_peeker: TypePeeker = DEFAULT_PEEKER, echo=False):
+    def __init__(self, settings: DatabaseSettings = None, type_peeker: TypePeeker = DEFAULT_PEEKER, echo=False,
+                 load_settings: Optional[LoadSettings] = None):
         """
         Main class for interaction with database
         """
         self.engine_args = {"echo": echo}
         self.type_peeker = type_peeker
+        self.load_settings = load_settings if load_settings is not None else LoadSettings()
+        self.reflection_cache = ReflectionCache(self.load_settings.reflection_cache)
         self.settings = None
         self.url = None
+        self.health = HealthMonitor(self.test_connect)
         if settings is not None:
             self.update_engine(settings)
 
     def update_engine(self, settings: DatabaseSettings):
         self.settings = settings
         self.url = settings.to_url()
+        self.health.ttl = settings.health_check_ttl
+        self.health.invalidate()
         logging.debug(self.url)
         try:
-            self.engine = create_engine(self.url, **self.engine_args)
+            self.engine = create_engine(self.url, **self.engine_args, **settings.engine_args())
+            self._set_statement_timeout(settings.statement_timeout)
         except ModuleNotFoundError as e:
             logging.error("{}. Use pip for installing module manually.".format(e))
             self.engine = None
-        except ArgumentError as e:
+        except (ArgumentError, TypeError) as e:
             logging.error(e)
             self.engine = None
 
+    def _set_statement_timeout(self, timeout: int):
+        if timeout <= 0:
+            return
+        query = STATEMENT_TIMEOUT_QUERIES.get(self.engine.dialect.name)
+        if query is None:
+            logging.warning("Statement timeout isn't supported for {}".format(self.engine.dialect.name))
+            return
+
+        def set_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(query.format(int(timeout)))
+            cursor.close()
+
+        event.listen(self.engine, "connect", set_timeout)
+
+    def connection_status(self) -> ConnectionTest:
+        """Result of the last connection check, connection is checked again only after TTL"""
+        return self.health.status()
+
+    def start_heartbeat(self):
+        """Refresh connection status in background thread"""
+        self.health.start()
+
     def test_connect(self) -> ConnectionTest:
         if self.engine is None:
             return ConnectionTest(False, Database.NO_EXIST_ERROR)
@@ -118,6 +182,10 @@ class Database:
     def _metadata(self, conn):
         return get_metadata(conn)
 
+    def reflect_table(self, conn, name: str) -> Optional[Table]:
+        """Reflect table using reflection cache, return None if table doesn't exist"""
+        return self.reflection_cache.table(conn, repr(self.url), name)
+
     def table_columns(self, name) -> list[str]:
         try:
             with self.engine.connect() as conn:
@@ -127,63 +195,206 @@ class Database:
         except Exception:
             return []
 
-    def check_description(self, description: Description, table: Table):
-        base_table = description["table"]
+    def check_description(self, description: Union[Description, LoadPlan], table: Optional[Table],
+                          columns: Optional[Iterable[str]] = None):
+        """
+        :param columns: names of description columns inserted to the table (all by default)
+        """
+        plan = description if isinstance(description, LoadPlan) else description.compile(self.type_peeker)
+        base_table = table.name if table is not None else plan.table
         errors = []
-        if base_table not in self.engine.table_names():
+        if table is None:
             errors.append("Table {} doesn't exist in database {}."
                           .format(base_table, self.url))
 
         if len(errors) == 0:
             table_keys = table.c.keys()
-            columns = description["columns"]
-            for column in columns:
-                name = column["name"]
+            selected = set(columns) if columns is not None else None
+            for column in plan.columns:
+                name = column.name
+                if selected is not None and name not in selected:
+                    continue
                 if name not in table_keys:
                     errors.append("Column {} doesn't exist in table {}".format(name, base_table))
                 else:
                     database_column = table.c[name]
-                    generic_type = self.type_peeker.peek(column["type"], column["type_properties"])
-                    if not generic_type.is_target(database_column.type):
+                    if not self.type_peeker.is_target(column.type, database_column.type):
                         errors.append("Column {} have type \"{}\", when target column have type \"{}\"".format(
-                            name, column["type"], database_column.type
+                            name, column.type_name, database_column.type
                         ))
+            batch_id_column = self.load_settings.batch_id_column
+            if batch_id_column is not None and batch_id_column not in table_keys:
+                errors.append("Column {} for load batch id doesn't exist in table {}".format(batch_id_column,
+                                                                                            base_table))
         return errors
 
-    def _load_data(self, conn, table, reader: SourceReader, source):
-        stmt = insert(table, values=list(reader.parse_source(source)))
-        with conn.begin():
-            conn.execute(stmt)
+    def target_tables(self, conn, plan: LoadPlan) -> Tuple[List[Tuple[TargetPlan, Table]], List[str]]:
+        """Reflect and check tables of description targets, return pairs of target and table and errors"""
+        tables = []
+        errors = []
+        names = set(plan.column_names())
+        for target in plan.targets:
+            table = self.reflect_table(conn, target.table)
+            if table is None:
+                errors.append("Table {} doesn't exist in database {}.".format(target.table, self.url))
+                continue
+            for name in target.columns:
+                if name not in names:
+                    errors.append("Column {} of target {} doesn't exist in description".format(name, target.table))
+            if target.filter_column is not None and target.filter_column not in names:
+                errors.append("Filter column {} of target {} doesn't exist in description".format(
+                    target.filter_column, target.table))
+            errors.extend(self.check_description(plan, table, target.columns))
+            tables.append((target, table))
+        return tables, errors
+
+    def _writers_number(self, plan: LoadPlan) -> int:
+        writers = self.load_settings.writers
+        if writers > 1 and plan.ordered:
+            logging.debug("Description requires ordered insert, parallel writers are disabled")
+            return 1
+        if writers > 1 and self.engine.dialect.name == Drivers.SQLITE.value:
+            logging.debug("SQLite doesn't support concurrent writes, parallel writers are disabled")
+            return 1
+        return writers
+
+    @property
+    def collect_statistics(self) -> bool:
+        return self.load_settings.column_statistics or self.load_settings.statistics_table is not None
+
+    def _load_data(self, conn, table, reader: SourceReader, source, statistics: dict, batch_id=None):
+        """
+        :param table: target table or pairs of target and table for description with ``targets``
+        """
+        server_conversion = self.load_settings.conversion == ConversionMode.SERVER
+        if server_conversion and reader.plan.targets:
+            raise Exception("Server-side conversion doesn't support several target tables")
+        if server_conversion and Capability.RAW_TEXT not in reader.capabilities:
+            raise Exception("Format {} doesn't support server-side conversion".format(reader.plan.format))
+        targets = len(reader.plan.targets) > 0
+        # Rows for several tables are converted by targets after routing, only fields of matching targets
+        raw = server_conversion or targets
+        pipeline = Pipeline(reader, self.load_settings, convert=not raw)
+        writers = self._writers_number(reader.plan)
+        throttle = shared_throttle(self.engine, self.load_settings)
+        constants = {}
+        if batch_id is not None:
+            constants[self.load_settings.batch_id_column] = batch_id
+            statistics["batch_id"] = batch_id
+        source_batches = pipeline.batches(source)
+        batches = source_batches
+        collectors = {}
+        if targets and (self.load_settings.checksum or self.collect_statistics):
+            logging.warning("Checksum and column statistics aren't computed for several target tables")
+        if self.load_settings.checksum and not raw:
+            collectors["checksum"] = Checksum(reader.plan)
+        if self.collect_statistics and not raw:
+            collectors["column_statistics"] = StatisticsCollector(reader.plan)
+        for collector in collectors.values():
+            batches = collector.track(batches)
+        if targets:
+            # Rows of columnar readers are converted by batches in any case
+            convert = Capability.COLUMNAR not in reader.capabilities
+            writer = MultiTableWriter(conn, table, self.load_settings, throttle, constants, convert)
+        elif server_conversion:
+            writer = StagingWriter(conn, table, reader.plan, self.load_settings, throttle, constants)
+        else:
+            batches = add_constants(batches, constants)
+            if writers > 1:
+                writer = ParallelWriter(self.engine, table, self.load_settings, writers, throttle)
+            else:
+                writer = BatchWriter(conn, table, self.load_settings, throttle)
+        try:
+            writer.write(batches)
+        finally:
+            source_batches.close()  # Stop and join pipeline threads if writer failed
+            statistics["strategy"] = pipeline.strategy
+            statistics.update(writer.statistics())
+            for key, collector in collectors.items():
+                statistics[key] = collector.result()
 
-    def load_data(self, description: Description, source: Union[pathlib.Path, str]) -> LoadResult:
+    def _store_statistics(self, conn, table_name: str, source: pathlib.Path, column_statistics: dict):
+        try:
+            store_statistics(conn, self.load_settings.statistics_table, table_name, str(source), column_statistics)
+        except Exception as e:  # Data is already loaded
+            logging.warning("Cannot store column statistics to table {}: {}".format(
+                self.load_settings.statistics_table, e))
+
+    def _store_checksum(self, conn, table_name: str, source: pathlib.Path, batch_id, checksum: dict):
+        try:
+            store_checksum(conn, self.load_settings.checksum_table, table_name, str(source), batch_id, checksum)
+        except Exception as e:  # Data is already loaded
+            logging.warning("Cannot store checksum to table {}: {}".format(self.load_settings.checksum_table, e))
+
+    def _store_results(self, conn, table_name: str, source: pathlib.Path, batch_id, statistics: dict):
+        """Store column statistics and checksum of successful loading (full or incremental)"""
+        if self.load_settings.statistics_table and "column_statistics" in statistics:
+            self._store_statistics(conn, table_name, source, statistics["column_statistics"])
+        if self.load_settings.checksum_table and batch_id is not None and "checksum" in statistics:
+            self._store_checksum(conn, table_name, source, batch_id, statistics["checksum"])
+
+    def _load_tail(self, conn, table, reader: SourceReader, source: pathlib.Path, tail: TailStore,
+                   statistics: dict, batch_id=None):
+        if Capability.APPENDABLE not in reader.capabilities:
+            raise Exception("Format {} doesn't support incremental loading".format(reader.plan.format))
+        if detect_compression(source) is not None:
+            raise Exception("Compressed file {} can't be loaded incrementally".format(source))
+        tail_range = tail.new_range(source, reader.description, reader)
+        statistics["offset"] = tail_range.start
+        statistics["new_bytes"] = tail_range.end - tail_range.start
+        if not tail_range.empty:
+            reader.continued = tail_range.start > 0
+            binary = Capability.BINARY in reader.capabilities
+            with tail.open_range(source, tail_range, binary=binary) as fin:
+                self._load_data(conn, table, reader, fin, statistics, batch_id)
+        tail.commit(tail_range)
+
+    def load_data(self, description: Description, source: Union[pathlib.Path, str],
+                  tail: Optional[TailStore] = None, batch_id=None) -> LoadResult:
         """
         :param description: Словарь с описывающий формат файла
         :param source: Путь к файлу
+        :param tail: Состояние инкрементальной загрузки, загружаются только новые записи в конце файла
+        :param batch_id: Идентификатор загрузки для колонки ``LoadSettings.batch_id_column``
+            (по умолчанию время начала загрузки в миллисекундах)
         :return: FileStatus.SUCCESS если удалось успешно загрузить файл в базу, иначе FileStatus.REJECTED
         """
         if self.engine is None:
             return LoadResult(LoadStatus.REJECTED, errors=[Database.NO_EXIST_ERROR])
 
         with self.engine.connect() as conn:
-            metadata = self._metadata(conn)
-            table = metadata.tables[description["table"]]
-            errors = self.check_description(description, table)
+            plan = description.compile(self.type_peeker)
+            if plan.targets:
+                table, errors = self.target_tables(conn, plan)
+            else:
+                table = self.reflect_table(conn, plan.table)
+                errors = self.check_description(plan, table)
             if len(errors) != 0:
                 return LoadResult(LoadStatus.REJECTED, errors)
 
+            statistics = {}
+            if self.load_settings.batch_id_column is None:
+                batch_id = None
+            elif batch_id is None:
+                batch_id = int(time.time() * 1000)
             try:
-                reader = SourceReader.get_reader(description)
+                reader = SourceReader.get_reader(plan, self.load_settings.parse_workers)
                 if isinstance(source, str):
                     source = pathlib.Path(source)
                 if isinstance(source, pathlib.Path):
                     if not source.exists():
                         return LoadResult(LoadStatus.DELETED)
-                    with source.open() as fin:
-                        self._load_data(conn, table, reader, fin)
+                    if tail is not None:
+                        self._load_tail(conn, table, reader, source, tail, statistics, batch_id)
+                    else:
+                        binary = Capability.BINARY in reader.capabilities
+                        with open_source(source, binary=binary, threaded=self.load_settings.threaded) as fin:
+                            self._load_data(conn, table, reader, fin, statistics, batch_id)
+                    self._store_results(conn, plan.table, source, batch_id, statistics)
             except Exception as e:
-                return LoadResult(LoadStatus.REJECTED, exceptions=[e])
+                return LoadResult(LoadStatus.REJECTED, exceptions=[e], statistics=statistics)
 
-        return LoadResult(LoadStatus.SUCCESS)
+        return LoadResult(LoadStatus.SUCCESS, statistics=statistics)
 
     @staticmethod
     def connect_from_file(config):
@@ -197,11 +408,12 @@ class Database:
 
         try:
             database_settings = DatabaseSettings(**config["database"])
+            load_settings = LoadSettings(**config.get("load", {}))
         except Exception as e:
             logging.error(e)
             logging.error("Not valid configuration file format")
             return None
-        database = Database(database_settings)
+        database = Database(database_settings, load_settings=load_settings)
         conn_test = database.test_connect()
         if not conn_test.success:
             logging.error(conn_test.error)
@@ -220,6 +432,12 @@ class FakeDatabase:
     def test_connect(self):
         return ConnectionTest(True)
 
+    def connection_status(self):
+        return ConnectionTest(True)
+
+    def start_heartbeat(self):
+        pass
+
     def load_data(self, description, source):
         if random.randint(0,2) % 2:
             return LoadResult(LoadStatus.SUCCESS)
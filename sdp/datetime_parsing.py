@@ -0,0 +1,143 @@
+"""Fast parsers of datetime strings for all datetime flavours of description.
+
+* ``iso`` and ``sql`` — ``datetime.fromisoformat`` (implemented in C, called without Python wrapper)
+* ``unixtime`` — seconds since epoch (UTC), fractional seconds are allowed
+* ``custom`` — ``strptime`` format. Fixed-width formats (``%Y %m %d %H %M %S`` and trailing ``%f``)
+  are compiled to slicing: date part is taken from cache of recently seen date prefixes,
+  the rest is rearranged to ISO string and parsed by ``fromisoformat``. Separators of the rest are checked,
+  values not matching format are passed to ``strptime``, which raises error. Other formats use ``strptime``.
+"""
+import datetime
+import sys
+from typing import Any, Callable, Iterable, Optional
+
+DATETIME_FLAVOURS = ("unixtime", "sql", "iso", "custom")
+EPOCH = datetime.datetime(1970, 1, 1)
+FIXED_WIDTHS = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2}
+PREFIX_CACHE_SIZE = 4096
+
+_fromisoformat = datetime.datetime.fromisoformat
+_timedelta = datetime.timedelta
+
+
+parse_iso = _fromisoformat
+
+
+if sys.version_info < (3, 12):
+    _utcfromtimestamp = datetime.datetime.utcfromtimestamp
+
+    def parse_unixtime(value: Any) -> datetime.datetime:
+        return _utcfromtimestamp(float(value))
+else:
+    def parse_unixtime(value: Any) -> datetime.datetime:  # utcfromtimestamp is deprecated
+        return EPOCH + _timedelta(0, float(value))
+
+
+def _fields(date_format: str) -> Optional[tuple]:
+    """Return ({directive: (start, end)}, length, literals) of fixed-width format, None if format isn't fixed-width.
+    End of ``%f`` and length are None, if format ends with ``%f``, literals are pairs of position and character
+    """
+    fields = {}
+    literals = []
+    position = 0
+    i = 0
+    while i < len(date_format):
+        if date_format[i] != "%":
+            literals.append((position, date_format[i]))
+            position += 1
+            i += 1
+            continue
+        directive = date_format[i + 1: i + 2]
+        if directive in fields:
+            return None
+        if directive == "f":
+            if i + 2 != len(date_format):
+                return None
+            fields["f"] = (position, None)
+            return fields, None, literals
+        width = FIXED_WIDTHS.get(directive)
+        if width is None:
+            return None
+        fields[directive] = (position, position + width)
+        position += width
+        i += 2
+    return fields, position, literals
+
+
+def compile_format(date_format: str) -> Callable[[str], datetime.datetime]:
+    """Return parser of strings in ``strptime`` format"""
+    strptime = datetime.datetime.strptime
+
+    def parse_strptime(value: str) -> datetime.datetime:
+        return strptime(value, date_format)
+
+    compiled = _fields(date_format)
+    if compiled is None:
+        return parse_strptime
+    fields, length, literals = compiled
+    if not {"Y", "m", "d"} <= fields.keys():
+        return parse_strptime
+
+    date_end = max(fields[directive][1] for directive in "Ymd")
+    # Literals of date part are validated by strptime for every new prefix, the rest are checked for every value
+    time_literals = tuple((position, char) for position, char in literals if position >= date_end)
+    if "%H:%M:%S" in date_format:  # Time is already in ISO form
+        start = fields["H"][0]
+        time_slice = slice(start, start + 8)
+    else:
+        time_slice = None
+    hour = slice(*fields.get("H", (0, 0)))
+    minute = slice(*fields.get("M", (0, 0)))
+    second = slice(*fields.get("S", (0, 0)))
+    has_time = "H" in fields or "M" in fields or "S" in fields
+    fraction = fields["f"][0] if "f" in fields else None
+    cache = {}
+
+    def parse_fixed(value: str) -> datetime.datetime:
+        if length is not None and len(value) != length:
+            return strptime(value, date_format)
+        for position, char in time_literals:
+            if value[position:position + 1] != char:
+                return strptime(value, date_format)
+        key = value[:date_end]
+        date = cache.get(key)
+        if date is None:
+            date = strptime(value, date_format).date().isoformat() + "T"  # Validate literals of new prefix
+            if len(cache) >= PREFIX_CACHE_SIZE:
+                cache.clear()
+            cache[key] = date
+        if time_slice is not None:
+            iso = date + value[time_slice]
+        elif has_time:
+            iso = date + (value[hour] or "00") + ":" + (value[minute] or "00") + ":" + (value[second] or "00")
+        else:
+            iso = date + "00:00:00"
+        if fraction is not None:
+            digits = value[fraction:]
+            if not (digits.isdigit() and len(digits) <= 6):
+                return strptime(value, date_format)
+            iso += "." + digits.ljust(6, "0")
+        return _fromisoformat(iso)
+
+    return parse_fixed
+
+
+def create_parser(flavour: str, date_format: Optional[str] = None) -> Callable[[Any], datetime.datetime]:
+    if flavour in ("iso", "sql"):
+        return parse_iso
+    if flavour == "unixtime":
+        return parse_unixtime
+    if flavour == "custom":
+        if not date_format:
+            raise ValueError("Datetime flavour \"custom\" requires datetime_format")
+        return compile_format(date_format)
+    raise ValueError("Unknown datetime flavour {}".format(flavour))
+
+
+def parse_many(parser: Callable[[Any], datetime.datetime], values: Iterable) -> list:
+    """Parse column of values, None values are kept"""
+    if not isinstance(values, list):
+        values = list(values)
+    if None not in values:
+        return list(map(parser, values))
+    return [parser(value) if value is not None else None for value in values]
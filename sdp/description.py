@@ -93,8 +93,10 @@ class Description:
     @classmethod
     def load_scheme(cls):
         if cls._root_schema is None:
+            from sdp.reader_registry import READERS
             with open(JSON_SCHEMA) as fin:
-                cls._root_schema = json.load(fin)
+                schema = json.load(fin)
+            cls._root_schema = READERS.update_schema(schema)
         return cls._root_schema
 
     @staticmethod
@@ -120,6 +122,12 @@ class Description:
     def clone(self):
         return Description(copy.deepcopy(self.data), self.scheme)
 
+    def compile(self, peeker=None) -> "LoadPlan":
+        """Resolve defaults and column converters once, return immutable ``LoadPlan`` for loading"""
+        from sdp.description_typing import DEFAULT_PEEKER
+        from sdp.load_plan import compile_description
+        return compile_description(self, peeker if peeker is not None else DEFAULT_PEEKER)
+
 
 class DescriptionList(UserList):
 
@@ -1,10 +1,14 @@
 import abc
 import datetime
+import threading
 from abc import ABC
-from typing import Callable, Optional, Any, Union, Type
+from types import MappingProxyType
+from typing import Callable, Optional, Any, Union, Type, Iterable
 import sqlalchemy.types
 
+from sdp.datetime_parsing import create_parser, parse_many, DATETIME_FLAVOURS, EPOCH
 from sdp.description import Description
+from sdp.load_plan import freeze
 
 
 class DatabaseType:
@@ -24,6 +28,10 @@ class DatabaseType:
     def represent(self, value) -> str:
         return str(value)
 
+    def format_value(self, value) -> str:
+        """Return raw string which is converted to ``value`` by this type, inverse of ``__call__``"""
+        return str(value)
+
     def to_dict(self):
         result = {"type": self.name}
         if self.properties is not None:
@@ -61,6 +69,13 @@ class PrimitiveType(DatabaseType):
             return bytes(value, encoding=self.properties["encoding"])
         return self.type(value)
 
+    def format_value(self, value) -> str:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value).decode(self.properties["encoding"] if self.properties is not None else "UTF-8")
+        if self.type is bool:
+            return "True" if value else ""  # bool() of any non-empty string is True
+        return str(value)
+
     def is_target(self, other):
         if DatabaseType.is_sqlalchemy_type(other):
             return self.type == other.python_type
@@ -77,13 +92,42 @@ class DatetimeType(DatabaseType, ABC):
         return isinstance(other, sqlalchemy.types.DateTime)
 
 
-class ISODatetimeType(DatetimeType):
+class ParsedDatetimeType(DatetimeType):
+    """Datetime type with parser of flavour from ``sdp.datetime_parsing``"""
 
-    def __init__(self):
-        super(ISODatetimeType, self).__init__({"datetime_flavour": "iso"})
+    def __init__(self, properties: Optional[Description] = None):
+        super(ParsedDatetimeType, self).__init__(properties)
+        date_format = properties["datetime_format"] if self.flavour == "custom" else None
+        self.parser = create_parser(self.flavour, date_format)
+
+    @property
+    def flavour(self) -> str:
+        return self.properties["datetime_flavour"]
 
     def __call__(self, value: str) -> Any:
-        return datetime.datetime.fromisoformat(value)
+        return self.parser(value)
+
+    def format_value(self, value) -> str:
+        if isinstance(value, str):
+            return value
+        flavour = self.flavour
+        if flavour == "unixtime":
+            if value.tzinfo is not None:
+                value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            return repr((value - EPOCH).total_seconds())
+        if flavour == "custom":
+            return value.strftime(self.properties["datetime_format"])
+        return value.isoformat(" " if flavour == "sql" else "T")
+
+    def convert_many(self, values: Iterable) -> list:
+        """Convert column of values, None values are kept"""
+        return parse_many(self.parser, values)
+
+
+class ISODatetimeType(ParsedDatetimeType):
+
+    def __init__(self):
+        super(ISODatetimeType, self).__init__({"datetime_flavour": "iso"})
 
 
 class TypePeeker(abc.ABC):
@@ -95,6 +139,9 @@ class TypePeeker(abc.ABC):
     def peek_from_column(self, column: Description) -> Optional[DatabaseType]:
         return self.peek(column["type"], column["type_properties"])
 
+    def is_target(self, type_: DatabaseType, other: sqlalchemy.types.TypeEngine) -> bool:
+        return type_.is_target(other)
+
 
 class ListTypePeeker(TypePeeker):
 
@@ -135,8 +182,64 @@ class DatetimePeeker(TypePeeker):
         flavour = properties["datetime_flavour"]
         if flavour == "iso":
             return ISODatetimeType()
-        else:
-            return None
+        if flavour in DATETIME_FLAVOURS:
+            return ParsedDatetimeType(properties)
+        return None
+
+
+CONVERTERS_CACHE_SIZE = 4096
+
+
+class ConverterRegistry(TypePeeker):
+    """Peeker caching resolved converters by (type name, properties) and results of ``is_target``
+    by (converter, SQLAlchemy type class). Converters are stateless and shared by all readers of the process
+    """
+
+    def __init__(self, peeker: TypePeeker):
+        self.peeker = peeker
+        self._converters = {}
+        self._targets = {}
+        self._identities = {}  # id of read-only properties: (properties, name, converter)
+        self._lock = threading.Lock()
+
+    def register(self, peeker: TypePeeker):
+        self.peeker.register(peeker)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._converters.clear()
+            self._targets.clear()
+            self._identities.clear()
+
+    def peek(self, name: str, properties: Optional[Description] = None) -> Optional[DatabaseType]:
+        entry = self._identities.get(id(properties))
+        if entry is not None and entry[0] is properties and entry[1] == name:
+            return entry[2]
+        try:
+            key = (name, freeze(properties))
+        except TypeError:
+            return self.peeker.peek(name, properties)
+        type_ = self._converters.get(key)
+        if type_ is None:
+            type_ = self.peeker.peek(name, properties)
+            if type_ is None:
+                return None
+            with self._lock:
+                type_ = self._converters.setdefault(key, type_)
+        if isinstance(properties, MappingProxyType):  # Properties of compiled columns are shared and read-only
+            with self._lock:
+                if len(self._identities) >= CONVERTERS_CACHE_SIZE:
+                    self._identities.clear()
+                self._identities[id(properties)] = (properties, name, type_)
+        return type_
+
+    def is_target(self, type_: DatabaseType, other: sqlalchemy.types.TypeEngine) -> bool:
+        key = (type_, type(other))
+        result = self._targets.get(key)
+        if result is None:
+            result = self._targets[key] = type_.is_target(other)
+        return result
 
 
-DEFAULT_PEEKER = ListTypePeeker(PrimitiveTypePeeker(), DatetimePeeker())
+DEFAULT_PEEKER = ConverterRegistry(ListTypePeeker(PrimitiveTypePeeker(), DatetimePeeker()))
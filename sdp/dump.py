@@ -0,0 +1,108 @@
+"""Export of table to CSV file in format of description (reverse direction of loading).
+
+Rows are streamed by server-side cursor and formatted by column types of description
+(``DatabaseType.format_value``), so written file can be loaded again by the same description.
+NULL is written as ``null`` marker of CSV settings (e.g. ``\\N``), without marker it's written as empty field,
+which is loaded back as empty string, so tables with NULL numbers or datetimes need the marker.
+PostgreSQL with psycopg2 writes file by ``COPY ... TO STDOUT`` when server text representation
+of all columns is readable by the description. Output is written through buffered (optionally compressed)
+stream, memory usage doesn't depend on size of table.
+"""
+import csv
+import pathlib
+import time
+from typing import Optional, Union
+
+from sqlalchemy import select
+
+from sdp.compression import open_output
+from sdp.description import Description
+from sdp.load_plan import LoadPlan, resolve_defaults
+
+DUMP_BATCH_SIZE = 10000
+# Types which server text representation (PostgreSQL COPY) is parsed by converters of description
+COPY_TYPES = ("integer", "float", "string")
+COPY_DATETIME_FLAVOURS = ("iso", "sql")
+
+
+def csv_settings(plan: LoadPlan) -> dict:
+    """CSV settings of description, defaults for descriptions of other formats"""
+    schema = Description.load_scheme()["properties"]["parser_settings"]["properties"]["CSV"]
+    return resolve_defaults(schema, dict(plan.parser_settings.get("CSV", {})))
+
+
+def can_copy(conn, plan: LoadPlan) -> bool:
+    if conn.dialect.name != "postgresql" or conn.dialect.driver != "psycopg2":
+        return False
+    for column in plan.columns:
+        if column.type_name == "datetime":
+            if column.type_properties["datetime_flavour"] not in COPY_DATETIME_FLAVOURS:
+                return False
+        elif column.type_name not in COPY_TYPES:
+            return False
+    return True
+
+
+def _copy(conn, statement, plan: LoadPlan, fout) -> int:
+    settings = csv_settings(plan)
+    compiled = statement.compile(conn, compile_kwargs={"literal_binds": True})
+    copy = "COPY ({}) TO STDOUT WITH (FORMAT csv, DELIMITER {}, QUOTE {}, NULL {})".format(
+        compiled, _literal(settings["delimiter"]), _literal(settings["quotechar"] or "\""), _literal(settings["null"]))
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(copy, fout)
+        return cursor.rowcount
+
+
+def _literal(value: str) -> str:
+    return "'{}'".format(value.replace("'", "''"))
+
+
+def _stream(conn, statement, plan: LoadPlan, fout, batch_size: int) -> int:
+    settings = csv_settings(plan)
+    writer = csv.writer(fout, delimiter=settings["delimiter"], quotechar=settings["quotechar"] or "\"",
+                        lineterminator="\n")
+    formatters = [column.type.format_value for column in plan.columns]
+    null = settings["null"]
+    result = conn.execution_options(stream_results=True).execute(statement)
+    rows = 0
+    try:
+        while True:
+            batch = result.fetchmany(batch_size)
+            if not batch:
+                break
+            writer.writerows([[null if value is None else format_value(value)
+                               for format_value, value in zip(formatters, row)] for row in batch])
+            rows += len(batch)
+    finally:
+        result.close()
+    return rows
+
+
+def dump_table(database, description: Union[Description, LoadPlan], path: Union[str, pathlib.Path],
+               compression: Optional[str] = None, batch_size: int = DUMP_BATCH_SIZE,
+               use_copy: bool = True) -> dict:
+    """Write rows of description table to CSV file ``path``, return statistics.
+
+    :param compression: compression of file, by default chosen by extension (e.g. ``.csv.gz``)
+    :param use_copy: use ``COPY TO STDOUT`` for PostgreSQL if it's possible
+    """
+    plan = description if isinstance(description, LoadPlan) else description.compile(database.type_peeker)
+    settings = csv_settings(plan)
+    start = time.perf_counter()
+    with database.engine.connect() as conn:
+        table = database.reflect_table(conn, plan.table)
+        if table is None:
+            raise Exception("Table {} doesn't exist in database {}".format(plan.table, database.url))
+        statement = select([table.c[column.name] for column in plan.columns])
+        copy = use_copy and can_copy(conn, plan)
+        with open_output(path, compression, newline="") as fout:
+            if settings["header"]:
+                csv.writer(fout, delimiter=settings["delimiter"], quotechar=settings["quotechar"] or "\"",
+                           lineterminator="\n").writerow(plan.column_names())
+            fout.write("\n" * settings["skipinitialrow"])  # Skipped by reader after header
+            if copy:
+                fout.flush()
+                rows = _copy(conn, statement, plan, fout)
+            else:
+                rows = _stream(conn, statement, plan, fout, batch_size)
+    return {"rows": rows, "method": "copy" if copy else "cursor", "seconds": time.perf_counter() - start}
@@ -9,14 +9,25 @@ class LoadStatus(Enum):
     DELETED = auto()
 
 
+def _format_statistic(key, value) -> str:
+    if isinstance(value, (list, tuple)):
+        return "{}:\n{}".format(key, "\n".join(map(lambda x: "    {}".format(x), value)))
+    elif isinstance(value, dict):
+        return "{}:\n{}".format(key, "\n".join(map(lambda x: "    {}: {}".format(*x), value.items())))
+    return "{}: {}".format(key, value)
+
+
 @dataclasses.dataclass
 class LoadResult:
     status : LoadStatus
     errors: list = dataclasses.field(default_factory=list)
     exceptions: list = dataclasses.field(default_factory=list)
+    statistics: dict = dataclasses.field(default_factory=dict)
 
     def to_string(self, path):
         result = "Loading {}: {}\n".format(path, self.status.name)
-        result += "\n".join(map(lambda x : "ERROR: {}".format(x), self.errors))
-        result += "\n".join(map(lambda x : "EXCEPTION: {}".format(x), self.exceptions))
+        lines = list(map(lambda x : "ERROR: {}".format(x), self.errors))
+        lines += list(map(lambda x : "EXCEPTION: {}".format(x), self.exceptions))
+        lines += list(map(lambda x : _format_statistic(*x), self.statistics.items()))
+        result += "\n".join(lines)
         return result
@@ -0,0 +1,59 @@
+import logging
+import threading
+import time
+from typing import Callable, Any, Optional
+
+
+class HealthMonitor:
+    """Cache of connection check result.
+
+    Result is reused during ``ttl`` seconds, after that it is checked again on request.
+    Background heartbeat thread (``start``) refreshes result before it expires,
+    so status requests don't wait for connection.
+    """
+
+    def __init__(self, check: Callable[[], Any], ttl: float = 30):
+        self.check = check
+        self.ttl = ttl
+        self._result = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def invalidate(self):
+        with self._lock:
+            self._result = None
+
+    def refresh(self):
+        result = self.check()
+        with self._lock:
+            self._result = result
+            self._checked = time.monotonic()
+        return result
+
+    def status(self):
+        with self._lock:
+            if self._result is not None and time.monotonic() - self._checked < self.ttl:
+                return self._result
+        return self.refresh()
+
+    def _heartbeat(self):
+        while not self._stopped.wait(max(self.ttl / 2, 0.1)):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.debug("Connection heartbeat failed: {}".format(e))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._heartbeat, name="sdp-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,213 @@
+"""Inference of description from sample of CSV file.
+
+Sample consists of first lines of file and lines at random positions (uncompressed files are read
+only at these positions, compressed files are streamed once with reservoir sampling).
+Dialect and header are detected by ``csv.Sniffer``, type of every column is the narrowest type
+which converters of loader accept for all sampled values: integer, float, datetime (flavour or
+``strptime`` format) or string.
+"""
+import csv
+import importlib
+import io
+import pathlib
+import random
+import re
+from typing import List, Optional, Tuple, Union
+
+import jsonschema
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, Integer, LargeBinary, MetaData, String, Table, \
+    Text
+from sqlalchemy.schema import CreateTable
+
+from sdp.compression import detect_compression, open_source
+from sdp.datetime_parsing import compile_format, parse_iso
+from sdp.description import Description
+
+HEAD_LINES = 1000
+SAMPLE_LINES = 1000
+DELIMITERS = ",;\t|"
+CUSTOM_DATETIME_FORMATS = (
+    "%d.%m.%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M:%S", "%Y/%m/%d %H:%M:%S",
+    "%d.%m.%Y %H:%M", "%d/%m/%Y %H:%M", "%Y%m%d%H%M%S", "%d.%m.%Y", "%d/%m/%Y", "%Y/%m/%d",
+)
+DEFAULT_CSV_SETTINGS = {"delimiter": ",", "quotechar": "\"", "skipinitialspace": False, "header": False}
+INT32 = 2 ** 31
+MIN_STRING_LENGTH = 8
+
+
+def _sample_positions(path: pathlib.Path, start: int, size: int, rng: random.Random) -> List[str]:
+    """Read lines following random byte positions after ``start`` of uncompressed file"""
+    end = path.stat().st_size
+    if end <= start:
+        return []
+    lines = []
+    seen = set()
+    with path.open("rb") as fin:
+        for position in sorted(rng.randrange(start, end) for _ in range(size)):
+            fin.seek(max(position - 1, 0))
+            fin.readline()  # Rest of line containing position (line starts at position if previous byte is newline)
+            offset = fin.tell()
+            line = fin.readline()
+            if line and offset not in seen:
+                seen.add(offset)
+                lines.append(line.decode(errors="replace"))
+    return lines
+
+
+def _reservoir(lines, size: int, rng: random.Random) -> List[str]:
+    sample = []
+    for n, line in enumerate(lines):
+        if n < size:
+            sample.append(line)
+        else:
+            i = rng.randrange(n + 1)
+            if i < size:
+                sample[i] = line
+    return sample
+
+
+def sample_lines(path: Union[str, pathlib.Path], head: int = HEAD_LINES, size: int = SAMPLE_LINES,
+                 seed: int = 0) -> Tuple[List[str], List[str]]:
+    """Return (first ``head`` lines, up to ``size`` lines sampled from the rest of file)"""
+    path = pathlib.Path(path)
+    rng = random.Random(seed)
+    compressed = detect_compression(path) is not None
+    with open_source(path, binary=not compressed, threaded=False) as fin:
+        if compressed:
+            lines = iter(fin.readline, "")
+            head_lines = [line for _, line in zip(range(head), lines)]
+            return head_lines, _reservoir(lines, size, rng)
+        head_lines = [line.decode(errors="replace") for _, line in zip(range(head), iter(fin.readline, b""))]
+        start = fin.tell()
+    return head_lines, _sample_positions(path, start, size, rng)
+
+
+def detect_dialect(lines: List[str]) -> dict:
+    """Return CSV parser settings (delimiter, quotechar, skipinitialspace, header) detected in lines"""
+    text = "".join(lines)
+    sniffer = csv.Sniffer()
+    settings = dict(DEFAULT_CSV_SETTINGS)
+    try:
+        dialect = sniffer.sniff(text, delimiters=DELIMITERS)
+        settings.update(delimiter=dialect.delimiter, quotechar=dialect.quotechar or "\"",
+                        skipinitialspace=dialect.skipinitialspace)
+    except csv.Error:
+        pass
+    try:
+        settings["header"] = sniffer.has_header(text)
+    except csv.Error:
+        pass
+    return settings
+
+
+def column_names(header: Optional[List[str]], count: int) -> List[str]:
+    names = []
+    for n in range(count):
+        name = header[n] if header is not None and n < len(header) else ""
+        name = re.sub(r"\W+", "_", name.strip()).strip("_").lower() or "column_{}".format(n + 1)
+        unique = name
+        suffix = 2
+        while unique in names:
+            unique = "{}_{}".format(name, suffix)
+            suffix += 1
+        names.append(unique)
+    return names
+
+
+def _all(convert, values: List[str]) -> bool:
+    try:
+        for value in values:
+            convert(value)
+    except (ValueError, TypeError, OverflowError):
+        return False
+    return True
+
+
+def _is_code(value: str) -> bool:
+    digits = value.lstrip("+-")
+    return len(digits) > 1 and digits.startswith("0") and digits.isdigit()
+
+
+def infer_type(values: List[str]) -> dict:
+    """Return column description items (type, type_properties) for sampled raw values.
+    Loader converts empty values by column type too, so only strings accept them
+    """
+    codes = any(_is_code(value) for value in values)  # Leading zeros are kept in strings
+    if not codes and _all(int, values):
+        return {"type": "integer"}
+    if not codes and _all(float, values):
+        return {"type": "float"}
+    if all(len(value) >= 10 for value in values) and _all(parse_iso, values):
+        flavour = "sql" if all(value[10:11] == " " for value in values) else "iso"
+        return {"type": "datetime", "type_properties": {"datetime_flavour": flavour}}
+    for date_format in CUSTOM_DATETIME_FORMATS:
+        if _all(compile_format(date_format), values):
+            return {"type": "datetime", "type_properties": {"datetime_flavour": "custom",
+                                                            "datetime_format": date_format}}
+    length = MIN_STRING_LENGTH
+    longest = max((len(value) for value in values), default=0)
+    while length < longest:  # Sample can miss longer values, length is rounded up to power of 2
+        length *= 2
+    return {"type": "string", "type_properties": {"length": length}}
+
+
+class Inference:
+    """Result of inference: description data and properties of sample used for DDL"""
+
+    def __init__(self, description: dict, wide: List[bool], rows: int):
+        self.description = description
+        self.wide = wide  # Integer column has values out of 32 bit range
+        self.rows = rows
+
+    def create_table(self, metadata: Optional[MetaData] = None) -> Table:
+        columns = []
+        for column, wide in zip(self.description["columns"], self.wide):
+            properties = column.get("type_properties", {})
+            type_name = column["type"]
+            if type_name == "integer":
+                type_ = BigInteger() if wide else Integer()
+            elif type_name == "string":
+                type_ = String(properties["length"]) if "length" in properties else Text()
+            else:
+                type_ = {"float": Float, "datetime": DateTime, "boolean": Boolean, "binary": LargeBinary}[type_name]()
+            columns.append(Column(column["name"], type_))
+        return Table(self.description["table"], metadata if metadata is not None else MetaData(), *columns)
+
+    def ddl(self, dialect: str = "postgresql") -> str:
+        """CREATE TABLE statement in SQL dialect of database"""
+        module = importlib.import_module("sqlalchemy.dialects.{}".format(dialect.split("+")[0]))
+        return str(CreateTable(self.create_table()).compile(dialect=module.dialect())).strip() + ";"
+
+
+def infer_description(path: Union[str, pathlib.Path], table: Optional[str] = None, head: int = HEAD_LINES,
+                      size: int = SAMPLE_LINES, seed: int = 0) -> Inference:
+    path = pathlib.Path(path)
+    head_lines, sampled = sample_lines(path, head, size, seed)
+    settings = detect_dialect(head_lines[:100])
+    comment = "#"
+    head_lines = [line for line in head_lines if not line.startswith(comment)]
+    sampled = [line for line in sampled if not line.startswith(comment)]
+    dialect = {key: settings[key] for key in ("delimiter", "quotechar", "skipinitialspace")}
+    rows = list(csv.reader(io.StringIO("".join(head_lines)), **dialect))
+    header = rows.pop(0) if settings["header"] and rows else None
+    count = len(header) if header is not None else max((len(row) for row in rows), default=0)
+    rows += [row for row in csv.reader(sampled, **dialect) if len(row) == count]  # Skip parts of multiline records
+    rows = [row for row in rows if len(row) == count]
+
+    columns = []
+    wide = []
+    for n, name in enumerate(column_names(header, count)):
+        values = [row[n] for row in rows]
+        column = {"name": name}
+        column.update(infer_type(values))
+        columns.append(column)
+        wide.append(column["type"] == "integer" and any(not -INT32 <= int(value) < INT32 for value in values))
+
+    csv_settings = {key: value for key, value in settings.items() if value != DEFAULT_CSV_SETTINGS[key]}
+    name = table or re.sub(r"\W+", "_", path.name.split(".")[0]).lower()
+    description = {"format": "CSV", "table": name}
+    if csv_settings:
+        description["parser_settings"] = {"CSV": csv_settings}
+    description["columns"] = columns
+    jsonschema.validate(description, schema=Description.load_scheme())
+    return Inference(description, wide, len(rows))
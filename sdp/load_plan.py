@@ -0,0 +1,229 @@
+"""Compiled form of description used during loading.
+
+``Description`` resolves every key through JSON schema and wraps nested values on each access.
+``LoadPlan`` is built once by ``Description.compile()``: defaults are resolved, column types are converted
+to converters, and the result is immutable object with ``__slots__`` which is cheap to read in hot loops.
+"""
+from types import MappingProxyType
+from typing import Any, Callable, Hashable, List, Mapping, Optional, Tuple
+
+from sdp.description import Description
+from sdp.reader_registry import READERS
+
+RESOLVED_CACHE_SIZE = 4096
+_SCALARS = (str, int, float, bool, type(None))
+_resolved_columns = {}
+_VALUE_FILTERS = ("equals", "not_equals", "in", "not_in")
+
+
+def resolve_defaults(schema: dict, data: Optional[dict]) -> dict:
+    """Return copy of object data with defaults of schema for missing properties (recursively for objects)"""
+    data = data if data is not None else {}
+    result = {}
+    for key, property_schema in schema.get("properties", {}).items():
+        value = data.get(key)
+        if property_schema.get("type") == "object":
+            value = resolve_defaults(property_schema, value)
+        elif value is None:
+            value = property_schema.get("default")
+        result[key] = value
+    for key, value in data.items():
+        result.setdefault(key, value)
+    return result
+
+
+def freeze(value: Any) -> Hashable:
+    """Return hashable copy of JSON-like value, defaults of Description are resolved"""
+    if type(value) in _SCALARS:
+        return value
+    if isinstance(value, Description):
+        value = resolve_defaults(value.scheme, value.data)
+    if isinstance(value, (dict, MappingProxyType)):
+        return tuple(sorted([(key, freeze(item)) for key, item in value.items()]))
+    if isinstance(value, (list, tuple)):
+        return tuple([freeze(item) for item in value])
+    hash(value)
+    return value
+
+
+def clear_cache():
+    _resolved_columns.clear()
+
+
+def _resolve_column(schema: dict, data: dict) -> dict:
+    """``resolve_defaults`` for column, memoized by column data"""
+    try:
+        key = (id(schema), freeze(data))
+    except TypeError:
+        key = None
+    column = _resolved_columns.get(key)
+    if column is None:
+        column = resolve_defaults(schema, data)
+        column["type_properties"] = MappingProxyType(column["type_properties"])
+        if key is None:
+            return column
+        if len(_resolved_columns) >= RESOLVED_CACHE_SIZE:
+            _resolved_columns.clear()
+        _resolved_columns[key] = column
+    return column
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, key, value):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
+
+    def _set(self, **values):
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+
+class ColumnPlan(_Frozen):
+    __slots__ = ("name", "source", "order", "type_name", "type_properties", "type")
+
+    def __init__(self, name: str, source: Optional[str], order: int, type_name: str,
+                 type_properties: Mapping[str, Any], type_):
+        """
+        :param type_: converter of raw value (``DatabaseType``)
+        """
+        self._set(name=name, source=source, order=order, type_name=type_name,
+                  type_properties=type_properties, type=type_)
+
+    def __repr__(self):
+        return "ColumnPlan({!r}, {!r})".format(self.name, self.type_name)
+
+
+class TargetPlan(_Frozen):
+    """One of several tables filled from the same source: subset of columns and optional row filter.
+
+    Raw rows are routed before conversion: value of filter column is converted first,
+    other columns of the table are converted only for matching rows (fields of other tables aren't converted).
+    """
+    __slots__ = ("table", "columns", "converters", "filter_column", "filter", "filter_type")
+
+    def __init__(self, table: str, columns: Tuple[str, ...], converters: Tuple[Callable[[Any], Any], ...] = (),
+                 filter_column: Optional[str] = None, filter_: Optional[Callable[[Any], bool]] = None,
+                 filter_type: Optional[Callable[[Any], Any]] = None):
+        """
+        :param converters: column types (``DatabaseType``) of ``columns``
+        :param filter_: predicate of converted value of ``filter_column``
+        :param filter_type: converter of raw value of ``filter_column`` (None if predicate checks raw value)
+        """
+        self._set(table=table, columns=columns, converters=converters, filter_column=filter_column,
+                  filter=filter_, filter_type=filter_type)
+
+    def _matches(self, batch: List[dict], convert: bool) -> List[dict]:
+        name, predicate = self.filter_column, self.filter
+        filter_type = self.filter_type if convert else None
+        if filter_type is None:
+            return [row for row in batch if predicate(row.get(name))]
+        return [row for row in batch
+                if name in row and predicate(None if row[name] is None else filter_type(row[name]))]
+
+    def select(self, batch: List[dict], convert: bool = False) -> List[dict]:
+        """Rows of batch matching filter, projected to columns of the table
+
+        :param convert: rows are raw, matching rows are converted by column types
+        """
+        if self.filter is not None:
+            batch = self._matches(batch, convert)
+        if convert:
+            converters = tuple(zip(self.columns, self.converters))
+            return [{name: None if row[name] is None else type_(row[name]) for name, type_ in converters if name in row}
+                    for row in batch]
+        columns = self.columns
+        return [{name: row.get(name) for name in columns} for row in batch]
+
+    def __repr__(self):
+        return "TargetPlan({!r}, {!r})".format(self.table, self.columns)
+
+
+def _filter_value(column: Optional[ColumnPlan], value):
+    # Strings are written as in file, so they are converted by column type like values of file
+    if column is not None and isinstance(value, str):
+        return column.type(value)
+    return value
+
+
+def compile_filter(filter_description: Mapping[str, Any], column: Optional[ColumnPlan]) -> Callable[[Any], bool]:
+    if "equals" in filter_description:
+        expected = _filter_value(column, filter_description["equals"])
+        return lambda value: value == expected
+    if "not_equals" in filter_description:
+        expected = _filter_value(column, filter_description["not_equals"])
+        return lambda value: value != expected
+    if "in" in filter_description:
+        values = frozenset(_filter_value(column, value) for value in filter_description["in"])
+        return lambda value: value in values
+    if "not_in" in filter_description:
+        values = frozenset(_filter_value(column, value) for value in filter_description["not_in"])
+        return lambda value: value not in values
+    if filter_description.get("not_null", True):
+        return lambda value: value is not None and value != ""
+    return lambda value: value is None or value == ""
+
+
+class LoadPlan(_Frozen):
+    __slots__ = ("table", "format", "ordered", "parser_settings", "columns", "targets", "description")
+
+    def __init__(self, table: str, format_: str, ordered: bool, parser_settings: Mapping[str, Mapping[str, Any]],
+                 columns: Tuple[ColumnPlan, ...], description, targets: Tuple[TargetPlan, ...] = ()):
+        """
+        :param targets: tables filled from the source instead of ``table`` (empty for one table)
+        """
+        self._set(table=table, format=format_, ordered=ordered, parser_settings=parser_settings,
+                  columns=columns, targets=targets, description=description)
+
+    @property
+    def settings(self) -> Mapping[str, Any]:
+        """Parser settings of the format"""
+        return self.parser_settings.get(self.format, MappingProxyType({}))
+
+    def column_names(self) -> list:
+        return [column.name for column in self.columns]
+
+
+def compile_description(description, peeker) -> LoadPlan:
+    schema = description.scheme["properties"]
+    data = description.data
+    if data.get("format") not in schema["parser_settings"].get("properties", {}):
+        READERS.add_settings_schema(description.scheme, data.get("format"))  # Defaults of settings of the format
+    parser_settings = resolve_defaults(schema["parser_settings"], data.get("parser_settings"))
+    parser_settings = MappingProxyType({key: MappingProxyType(value) if isinstance(value, dict) else value
+                                        for key, value in parser_settings.items()})
+    column_schema = schema["columns"]["items"]
+    columns = []
+    for column_description in description["columns"]:
+        column = _resolve_column(column_schema, column_description.data)
+        type_properties = column["type_properties"]
+        columns.append(ColumnPlan(column["name"], column["source"], column["order"], column["type"],
+                                  type_properties, peeker.peek(column["type"], type_properties)))
+    ordered = data.get("ordered")
+    if ordered is None:
+        ordered = schema["ordered"].get("default", False)
+    targets = compile_targets(data.get("targets") or [], data.get("table"), columns)
+    return LoadPlan(data.get("table"), data.get("format"), ordered, parser_settings, tuple(columns), description,
+                    targets)
+
+
+def compile_targets(targets: List[dict], table: str, columns: List[ColumnPlan]) -> Tuple[TargetPlan, ...]:
+    by_name = {column.name: column for column in columns}
+    result = []
+    for target in targets:
+        names = tuple(target.get("columns") or by_name.keys())
+        # Unknown columns are reported by check of description
+        converters = tuple(by_name[name].type if name in by_name else None for name in names)
+        filter_description = target.get("filter")
+        if filter_description is None:
+            result.append(TargetPlan(target.get("table") or table, names, converters))
+            continue
+        filter_column = filter_description["column"]
+        column = by_name.get(filter_column)
+        predicate = compile_filter(filter_description, column)
+        # Presence of value is checked in raw value, so empty value isn't converted
+        compares = any(key in filter_description for key in _VALUE_FILTERS)
+        filter_type = column.type if column is not None and compares else None
+        result.append(TargetPlan(target.get("table") or table, names, converters, filter_column, predicate,
+                                 filter_type))
+    return tuple(result)
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class TransactionMode(Enum):
+    FILE = "file"  # All-or-nothing: file is loaded in one transaction
+    CHUNK = "chunk"  # Every batch is committed separately
+
+
+class ConversionMode(Enum):
+    PYTHON = "python"  # Rows are converted by column types in loader
+    SERVER = "server"  # Raw strings are inserted to staging table and converted by database
+
+
+@dataclass
+class LoadSettings:
+    """Settings of data loading pipeline, see section "load" of configuration file"""
+    batch_size: int = 1000  # Number of rows in one insert statement (initial size for adaptive batches)
+    adaptive_batch: bool = False  # Tune batch size by measured insert latency
+    max_batch_size: int = 100000  # Upper limit of adaptive batch size
+    batch_bytes: int = 16 * 2 ** 20  # Memory ceiling of one adaptive batch
+    queue_rows: int = 10000  # Maximum number of rows buffered between pipeline stages
+    queue_bytes: int = 64 * 2 ** 20  # Hard cap of memory used by buffered rows
+    threaded: bool = True  # Run reading and type conversion in separate threads
+    writers: int = 1  # Number of connections inserting batches of one file in parallel
+    parse_workers: int = 1  # Number of processes parsing one file (for readers supporting parallel parsing)
+    transaction: TransactionMode = TransactionMode.FILE
+    reflection_cache: Optional[str] = None  # File caching reflected tables between runs
+    conversion: ConversionMode = ConversionMode.PYTHON
+    retry_attempts: int = 3  # Retries of chunk failed by transient error (only in "chunk" transaction mode)
+    retry_delay: float = 0.5  # Base delay of exponential backoff, seconds
+    retry_max_delay: float = 30.0
+    throttle_rows: Optional[float] = None  # Limit of inserted rows per second for all writers of process
+    throttle_bytes: Optional[float] = None  # Limit of inserted bytes per second for all writers of process
+    throttle_probe: Optional[str] = None  # "replication_lag", "latency" or SQL query returning number
+    throttle_threshold: float = 1.0  # Rates are decreased while value of probe exceeds threshold
+    throttle_interval: float = 5.0  # Seconds between probes
+    checksum: bool = False  # Compute checksum of converted rows for verification of loaded data
+    batch_id_column: Optional[str] = None  # Column of target table filled by id of load batch
+    checksum_table: Optional[str] = "sdp_load_checksums"  # Table storing checksum of every load batch
+    column_statistics: bool = False  # Collect min/max, nulls, mean/variance and distinct estimate of columns
+    statistics_table: Optional[str] = None  # Table of target database storing column statistics of every load
+
+    def __post_init__(self):
+        self.transaction = TransactionMode(self.transaction)
+        self.conversion = ConversionMode(self.conversion)
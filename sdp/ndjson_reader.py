@@ -0,0 +1,137 @@
+"""Reader for JSON Lines (NDJSON) files: one JSON object per line.
+
+Lines are decoded by orjson if it is installed, otherwise by module json.
+"""
+import io
+import json
+import mmap
+import os
+from typing import Any, Iterable, Iterator, Optional
+
+from sdp.parallel import map_tasks, worker_reader
+from sdp.parallel_csv import is_mappable, record_ranges
+from sdp.reader_registry import Capability
+from sdp.source_readers import SourceReader
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(value: Any) -> str:
+        return orjson.dumps(value).decode("utf-8")
+else:
+    loads = json.loads
+    dumps = json.dumps
+
+_MISSING = object()
+
+
+def compile_path(source: str) -> tuple:
+    """Split dotted path to keys, numeric keys are used as list indexes too"""
+    return tuple(source.split("."))
+
+
+def extract(record: Any, key: str, path: tuple) -> Any:
+    """Return value of record by key or dotted path, ``_MISSING`` if there is no such value"""
+    if isinstance(record, dict) and key in record:
+        return record[key]
+    for item in path:
+        if isinstance(record, dict):
+            record = record.get(item, _MISSING)
+        elif isinstance(record, list):
+            try:
+                record = record[int(item)]
+            except (ValueError, IndexError):
+                return _MISSING
+        else:
+            return _MISSING
+        if record is _MISSING:
+            return _MISSING
+    return record
+
+
+class NDJSONReader(SourceReader):
+    """Reader for JSON Lines files.
+
+    Columns are taken from objects by name (or ``source`` property of column), which can be dotted path
+    to nested value, e.g. ``"detector.channels.0"``. Missing values aren't included into row.
+    With several workers regular files are memory-mapped and parsed by blocks of lines in worker processes.
+    """
+    capabilities = Capability.STREAMING | Capability.SPLITTABLE | Capability.APPENDABLE
+    chunk_bytes = 16 * 2 ** 20  # Size of block of lines parsed by one worker task
+
+    def __init__(self, description, workers: int = 1):
+        super(NDJSONReader, self).__init__(description, workers)
+        self.fields = []
+        for column in self.columns:
+            source = column.source or column.name
+            self.fields.append((column.name, source, compile_path(source)))
+
+    def read_lines(self, lines: Iterable[str]) -> Iterable[dict]:
+        fields = self.fields
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            record = loads(line)
+            row = {}
+            for name, source, path in fields:
+                value = extract(record, source, path)
+                if value is not _MISSING:
+                    row[name] = value
+            yield row
+
+    def read_source(self, source: Iterable[str]) -> Iterable[dict]:
+        return self.read_lines(source)
+
+    def numbered_rows(self, source: Iterable[str]) -> Iterable[tuple]:
+        for number, line in enumerate(source, 1):
+            for row in self.read_lines((line,)):
+                yield number, row
+
+    def convert(self, row: dict) -> dict:
+        """Convert JSON values using column types, null is kept as None and nested values as JSON string"""
+        result = {}
+        for column in self.columns:
+            value = row.get(column.name, _MISSING)
+            if value is _MISSING:
+                continue
+            if value is not None:
+                if isinstance(value, (dict, list)):
+                    value = dumps(value)
+                value = column.type(value)
+            result[column.name] = value
+        return result
+
+    def parse_batches(self, source: Any, batch_size: int) -> Optional[Iterator[list]]:
+        if self.workers > 1 and is_mappable(source):
+            return parse_parallel(self, source, self.workers, self.chunk_bytes, batch_size,
+                                  ordered=self.plan.ordered)
+        return None
+
+
+def _parse_range(path: str, encoding: str, start: int, end: int) -> list:
+    reader = worker_reader()
+    with open(path, "rb") as fin:
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode(encoding)
+    convert = reader.convert
+    return [convert(row) for row in reader.read_lines(io.StringIO(text))]
+
+
+def parse_parallel(reader: NDJSONReader, source, workers: int, chunk_bytes: int, batch_size: int,
+                   ordered: bool = True) -> Iterator[list]:
+    """Parse NDJSON file in worker processes by blocks of lines and iterate over batches of converted rows"""
+    path = source.name
+    encoding = source.encoding
+    with open(path, "rb") as fin:
+        if os.fstat(fin.fileno()).st_size == 0:
+            return
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # JSON strings can't contain raw line breaks, so every line break is record boundary
+            tasks = ((path, encoding, start, end) for start, end in record_ranges(mm, 0, chunk_bytes, None))
+            yield from map_tasks(reader, workers, _parse_range, tasks, batch_size, ordered)
@@ -0,0 +1,59 @@
+"""Process pool for parallel parsing: every worker process holds own copy of the reader."""
+import concurrent.futures
+import json
+from typing import Callable, Iterable, Iterator
+
+from sdp.description import Description, DescriptionEncoder
+
+_worker_reader = None
+
+
+def _init_worker(reader_class, description_data: str):
+    global _worker_reader
+    description = Description(json.loads(description_data), Description.load_scheme())
+    _worker_reader = reader_class(description)
+
+
+def worker_reader():
+    """Reader of current worker process"""
+    return _worker_reader
+
+
+def _complete(pending: list, ordered: bool, batch_size: int) -> Iterator[list]:
+    if ordered:
+        future = pending.pop(0)
+    else:
+        done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        future = done.pop()
+        pending.remove(future)
+    rows = future.result()
+    for i in range(0, len(rows), batch_size):
+        yield rows[i: i + batch_size]
+
+
+def worker_pool(reader, workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """Process pool, every worker process holds copy of the reader (``worker_reader()``)"""
+    description_data = json.dumps(reader.description, cls=DescriptionEncoder)
+    return concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                  initargs=(type(reader), description_data))
+
+
+def map_tasks(reader, workers: int, function: Callable[..., list], tasks: Iterable[tuple],
+              batch_size: int, ordered: bool = True) -> Iterator[list]:
+    """Run ``function(*task)`` in worker processes and iterate over batches of returned rows.
+
+    :param reader: reader copied to worker processes, use ``worker_reader()`` in ``function``
+    :param ordered: keep order of tasks, otherwise results are returned in order of completion
+    """
+    with worker_pool(reader, workers) as executor:
+        pending = []
+        try:
+            for task in tasks:
+                pending.append(executor.submit(function, *task))
+                if len(pending) >= 2 * workers:  # Limit number of results in memory
+                    yield from _complete(pending, ordered, batch_size)
+            while pending:
+                yield from _complete(pending, ordered, batch_size)
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,140 @@
+"""Parallel parsing of large CSV files.
+
+File is memory-mapped and split to byte ranges aligned to record boundaries.
+Every range is parsed and converted in worker process, which maps the file itself,
+so neither main process nor workers copy the whole file.
+"""
+import codecs
+import io
+import mmap
+import os
+from typing import Iterator, Optional
+
+from sdp.compression import detect_compression
+from sdp.parallel import map_tasks, worker_reader
+
+COUNT_WINDOW = 2 ** 20  # Bytes of mapped file copied at once for counting quotes
+
+
+def is_mappable(source) -> bool:
+    """Check that text stream is uncompressed regular file opened from disk at the beginning
+    with ASCII-compatible encoding
+    """
+    if not isinstance(source, io.TextIOWrapper) or not isinstance(getattr(source.buffer, "raw", None), io.FileIO):
+        return False  # Streams wrapping other streams (e.g. decompression) have name of underlying file
+    try:
+        name = source.name
+        encoding = codecs.lookup(source.encoding).name
+        # Name of decompressing stream is path of compressed file, mapped bytes would be compressed data
+        return isinstance(name, str) and os.path.isfile(name) and source.tell() == 0 \
+            and "utf-16" not in encoding and "utf-32" not in encoding and detect_compression(name) is None
+    except (AttributeError, OSError, LookupError, ValueError, io.UnsupportedOperation):
+        return False
+
+
+def _count(mm: mmap.mmap, char: Optional[bytes], start: int, end: int) -> int:
+    """Count character in range of mapped file by windows, slicing the whole range would copy it to memory"""
+    if not char:
+        return 0
+    count = 0
+    for position in range(start, end, COUNT_WINDOW):
+        count += mm[position:min(position + COUNT_WINDOW, end)].count(char)
+    return count
+
+
+def next_record_end(mm: mmap.mmap, position: int, quotechar: Optional[bytes], inside_quotes: bool = False) -> int:
+    """Return position after first line break at or after ``position`` which is outside of quoted field"""
+    size = len(mm)
+    while True:
+        newline = mm.find(b"\n", position)
+        if newline == -1:
+            return size
+        if _count(mm, quotechar, position, newline) % 2 == 1:
+            inside_quotes = not inside_quotes
+        if not inside_quotes:
+            return newline + 1
+        position = newline + 1
+
+
+def skip_records(mm: mmap.mmap, number: int, quotechar: Optional[bytes], comment: Optional[bytes] = None) -> int:
+    """Return position after ``number`` records, comment lines aren't counted like in serial reader"""
+    position = 0
+    size = len(mm)
+    while number > 0 and position < size:
+        if comment and mm[position:position + len(comment)] == comment:
+            newline = mm.find(b"\n", position)
+            position = size if newline == -1 else newline + 1
+            continue
+        position = next_record_end(mm, position, quotechar)
+        number -= 1
+    return position
+
+
+def last_record_end(mm: mmap.mmap, start: int, quotechar: Optional[bytes]) -> int:
+    """Return position after last complete record at or after ``start`` (``start`` if there is no such record).
+
+    Last line break outside of quoted fields is found from the end, quote parity is counted from ``start``.
+    """
+    end = len(mm)
+    quotes = _count(mm, quotechar, start, end)
+    while True:
+        newline = mm.rfind(b"\n", start, end)
+        if newline == -1:
+            return start
+        quotes -= _count(mm, quotechar, newline, end)
+        if quotes % 2 == 0:
+            return newline + 1
+        end = newline
+
+
+def record_ranges(mm: mmap.mmap, start: int, chunk_bytes: int, quotechar: Optional[bytes]) -> Iterator[tuple]:
+    """Split file to byte ranges of approximately ``chunk_bytes`` size which start and end on record boundaries.
+
+    Quote parity is counted from the range start (which is record boundary),
+    so line breaks inside quoted fields aren't used as boundaries.
+    """
+    size = len(mm)
+    while start < size:
+        target = start + chunk_bytes
+        if target >= size:
+            yield start, size
+            return
+        inside_quotes = _count(mm, quotechar, start, target) % 2 == 1
+        end = next_record_end(mm, target, quotechar, inside_quotes)
+        yield start, end
+        start = end
+
+
+def _parse_range(path: str, encoding: str, start: int, end: int) -> list:
+    reader = worker_reader()
+    with open(path, "rb") as fin:
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode(encoding)
+    rows = reader.read_lines(io.StringIO(text, newline=""), skip=0)
+    convert = reader.convert
+    return [convert(row) for row in rows]
+
+
+def parse_parallel(reader, source, workers: int, chunk_bytes: int, batch_size: int,
+                   ordered: bool = True) -> Iterator[list]:
+    """Parse CSV file in worker processes and iterate over batches of converted rows.
+
+    :param reader: CSVReader, used for settings and in worker processes
+    :param source: text stream opened from regular file
+    :param ordered: keep order of rows from file, otherwise batches are returned in order of completion
+    """
+    path = source.name
+    encoding = source.encoding
+    settings = reader.parser_settings["CSV"]
+    quotechar = settings["quotechar"]
+    quotechar = quotechar.encode(encoding) if quotechar else None
+    comment = settings["comment"]
+    comment = comment.encode(encoding) if comment else None
+
+    with open(path, "rb") as fin:
+        if os.fstat(fin.fileno()).st_size == 0:
+            return
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = skip_records(mm, reader.skip_rows(), quotechar, comment)
+            tasks = ((path, encoding, start, end) for start, end in record_ranges(mm, start, chunk_bytes, quotechar))
+            yield from map_tasks(reader, workers, _parse_range, tasks, batch_size, ordered)
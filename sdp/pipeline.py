@@ -0,0 +1,226 @@
+import logging
+import threading
+from collections import deque
+from typing import Iterable, Any, Optional, Iterator
+
+from sdp.load_settings import LoadSettings
+from sdp.reader_registry import Capability
+from sdp.source_readers import SourceReader
+
+ROW_OVERHEAD = 64  # Approximate size of dictionary for one row, bytes
+
+
+def estimate_size(batch: list) -> int:
+    """Approximate size of batch of rows in bytes, estimated by first row"""
+    if len(batch) == 0:
+        return 0
+    row_size = ROW_OVERHEAD
+    for value in batch[0].values():
+        if isinstance(value, (str, bytes)):
+            row_size += len(value) + 48
+        else:
+            row_size += 32
+    return row_size * len(batch)
+
+
+def batches(rows: Iterable[dict], batch_size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+
+class PipelineAborted(Exception):
+    pass
+
+
+class BoundedQueue:
+    """Queue of row batches limited by number of rows and approximate size in bytes.
+
+    ``put`` blocks while limits are exceeded, so slow consumer applies back-pressure to producer.
+    Single batch is accepted by empty queue even if it exceeds limits, otherwise pipeline would be stuck.
+    """
+    _END = object()
+
+    def __init__(self, max_rows: int, max_bytes: int):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows = 0
+        self.bytes = 0
+        self._items = deque()
+        self._error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._error
+
+    def _is_full(self, rows, size):
+        if len(self._items) == 0:
+            return False
+        return self.rows + rows > self.max_rows or self.bytes + size > self.max_bytes
+
+    def put(self, batch: list, size: Optional[int] = None):
+        if size is None:
+            size = estimate_size(batch)
+        with self._condition:
+            while self._error is None and self._is_full(len(batch), size):
+                self._condition.wait()
+            if self._error is not None:
+                raise PipelineAborted() from self._error
+            self._items.append((batch, size))
+            self.rows += len(batch)
+            self.bytes += size
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._items.append((BoundedQueue._END, 0))
+            self._condition.notify_all()
+
+    def abort(self, error: BaseException):
+        with self._condition:
+            if self._error is None:  # Keep original cause of failure
+                self._error = error
+            self._condition.notify_all()
+
+    def get(self) -> Optional[tuple]:
+        """Return (batch, size) or None at the end of stream"""
+        with self._condition:
+            while self._error is None and len(self._items) == 0:
+                self._condition.wait()
+            if self._error is not None:
+                raise PipelineAborted() from self._error
+            if self._items[0][0] is BoundedQueue._END:
+                return None  # End marker stay in queue for other consumers
+            batch, size = self._items.popleft()
+            self.rows -= len(batch)
+            self.bytes -= size
+            self._condition.notify_all()
+            return batch, size
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
+
+
+def stage_thread(target, queues: list, *args) -> threading.Thread:
+    """Create thread for pipeline stage, exception in stage aborts all queues of pipeline"""
+    def run():
+        try:
+            target(*args)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            logging.debug("Pipeline stage {} failed: {}".format(target.__name__, e))
+            for queue in queues:
+                queue.abort(e)
+    return threading.Thread(target=run, name="sdp-pipeline{}".format(target.__name__), daemon=True)
+
+
+class Pipeline:
+    """Staged loading pipeline: reader -> converter -> writer.
+
+    Reading and type conversion run in separate threads and connected with the writer
+    by bounded queues, so parsing overlaps with database commits and memory usage is limited
+    by ``LoadSettings.queue_rows`` and ``LoadSettings.queue_bytes``.
+    Writer is consumer of ``batches`` iterator and runs in caller thread (owner of database connection).
+    """
+
+    def __init__(self, reader: SourceReader, settings: Optional[LoadSettings] = None, convert: bool = True):
+        """
+        :param convert: convert rows by column types, otherwise batches of raw rows are produced
+        """
+        self.reader = reader
+        self.settings = settings if settings is not None else LoadSettings()
+        self.convert = convert
+        self.rows = 0
+        self.strategy = None
+
+    def _read(self, source: Any, output: BoundedQueue):
+        for batch in batches(self.reader.read_source(source), self.settings.batch_size):
+            output.put(batch)
+        output.close()
+
+    @staticmethod
+    def _forward(batches_: Iterator[list], output: BoundedQueue):
+        try:
+            for batch in batches_:
+                output.put(batch)
+            output.close()
+        finally:
+            batches_.close()
+
+    def _convert(self, input_: BoundedQueue, output: BoundedQueue):
+        convert = self.reader.convert
+        for batch, size in input_:
+            output.put([convert(row) for row in batch], size)
+        output.close()
+
+    def _serial_batches(self, source: Any, native: Optional[Iterator[list]]) -> Iterator[list]:
+        if native is None:
+            rows = self.reader.parse_source(source) if self.convert else self.reader.read_source(source)
+            native = batches(rows, self.settings.batch_size)
+        for batch in native:
+            self.rows += len(batch)
+            yield batch
+
+    def _choose_strategy(self, native: Optional[Iterator[list]]) -> str:
+        if not self.convert:
+            return "raw"
+        capabilities = self.reader.capabilities
+        if native is not None:
+            if Capability.COLUMNAR in capabilities:
+                return "columnar"
+            return "parallel"
+        if self.settings.threaded:
+            return "threaded"
+        return "serial"
+
+    def batches(self, source: Any) -> Iterator[list]:
+        """Iterate over batches of converted rows"""
+        native = self.reader.parse_batches(source, self.settings.batch_size) if self.convert else None
+        self.strategy = self._choose_strategy(native)
+        logging.debug("Loading strategy: {}".format(self.strategy))
+        if not self.settings.threaded:
+            yield from self._serial_batches(source, native)
+            return
+
+        max_rows = max(self.settings.queue_rows // 2, 1)
+        max_bytes = max(self.settings.queue_bytes // 2, 1)
+        converted = BoundedQueue(max_rows, max_bytes)
+        if native is not None:
+            # Reader converts rows itself, conversion stage isn't needed
+            queues = [converted]
+            threads = [stage_thread(self._forward, queues, native, converted)]
+        elif not self.convert:
+            queues = [converted]
+            threads = [stage_thread(self._read, queues, source, converted)]
+        else:
+            raw = BoundedQueue(max_rows, max_bytes)
+            queues = [raw, converted]
+            threads = [
+                stage_thread(self._read, queues, source, raw),
+                stage_thread(self._convert, queues, raw, converted),
+            ]
+        for thread in threads:
+            thread.start()
+        try:
+            for batch, size in converted:
+                self.rows += len(batch)
+                yield batch
+        except PipelineAborted as e:
+            raise e.__cause__
+        finally:
+            # Stop producers when consumer failed or stopped iteration
+            for queue in queues:
+                queue.abort(PipelineAborted("Pipeline is closed"))
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,205 @@
+import contextlib
+import cProfile
+import hashlib
+import os
+import pathlib
+import pstats
+import sys
+import threading
+import tracemalloc
+from typing import Optional
+
+# Allocation sites are attributed to lines of modules of this package (readers, pipeline, writers and etc.)
+TRACED_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _function_name(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ",")
+    return "{} ({}:{})".format(name, os.path.basename(filename), line).replace(";", ",")
+
+
+def write_collapsed_stacks(stats: pstats.Stats, path: pathlib.Path, max_depth: int = 64):
+    """Write profile in collapsed stack format (input for flamegraph.pl, speedscope and etc.)
+
+    cProfile don't save full stacks, so time of callee is distributed between stacks
+    proportionally to the cumulative time of caller-callee edges.
+    """
+    callees = {}
+    roots = []
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge
+
+    lines = {}
+
+    def walk(func, stack, scale):
+        cc, nc, tt, ct, callers = stats.stats[func]
+        stack = stack + (_function_name(func),)
+        weight = int(tt * scale * 1e6)
+        if weight > 0:
+            key = ";".join(stack)
+            lines[key] = lines.get(key, 0) + weight
+        if len(stack) >= max_depth:
+            return
+        for callee, edge in callees.get(func, {}).items():
+            callee_ct = stats.stats[callee][3]
+            if callee_ct <= 0 or _function_name(callee) in stack:
+                continue
+            callee_scale = scale * edge[3] / callee_ct
+            if callee_ct * callee_scale > 1e-6:
+                walk(callee, stack, callee_scale)
+
+    for root in roots:
+        walk(root, (), 1.0)
+
+    with open(path, "w") as fout:
+        for stack, weight in lines.items():
+            fout.write("{} {}\n".format(stack, weight))
+    return path
+
+
+def top_functions(stats: pstats.Stats, top: int = 10) -> list:
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    result = []
+    for func in stats.fcn_list[:top]:
+        cc, nc, tt, ct, callers = stats.stats[func]
+        result.append("{:.3f}s cumulative, {:.3f}s own, {} calls: {}".format(ct, tt, nc, _function_name(func)))
+    return result
+
+
+class _SnapshotSampler(threading.Thread):
+    """Periodically take tracemalloc snapshot and keep snapshot with maximum traced memory"""
+
+    def __init__(self, interval: float = 0.2):
+        super(_SnapshotSampler, self).__init__(daemon=True)
+        self.interval = interval
+        self.snapshot = None
+        self.snapshot_size = -1
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if current > self.snapshot_size:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+        return self.snapshot
+
+
+def allocation_sites(snapshot: tracemalloc.Snapshot, top: int = 10, package: str = TRACED_PACKAGE) -> list:
+    """Sum allocation size by the most recent frame located in modules of package directory"""
+    package = os.path.join(package, "")
+    sites = {}
+    for trace in snapshot.traces:
+        for frame in reversed(trace.traceback):
+            if frame.filename.startswith(package):
+                key = "{}:{}".format(os.path.relpath(frame.filename, package), frame.lineno)
+                size, count = sites.get(key, (0, 0))
+                sites[key] = (size + trace.size, count + 1)
+                break
+    sites = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)
+    return ["{:.1f} KiB in {} blocks: {}".format(size / 1024, count, key) for key, (size, count) in sites[:top]]
+
+
+class LoadProfiler:
+    """Profiling of data loading: cProfile statistics and memory tracing with tracemalloc.
+
+    Usage::
+
+        profiler = LoadProfiler(profile_dir="profiles", trace_memory=True)
+        with profiler.profile(path) as summary:
+            load_result = database.load_data(description, path)
+        load_result.statistics.update(summary)
+    """
+
+    def __init__(self, profile_dir: Optional[pathlib.Path] = None, trace_memory: bool = False,
+                 top: int = 10, nframe: int = 32):
+        self.profile_dir = pathlib.Path(profile_dir) if profile_dir is not None else None
+        self.trace_memory = trace_memory
+        self.top = top
+        self.nframe = nframe
+
+    @property
+    def enabled(self):
+        return self.profile_dir is not None or self.trace_memory
+
+    @contextlib.contextmanager
+    def profile(self, path: pathlib.Path):
+        summary = {}
+        if not self.enabled:
+            yield summary
+            return
+
+        path = pathlib.Path(path)
+        sampler = None
+        profiler = None
+        thread_profilers = []
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.nframe)
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            sampler = _SnapshotSampler()
+            sampler.start()
+        if self.profile_dir is not None:
+            profiler = cProfile.Profile()
+
+            def thread_bootstrap(frame, event, arg):
+                # Called in new thread (e.g. loading pipeline stage), replace self by thread own profiler
+                sys.setprofile(None)
+                thread_profiler = cProfile.Profile()
+                thread_profilers.append(thread_profiler)
+                thread_profiler.enable()
+
+            threading.setprofile(thread_bootstrap)
+            profiler.enable()
+        try:
+            yield summary
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                threading.setprofile(None)
+                stats = pstats.Stats(profiler)
+                for thread_profiler in thread_profilers:
+                    stats.add(thread_profiler)
+                summary.update(self._profile_summary(stats, path))
+            if sampler is not None:
+                snapshot = sampler.stop()
+                current, peak = tracemalloc.get_traced_memory()
+                summary["peak_memory"] = "{:.1f} MiB".format((peak - start_memory) / 2 ** 20)
+                summary["allocation_sites"] = allocation_sites(snapshot, self.top)
+
+    def output_name(self, path: pathlib.Path) -> str:
+        """Name of profile files: files with the same name from different directories don't overwrite profiles"""
+        digest = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:8]
+        return "{}-{}".format(path.name, digest)
+
+    def _profile_summary(self, stats: pstats.Stats, path: pathlib.Path) -> dict:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        name = self.output_name(path)
+        pstats_path = self.profile_dir / (name + ".pstats")
+        collapsed_path = self.profile_dir / (name + ".collapsed")
+        stats.dump_stats(pstats_path)
+        write_collapsed_stacks(stats, collapsed_path)
+        return {
+            "profile_time": "{:.3f}s".format(stats.total_tt),
+            "pstats": str(pstats_path),
+            "collapsed_stacks": str(collapsed_path),
+            "top_functions": top_functions(stats, self.top),
+        }
+
+    def stop(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
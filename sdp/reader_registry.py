@@ -0,0 +1,121 @@
+"""Registry of source readers.
+
+Readers are registered by format name as ``"module:Class"`` strings, third-party readers are
+discovered from entry points of group ``sdp.readers`` (entry point name is format name), e.g. in setup.py::
+
+    entry_points={"sdp.readers": ["MYFORMAT = my_package.readers:MyFormatReader"]}
+
+Reader class is imported only when it is used first time. Reader declares ``capabilities``, which are used by loader
+for choosing execution strategy. Settings of built-in formats are declared in ``resources/schema.json``,
+third-party reader declares ``parser_settings_schema`` (JSON schema of ``parser_settings[format]`` section),
+which is added to description schema when reader is imported (``Description.compile`` imports reader of its format),
+so loading schema doesn't import readers.
+"""
+import importlib
+import importlib.metadata
+import logging
+from enum import Flag
+from typing import Union, Optional
+
+
+ENTRY_POINT_GROUP = "sdp.readers"
+
+
+class Capability(Flag):
+    NONE = 0
+    STREAMING = 1  # Rows are read incrementally, whole file isn't loaded into memory
+    COLUMNAR = 2  # Reader produces converted batches by columns (``parse_batches``)
+    SPLITTABLE = 4  # File can be split to byte ranges by records and parsed in parallel
+    BINARY = 8  # Reader requires binary stream instead of text stream
+    APPENDABLE = 16  # File grows by appending records, reader can continue from record boundary (``record_end``)
+    RAW_TEXT = 32  # ``read_source`` produces raw strings, so conversion can be done by database
+
+
+class ReaderRegistry:
+
+    def __init__(self):
+        self._targets = {}
+        self._classes = {}
+        self._discovered = False
+
+    def register(self, name: str, target: Union[str, type]):
+        """Register reader class or ``"module:Class"`` string for lazy import"""
+        self._targets[name] = target
+        self._classes.pop(name, None)
+        from sdp.description import Description
+        if Description._root_schema is not None:
+            self._add_format(Description._root_schema, name)
+            if not isinstance(target, str):
+                self._merge_schema(Description._root_schema, name, target)
+
+    def _discover(self):
+        if self._discovered:
+            return
+        self._discovered = True
+        entry_points = importlib.metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            entry_points = entry_points.select(group=ENTRY_POINT_GROUP)
+        else:
+            entry_points = entry_points.get(ENTRY_POINT_GROUP, [])  # Python < 3.10
+        for entry_point in entry_points:
+            if entry_point.name not in self._targets:
+                self._targets[entry_point.name] = entry_point.value
+
+    def names(self) -> list:
+        self._discover()
+        return list(self._targets.keys())
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._classes
+
+    def get(self, name: str) -> Optional[type]:
+        """Return reader class for format, import it if necessary. Return None for unknown format"""
+        if name in self._classes:
+            return self._classes[name]
+        self._discover()
+        target = self._targets.get(name)
+        if target is None:
+            return None
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            logging.debug("Import reader {} for format {}".format(target, name))
+            target = getattr(importlib.import_module(module_name), class_name)
+        self._classes[name] = target
+        from sdp.description import Description
+        if Description._root_schema is not None:
+            self._merge_schema(Description._root_schema, name, target)
+        return target
+
+    def add_settings_schema(self, schema: dict, name: str):
+        """Import reader of format and add its parser settings to schema"""
+        reader_class = self.get(name)
+        if reader_class is not None:
+            self._merge_schema(schema, name, reader_class)
+
+    @staticmethod
+    def _add_format(schema: dict, name: str):
+        formats = schema["properties"]["format"]["enum"]
+        if name not in formats:
+            formats.append(name)
+
+    @staticmethod
+    def _merge_schema(schema: dict, name: str, reader_class: type):
+        settings_schema = getattr(reader_class, "parser_settings_schema", None)
+        if settings_schema is not None:
+            schema["properties"]["parser_settings"]["properties"].setdefault(name, settings_schema)
+
+    def update_schema(self, schema: dict):
+        """Add registered formats and parser settings of already loaded readers to description schema"""
+        for name in self.names():
+            self._add_format(schema, name)
+        for name, reader_class in self._classes.items():
+            self._merge_schema(schema, name, reader_class)
+        return schema
+
+
+READERS = ReaderRegistry()
+READERS.register("CSV", "sdp.source_readers:CSVReader")
+READERS.register("XML", "sdp.source_readers:XMLReader")
+READERS.register("PARQUET", "sdp.columnar_readers:ParquetReader")
+READERS.register("ARROW", "sdp.columnar_readers:ArrowReader")
+READERS.register("NDJSON", "sdp.ndjson_reader:NDJSONReader")
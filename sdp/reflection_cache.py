@@ -0,0 +1,194 @@
+"""Cache of reflected tables, stored on disk between runs.
+
+Entry is keyed by database URL (without password) and table name and stores columns and schema fingerprint of table.
+Column type is stored as name of SQLAlchemy type class with constructor arguments (length, precision, item type
+of arrays), only SQLAlchemy types are restored, so cache file can't execute code.
+Fingerprint is got by one cheap catalog query (``pg_class`` row and columns of table for PostgreSQL,
+table DDL for SQLite, column types for MySQL), full reflection is done only if fingerprint was changed
+or entry can't be restored. Dialects without fingerprint query are always reflected.
+"""
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import pathlib
+from typing import Any, Optional, Union
+
+from sqlalchemy import Column, MetaData, Table, text
+from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.types import TypeEngine
+
+FINGERPRINT_QUERIES = {
+    "postgresql": "SELECT c.oid::text || ':' || c.relfilenode::text || ':' || c.xmin::text || ':' || "
+                  "(SELECT string_agg(a.attnum::text || ',' || a.attname || ',' || a.atttypid::text || ',' || "
+                  "a.atttypmod::text || ',' || a.attnotnull::text || ',' || a.attisdropped::text, ';' "
+                  "ORDER BY a.attnum) FROM pg_attribute a WHERE a.attrelid = c.oid AND a.attnum > 0) "
+                  "FROM pg_class c WHERE c.oid = to_regclass(:name)",
+    "sqlite": "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name",
+    "mysql": "SELECT GROUP_CONCAT(COLUMN_NAME, ':', COLUMN_TYPE, ':', IS_NULLABLE ORDER BY ORDINAL_POSITION) "
+             "FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = :name",
+}
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def fingerprint(conn, name: str) -> Optional[str]:
+    """Return schema fingerprint of table or None if table doesn't exist or dialect isn't supported"""
+    dialect = conn.dialect.name
+    query = FINGERPRINT_QUERIES.get(dialect)
+    if query is None:
+        return None
+    if dialect == "postgresql":
+        name = conn.dialect.identifier_preparer.quote(name)
+    value = conn.execute(text(query), {"name": name}).scalar()
+    if value is None:
+        return None
+    return hashlib.sha1(str(value).encode("utf-8")).hexdigest()
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, TypeEngine):
+        return {"type": dump_type(value)}
+    if isinstance(value, type) and issubclass(value, TypeEngine):
+        return {"type": dump_type(value())}
+    if isinstance(value, (list, tuple)) and all(isinstance(item, _SCALARS) for item in value):
+        return list(value)
+    if isinstance(value, _SCALARS):
+        return value
+    raise ValueError("Argument {!r} can't be stored".format(value))
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return load_type(value["type"])
+    return value
+
+
+def dump_type(type_: TypeEngine) -> dict:
+    """Return class name and constructor arguments of SQLAlchemy type, raise ValueError if type can't be stored"""
+    cls = type(type_)
+    if not cls.__module__.startswith("sqlalchemy."):
+        raise ValueError("{} isn't SQLAlchemy type".format(cls.__name__))
+    args = {}
+    parameters = inspect.signature(cls.__init__).parameters if cls.__init__ is not object.__init__ else {}
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters.values()):
+        raise ValueError("Positional arguments of {} (e.g. values of enum) aren't stored".format(cls.__name__))
+    for name, parameter in parameters.items():
+        if name == "self" or parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        if not hasattr(type_, name):
+            continue
+        value = getattr(type_, name)
+        if parameter.default is not parameter.empty and isinstance(value, _SCALARS) and value == parameter.default:
+            continue
+        args[name] = _dump_value(value)
+    if any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters.values()):
+        # Keyword arguments of dialect types (e.g. charset and collation of MySQL strings) are kept as attributes
+        for name, value in vars(type_).items():
+            if value and not name.startswith("_") and name not in args and isinstance(value, _SCALARS):
+                args[name] = value
+    result = {"class": "{}:{}".format(cls.__module__, cls.__qualname__), "args": args}
+    if repr(load_type(result)) != repr(type_):
+        raise ValueError("{!r} isn't restored from its arguments".format(type_))
+    return result
+
+
+def load_type(data: dict) -> TypeEngine:
+    """Create SQLAlchemy type from class name and arguments, other classes are refused"""
+    module_name, _, class_name = data["class"].partition(":")
+    if not module_name.startswith("sqlalchemy."):
+        raise ValueError("{} isn't SQLAlchemy type".format(data["class"]))
+    cls = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(cls, type) and issubclass(cls, TypeEngine)):
+        raise ValueError("{} isn't SQLAlchemy type".format(data["class"]))
+    return cls(**{name: _load_value(value) for name, value in data["args"].items()})
+
+
+def dump_table(table: Table) -> Optional[list]:
+    """Return columns of table with types as class names and arguments, None if some type can't be stored"""
+    columns = []
+    for column in table.columns:
+        try:
+            type_ = dump_type(column.type)
+        except Exception as e:
+            logging.debug("Type of column {} isn't cached: {}".format(column.name, e))
+            return None
+        columns.append({
+            "name": column.name,
+            "type": type_,
+            "nullable": column.nullable,
+            "primary_key": column.primary_key,
+        })
+    return columns
+
+
+def load_table(name: str, columns: list) -> Optional[Table]:
+    """Restore table from cached columns, None if entry is outdated or types can't be restored"""
+    table_columns = []
+    for column in columns:
+        try:
+            type_ = load_type(column["type"])
+        except Exception as e:
+            logging.debug("Cached type of column {} isn't restored: {}".format(column.get("name"), e))
+            return None
+        table_columns.append(Column(column["name"], type_, nullable=column["nullable"],
+                                    primary_key=column["primary_key"]))
+    return Table(name, MetaData(), *table_columns)
+
+
+def reflect_table(conn, name: str) -> Optional[Table]:
+    metadata = MetaData()
+    try:
+        return Table(name, metadata, autoload_with=conn)
+    except NoSuchTableError:
+        return None
+
+
+class ReflectionCache:
+
+    def __init__(self, path: Optional[Union[str, pathlib.Path]] = None):
+        self.path = pathlib.Path(path).expanduser() if path is not None else None
+        self.entries = {}
+        self._tables = {}  # Tables restored in this process
+        if self.path is not None and self.path.exists():
+            try:
+                with open(self.path) as fin:
+                    self.entries = json.load(fin)
+            except (OSError, ValueError) as e:
+                logging.warning("Reflection cache {} isn't readable: {}".format(self.path, e))
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(self.path.name + ".tmp")
+        with open(temp, "w") as fout:
+            json.dump(self.entries, fout, indent=2)
+        os.replace(temp, self.path)
+
+    def table(self, conn, url: str, name: str) -> Optional[Table]:
+        """Return table from cache if its fingerprint wasn't changed, otherwise reflect table and update cache"""
+        key = "{}|{}".format(url, name)
+        current = fingerprint(conn, name)
+        if current is not None:
+            cached = self._tables.get(key)
+            if cached is not None and cached[0] == current:
+                return cached[1]
+            entry = self.entries.get(key)
+            if entry is not None and entry["fingerprint"] == current:
+                table = load_table(name, entry["columns"])
+                if table is not None:
+                    logging.debug("Table {} is restored from reflection cache".format(name))
+                    self._tables[key] = (current, table)
+                    return table
+
+        table = reflect_table(conn, name)
+        if table is None or current is None:
+            return table
+        columns = dump_table(table)
+        if columns is not None:
+            self._tables[key] = (current, table)
+            self.entries[key] = {"fingerprint": current, "columns": columns}
+            self.save()
+        return table
@@ -0,0 +1,100 @@
+"""Classification of database errors and retry policy for transient failures."""
+import random
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy.exc import DBAPIError
+
+# SQLSTATE classes and codes of transient PostgreSQL errors
+POSTGRES_TRANSIENT_CLASSES = ("08",)  # Connection exception
+POSTGRES_TRANSIENT_CODES = (
+    "40001",  # serialization_failure
+    "40P01",  # deadlock_detected
+    "53300",  # too_many_connections
+    "55P03",  # lock_not_available
+    "57P01",  # admin_shutdown
+    "57P02",  # crash_shutdown
+    "57P03",  # cannot_connect_now
+)
+MYSQL_TRANSIENT_CODES = (
+    1040,  # Too many connections
+    1205,  # Lock wait timeout exceeded
+    1213,  # Deadlock found
+    2003,  # Can't connect to server
+    2006,  # Server has gone away
+    2013,  # Lost connection during query
+)
+MSSQL_TRANSIENT_CODES = (
+    -2,  # Timeout expired
+    233,  # Connection was closed by server
+    1205,  # Deadlock victim
+    10053,  # Connection aborted
+    10054,  # Connection reset by peer
+    40197,  # Azure: service error processing request
+    40501,  # Azure: service is busy
+    40613,  # Azure: database is not currently available
+    49918,  # Azure: not enough resources to process request
+    49919,  # Azure: too many create or update operations
+    49920,  # Azure: too many operations in progress
+)
+MSSQL_TRANSIENT_SQLSTATES = (
+    "40001",  # Serialization failure (deadlock)
+    "HYT00",  # Timeout expired
+    "HYT01",  # Connection timeout expired
+)
+MSSQL_TRANSIENT_CLASSES = ("08",)  # Connection exception
+# pyodbc puts the native error number in parentheses before the name of the ODBC function
+_ODBC_NATIVE_ERROR = re.compile(r"\((-?\d+)\) \(SQL\w+\)")
+SQLITE_TRANSIENT_MESSAGES = ("database is locked", "database table is locked")
+
+
+def _sqlstate(orig: BaseException) -> Optional[str]:
+    return getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+
+
+def _mssql_error(orig: BaseException) -> Tuple[Optional[int], Optional[str]]:
+    """Native error number and SQLSTATE of pymssql (number, message) or pyodbc (sqlstate, message) error"""
+    args = getattr(orig, "args", ())
+    if len(args) > 0 and isinstance(args[0], int):
+        return args[0], None
+    if len(args) > 1 and isinstance(args[0], str) and isinstance(args[1], str):
+        match = _ODBC_NATIVE_ERROR.search(args[1])
+        return (int(match.group(1)) if match else None), args[0]
+    return None, None
+
+
+def is_transient(error: DBAPIError, dialect: str) -> bool:
+    """Return True if operation failed by error can succeed when repeated (e.g. lost connection, deadlock)"""
+    if error.connection_invalidated:
+        return True
+    orig = error.orig
+    if dialect == "postgresql":
+        code = _sqlstate(orig)
+        if code is not None:
+            return code in POSTGRES_TRANSIENT_CODES or code[:2] in POSTGRES_TRANSIENT_CLASSES
+    elif dialect == "mysql":
+        args = getattr(orig, "args", ())
+        return len(args) > 0 and args[0] in MYSQL_TRANSIENT_CODES
+    elif dialect == "mssql":
+        number, state = _mssql_error(orig)
+        if number in MSSQL_TRANSIENT_CODES:
+            return True
+        return state is not None and (state in MSSQL_TRANSIENT_SQLSTATES or state[:2] in MSSQL_TRANSIENT_CLASSES)
+    elif dialect == "sqlite":
+        return any(message in str(orig) for message in SQLITE_TRANSIENT_MESSAGES)
+    return False
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: delay of attempt is uniformly random in [0, base * 2 ** attempt]"""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def should_retry(self, error: BaseException, dialect: str, attempt: int) -> bool:
+        return attempt < self.attempts and isinstance(error, DBAPIError) and is_transient(error, dialect)
@@ -1,14 +1,23 @@
 import argparse
+import json
 import logging
 import pathlib
 import sys
+import time
 
 import jsonschema
 
+from sdp.check import DEFAULT_MAX_ERRORS, check_files, throughput
 from sdp.database import Database
+from sdp.compression import COMPRESSIONS
 from sdp.description import Description
+from sdp.infer import SAMPLE_LINES, infer_description
 from sdp.utils import open_help_html
+from sdp.dump import dump_table
+from sdp.verify import verify_load
 from sdp.dev_utils import generate_descriptions, generate_fake_data
+from sdp.profiling import LoadProfiler
+from sdp.tail import TailStore, DEFAULT_STATE_FILE
 from sdp.ui.app import DatabaseApp
 
 FORMAT = "%(levelname)s: %(message)s"
@@ -44,9 +53,75 @@ def create_parser():
                              help="Configuration file with database settings")
     parser_load.add_argument("-s", "--schema", action="store", required=True,
                              metavar="JSON_SCHEMA", help="JSON schema of input data")
+    parser_load.add_argument("--profile", nargs="?", const=".", default=None, metavar="OUTPUT_DIR",
+                             help="Run loading under cProfile, write pstats and collapsed stacks (for flamegraph) "
+                                  "of every file to OUTPUT_DIR (current directory by default)")
+    parser_load.add_argument("--trace-memory", action="store_true",
+                             help="Trace memory allocations with tracemalloc, "
+                                  "report peak memory and top allocation sites for every file")
+    parser_load.add_argument("--incremental", nargs="?", const=DEFAULT_STATE_FILE, default=None,
+                             metavar="STATE_FILE",
+                             help="Load only records appended since previous loading of the file, "
+                                  "offsets are stored in STATE_FILE ({} by default)".format(DEFAULT_STATE_FILE))
     parser_load.set_defaults(func = load_to_database)
 
 
+    parser_check = subparsers.add_parser("check", help="Parse and convert input data files without database, "
+                                                        "report conversion errors")
+    parser_check.add_argument("files", nargs="+", metavar="INPUT_DATA_FILE")
+    parser_check.add_argument("-s", "--schema", action="store", required=True,
+                              metavar="JSON_SCHEMA", help="JSON schema of input data")
+    parser_check.add_argument("-n", "--max-errors", type=int, default=DEFAULT_MAX_ERRORS, metavar="N",
+                              help="Number of reported conversion errors per file ({} by default)"
+                              .format(DEFAULT_MAX_ERRORS))
+    parser_check.add_argument("-j", "--workers", type=int, default=None, metavar="N",
+                              help="Number of worker processes (number of CPUs by default)")
+    parser_check.set_defaults(func=check)
+
+    parser_infer = subparsers.add_parser("infer", help="Infer JSON schema of input data from sample of CSV file")
+    parser_infer.add_argument("file", metavar="INPUT_DATA_FILE")
+    parser_infer.add_argument("-t", "--table", action="store", default=None,
+                              help="Name of target table (name of file by default)")
+    parser_infer.add_argument("-o", "--output", action="store", default=None, metavar="JSON_SCHEMA",
+                              help="Write JSON schema to file instead of standard output")
+    parser_infer.add_argument("--sample", type=int, default=SAMPLE_LINES, metavar="N",
+                              help="Number of first lines and number of randomly sampled lines ({} by default)"
+                              .format(SAMPLE_LINES))
+    parser_infer.add_argument("--ddl", nargs="?", const="postgresql", default=None, metavar="DIALECT",
+                              help="Also generate CREATE TABLE statement in SQL dialect (postgresql by default), "
+                                   "it's written next to output file with .sql extension or to standard output")
+    parser_infer.set_defaults(func=infer)
+
+    parser_dump = subparsers.add_parser("dump", help="Export table of JSON schema to CSV file")
+    parser_dump.add_argument("-c", "--config", action="store", default="config.json",
+                             metavar="CONNECTION_CONFIG",
+                             help="Configuration file with database settings")
+    parser_dump.add_argument("-s", "--schema", action="store", required=True,
+                             metavar="JSON_SCHEMA", help="JSON schema of output data (table, columns and CSV settings)")
+    parser_dump.add_argument("-o", "--out", action="store", required=True, metavar="OUTPUT_FILE",
+                             help="Output CSV file, compressed if extension is .gz, .bz2, .xz or .zst")
+    parser_dump.add_argument("--compression", choices=COMPRESSIONS.keys(), default=None,
+                             help="Compression of output file (chosen by extension by default)")
+    parser_dump.add_argument("--no-copy", action="store_true",
+                             help="Don't use COPY TO STDOUT for PostgreSQL, format all values by JSON schema")
+    parser_dump.set_defaults(func=dump)
+
+    parser_verify = subparsers.add_parser("verify", help="Compare checksum stored by loading (or checksum of input "
+                                                          "data file) with checksum of loaded rows computed "
+                                                          "by database")
+    parser_verify.add_argument("file", nargs="?", default=None, metavar="INPUT_DATA_FILE",
+                               help="Input data file, read only if checksum of load batch isn't stored")
+    parser_verify.add_argument("-c", "--config", action="store", default="config.json",
+                               metavar="CONNECTION_CONFIG",
+                               help="Configuration file with database settings")
+    parser_verify.add_argument("-s", "--schema", action="store", required=True,
+                               metavar="JSON_SCHEMA", help="JSON schema of input data")
+    parser_verify.add_argument("--batch-id", default=None, metavar="ID",
+                               help="Id of load batch (column load.batch_id_column of configuration)")
+    parser_verify.add_argument("--where", default=None, metavar="SQL_CONDITION",
+                               help="Condition selecting loaded rows, e.g. time window")
+    parser_verify.set_defaults(func=verify)
+
     parser_schema = subparsers.add_parser("format",
                                           help="Open description of the JSON schema for input data")
     parser_schema.set_defaults(func=lambda x: open_help_html("scheme.html"))
@@ -85,6 +160,8 @@ def load_to_database(args):
     if description is None:
         return 1
 
+    profiler = LoadProfiler(args.profile, args.trace_memory)
+    tail = TailStore(args.incremental) if args.incremental is not None else None
     for file in args.files:
         path = pathlib.Path(file)
         if not path.exists():
@@ -96,11 +173,100 @@ def load_to_database(args):
             print("Cannot connect to the database for data loading")
             return 1
 
-        load_result = database.load_data(description, path)
+        with profiler.profile(path) as summary:
+            load_result = database.load_data(description, path, tail)
+        load_result.statistics.update(summary)
         print(load_result.to_string(path))
+    profiler.stop()
+    return 0
+
+
+def check(args):
+    description = load_description(args.schema)
+    if description is None:
+        return 1
+
+    paths = []
+    for file in args.files:
+        path = pathlib.Path(file)
+        if not path.exists():
+            print("File {} doesn't exist!".format(path))
+            continue
+        paths.append(path)
+
+    failed = 0
+    records = 0
+    size = 0
+    start = time.perf_counter()
+    for result in check_files(description, paths, args.max_errors, args.workers):
+        print(result.to_string())
+        failed += not result.success
+        records += result.records
+        size += result.size
+    seconds = time.perf_counter() - start
+    print("Checked {} files, failed {}: {} records, {:.0f} records/s, {:.1f} MB/s".format(
+        len(paths), failed, records, *throughput(records, size, seconds)))
+    return 1 if failed > 0 else 0
+
+
+def infer(args):
+    inference = infer_description(args.file, args.table, head=args.sample, size=args.sample)
+    text = json.dumps(inference.description, indent=2)
+    ddl = inference.ddl(args.ddl) if args.ddl is not None else None
+    if args.output is None:
+        print(text)
+        if ddl is not None:
+            print(ddl)
+        return 0
+    output = pathlib.Path(args.output)
+    output.write_text(text + "\n")
+    print("Generated file {} from {} sampled rows".format(output, inference.rows))
+    if ddl is not None:
+        output.with_suffix(".sql").write_text(ddl + "\n")
+        print("Generated file {}".format(output.with_suffix(".sql")))
     return 0
 
 
+def dump(args):
+    description = load_description(args.schema)
+    if description is None:
+        return 1
+    database = Database.connect_from_file(args.config)
+    if database is None:
+        print("Cannot connect to the database for data export")
+        return 1
+    statistics = dump_table(database, description, args.out, args.compression, use_copy=not args.no_copy)
+    print("Dumped {} rows of table {} to {} ({}, {:.1f} s)".format(
+        statistics["rows"], description["table"], args.out, statistics["method"], statistics["seconds"]))
+    return 0
+
+
+def verify(args):
+    description = load_description(args.schema)
+    if description is None:
+        return 1
+    database = Database.connect_from_file(args.config)
+    if database is None:
+        print("Cannot connect to the database for verification")
+        return 1
+    batch_id = args.batch_id
+    if batch_id is not None and batch_id.isdigit():
+        batch_id = int(batch_id)
+    if args.file is None and batch_id is None:
+        print("Input data file or id of load batch is required")
+        return 1
+    try:
+        mismatches = verify_load(database, description, args.file, args.where, batch_id)
+    except Exception as e:
+        print("ERROR: {}".format(e))
+        return 1
+    subject = args.file if batch_id is None else "load batch {}".format(batch_id)
+    print("Verifying {}: {}".format(subject, "MISMATCH" if mismatches else "OK"))
+    for mismatch in mismatches:
+        print("ERROR: {}".format(mismatch))
+    return 1 if mismatches else 0
+
+
 def generate(args):
     database = Database.connect_from_file(args.config)
     if database is None:
@@ -125,7 +291,7 @@ def console_app():
     parser = create_parser()
     args = parser.parse_args()
     if "func" in args: # Check subcommand function argument
-        args.func(args)
+        return args.func(args) or 0
     else:
         parser.print_help()
     return 0
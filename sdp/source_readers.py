@@ -1,53 +1,78 @@
 import abc
 import csv
-import dataclasses
+import itertools
+import mmap
 import xml.etree.ElementTree as ET
-from typing import Iterable, Any, List, IO, Union
+from typing import Iterable, Any, List, IO, Union, Optional, Iterator
 
 from sdp.description import Description
-from sdp.description_typing import DatabaseType, DEFAULT_PEEKER
+from sdp.load_plan import LoadPlan, ColumnPlan
+from sdp.reader_registry import READERS, Capability
 
-
-@dataclasses.dataclass
-class Column:
-    name: str
-    order: int  # TODO(Unused)
-    type: DatabaseType
+Column = ColumnPlan
 
 
 class SourceReader(abc.ABC):
     """Base class for reading input data and
     represent every line of input table as dictionary using columns name as keys for table value
     """
+    parser_settings_schema: Optional[dict] = None  # JSON schema of parser_settings section for this format
+    capabilities: Capability = Capability.NONE
 
-    def __init__(self, description: Description):
-        self.description = description
-        self.parser_settings = description["parser_settings"]
-        columns = description["columns"]
-        self.columns = []
-        for n_of_col, column in enumerate(columns):
-            self.columns.append(
-                Column(column["name"], column["order"],
-                       DEFAULT_PEEKER.peek_from_column(column))
-            )
+    def __init__(self, description: Union[Description, LoadPlan], workers: int = 1):
+        self.plan = description if isinstance(description, LoadPlan) else description.compile()
+        self.description = self.plan.description
+        self.continued = False  # Source continues previously loaded part of file (headers aren't repeated)
+        self.workers = workers if Capability.SPLITTABLE in self.capabilities else 1
+        self.parser_settings = self.plan.parser_settings
+        self.columns = list(self.plan.columns)
 
     @abc.abstractmethod
+    def read_source(self, source: Union[Iterable[str]]) -> Iterable[dict]:
+        """
+        Split input data to sequence of dictionary.
+        Every dictionary used column names as key and raw string from input data as value
+        """
+        pass
+
+    def convert(self, row: dict) -> dict:
+        """Convert raw strings of row to python values using column types"""
+        return {column.name: column.type(row[column.name]) for column in self.columns if column.name in row}
+
     def parse_source(self, source: Union[Iterable[str]]) -> Iterable[dict]:
         """
         Convert input data to sequence of dictionary.
         Every dictionary used column names as key and input data as value
         """
-        pass
+        for row in self.read_source(source):
+            yield self.convert(row)
+
+    def numbered_rows(self, source: Any) -> Iterable[tuple]:
+        """Rows of ``read_source`` with number of file line where record starts,
+        None for formats without lines (records are numbered by caller)
+        """
+        return ((None, row) for row in self.read_source(source))
+
+    def parse_batches(self, source: Any, batch_size: int) -> Optional[Iterator[list]]:
+        """Iterate over batches of converted rows, if reader have own faster way for the source (e.g. parallel parsing).
+        Return None otherwise, then ``read_source`` and ``convert`` are used.
+        """
+        return None
+
+    def record_end(self, mm: mmap.mmap, start: int) -> int:
+        """Return position after last complete record of memory-mapped file at or after ``start``.
+        Records are lines by default, readers with multiline records override it
+        """
+        from sdp.parallel_csv import last_record_end
+        return last_record_end(mm, start, None)
 
     @staticmethod
-    def get_reader(description: Description):
-        source_format = description["format"]
-        if source_format == "CSV":
-            return CSVReader(description)
-        elif source_format == "XML":
-            return XMLReader(description)
-        else:
+    def get_reader(description: Union[Description, LoadPlan], workers: int = 1):
+        source_format = description.format if isinstance(description, LoadPlan) else description["format"]
+        reader_class = READERS.get(source_format)
+        if reader_class is None:
             raise Exception("Unknown format")
+        return reader_class(description, workers)
 
     # @staticmethod
     # def _create_chunk_generator(row_iterator, row_parser, chunk_size) -> Iterable[List[dict]]:
@@ -62,15 +87,85 @@ class SourceReader(abc.ABC):
 
 
 class CSVReader(SourceReader):
-    """Reader for CSV files using module [csv]"""
-    def parse_source(self, source: Iterable[str]) -> Iterable[dict]:
-        reader = csv.reader(source, **self.parser_settings["CSV"].data)
-        for row in reader:
-            yield {column.name: item for column, item in zip(self.columns, row)}
+    """Reader for CSV files using module [csv].
+
+    With several workers regular files are memory-mapped and parsed by byte ranges in worker processes.
+    """
+    capabilities = Capability.STREAMING | Capability.SPLITTABLE | Capability.APPENDABLE | Capability.RAW_TEXT
+    chunk_bytes = 16 * 2 ** 20  # Size of byte range parsed by one worker task
+
+    def __init__(self, description, workers: int = 1):
+        super(CSVReader, self).__init__(description, workers)
+        self.null = self.parser_settings["CSV"]["null"] or None  # Marker of NULL fields
+
+    def dialect(self) -> dict:
+        settings = self.parser_settings["CSV"]
+        return {key: settings[key] for key in ("delimiter", "quotechar", "skipinitialspace")}
+
+    def skip_rows(self) -> int:
+        if self.continued:
+            return 0
+        settings = self.parser_settings["CSV"]
+        return int(settings["header"]) + settings["skipinitialrow"]
+
+    def read_lines(self, lines: Iterable[str], skip: int) -> Iterable[dict]:
+        comment = self.parser_settings["CSV"]["comment"]
+        if comment:
+            lines = (line for line in lines if not line.startswith(comment))
+        reader = csv.reader(lines, **self.dialect())
+        null = self.null
+        for row in itertools.islice(reader, skip, None):
+            if null is None:
+                yield {column.name: item for column, item in zip(self.columns, row)}
+            else:
+                yield {column.name: None if item == null else item for column, item in zip(self.columns, row)}
+
+    def read_source(self, source: Iterable[str]) -> Iterable[dict]:
+        return self.read_lines(source, self.skip_rows())
+
+    def numbered_rows(self, source: Iterable[str]) -> Iterable[tuple]:
+        """Rows with number of physical line where record starts (header, skipped rows and comments are counted)"""
+        comment = self.parser_settings["CSV"]["comment"]
+        starts = []
+
+        def lines():
+            for number, line in enumerate(source, 1):
+                if comment and line.startswith(comment):
+                    continue
+                starts.append(number)
+                yield line
+
+        null = self.null
+        skip = self.skip_rows()
+        for index, row in enumerate(csv.reader(lines(), **self.dialect())):
+            start = starts[0]
+            starts.clear()
+            if index >= skip:
+                yield start, {column.name: None if null is not None and item == null else item
+                              for column, item in zip(self.columns, row)}
+
+    def convert(self, row: dict) -> dict:
+        if self.null is None:
+            return super(CSVReader, self).convert(row)
+        return {column.name: None if row[column.name] is None else column.type(row[column.name])
+                for column in self.columns if column.name in row}
+
+    def parse_batches(self, source: Any, batch_size: int) -> Optional[Iterator[list]]:
+        from sdp.parallel_csv import is_mappable, parse_parallel
+        if self.workers > 1 and is_mappable(source):
+            return parse_parallel(self, source, self.workers, self.chunk_bytes, batch_size,
+                                  ordered=self.plan.ordered)
+        return None
+
+    def record_end(self, mm: mmap.mmap, start: int) -> int:
+        from sdp.parallel_csv import last_record_end
+        quotechar = self.parser_settings["CSV"]["quotechar"]
+        return last_record_end(mm, start, quotechar.encode() if quotechar else None)
 
 
 class XMLReader(SourceReader):
     """Reader for XML files using [xml.etree]"""
+    capabilities = Capability.RAW_TEXT
 
     @staticmethod
     def get_content(element: ET.Element) -> str:
@@ -87,7 +182,7 @@ class XMLReader(SourceReader):
                 content += item.tail
         return content
 
-    def parse_source(self, source: Any, chunk_size: int = 500) -> Iterable[dict]:
+    def read_source(self, source: Any) -> Iterable[dict]:
         tree = ET.parse(source)
         root = tree.getroot()
         table = root.find(".//{*}tbody")  # Find table body using XPath syntax
@@ -96,7 +191,6 @@ class XMLReader(SourceReader):
             header = table[0]
             table.remove(header)
         for row in table:
-            line = {column.name: column.type(self.get_content(item))
-                        for column, item in zip(self.columns, row)}
+            line = {column.name: self.get_content(item) for column, item in zip(self.columns, row)}
             yield line
 
@@ -0,0 +1,147 @@
+"""Server-side type conversion: raw strings are inserted to temporary text-typed staging table
+and moved to target table by ``INSERT INTO target SELECT CAST(...) FROM staging``.
+
+Cast expressions are generated from column types and ``type_properties`` of description,
+PostgreSQL with psycopg2 fills staging table by ``COPY``, other databases by batched inserts.
+"""
+import csv
+import io
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import Column, Float, MetaData, Table, Text, case, cast, func, insert, literal, literal_column, \
+    null, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from sdp.load_plan import ColumnPlan, LoadPlan
+from sdp.load_settings import LoadSettings, TransactionMode
+from sdp.pipeline import estimate_size
+from sdp.throttle import Throttle
+
+# strptime directives of custom datetime format in PostgreSQL to_timestamp and MySQL STR_TO_DATE syntax
+POSTGRES_DIRECTIVES = {"%Y": "YYYY", "%m": "MM", "%d": "DD", "%H": "HH24", "%M": "MI", "%S": "SS", "%f": "US"}
+MYSQL_DIRECTIVES = {"%M": "%i", "%S": "%s"}
+
+
+def translate_format(date_format: str, directives: dict) -> str:
+    return re.sub(r"%.", lambda match: directives.get(match.group(0), match.group(0)), date_format)
+
+
+def cast_expression(dialect: str, value: ColumnElement, column: ColumnPlan, target: Column) -> ColumnElement:
+    """Return SQL expression converting raw string ``value`` to type of ``target`` column"""
+    type_name = column.type_name
+    properties = column.type_properties
+    if type_name == "boolean":
+        # The same as bool() of client-side conversion: any non-empty string is true
+        return case([(value == literal(""), literal(False)), (value.isnot(None), literal(True))], else_=null())
+    if type_name == "binary":
+        if dialect == "postgresql":
+            return func.convert_to(value, properties["encoding"])
+        return cast(value, target.type)
+    if type_name == "datetime":
+        flavour = properties["datetime_flavour"]
+        if flavour == "custom":
+            date_format = properties["datetime_format"]
+            if dialect == "postgresql":
+                return cast(func.to_timestamp(value, translate_format(date_format, POSTGRES_DIRECTIVES)), target.type)
+            if dialect == "mysql":
+                return func.str_to_date(value, translate_format(date_format, MYSQL_DIRECTIVES))
+            raise ValueError("Custom datetime format isn't supported by server-side conversion for {}".format(dialect))
+        if dialect == "sqlite":
+            # SQLAlchemy stores SQLite datetimes as "YYYY-MM-DD HH:MM:SS.ffffff"
+            modifiers = ["unixepoch"] if flavour == "unixtime" else []
+            return func.strftime("%Y-%m-%d %H:%M:%f", value, *modifiers).op("||")(literal("000"))
+        if flavour == "unixtime":
+            # Loader converts unix time to naive UTC datetime, session time zone of server mustn't change it
+            if dialect == "postgresql":
+                return cast(func.timezone("UTC", func.to_timestamp(cast(value, Float))), target.type)
+            if dialect == "mysql":
+                return func.convert_tz(func.from_unixtime(cast(value, Float)), literal_column("@@session.time_zone"),
+                                       "+00:00")
+        return cast(value, target.type)
+    if type_name == "string":
+        # Raw text is assigned to column, so over-length strings are rejected instead of truncated by explicit cast
+        return value
+    return cast(value, target.type)
+
+
+class StagingWriter:
+    """Insert batches of raw rows to temporary staging table and convert them to target table by database.
+
+    In ``TransactionMode.FILE`` all rows of file are moved by one ``INSERT ... SELECT``,
+    in ``TransactionMode.CHUNK`` every batch is moved and committed separately.
+    """
+
+    def __init__(self, conn, table: Table, plan: LoadPlan, settings: LoadSettings,
+                 throttle: Optional[Throttle] = None, constants: Optional[dict] = None):
+        """
+        :param constants: values of target columns which are the same for all rows (e.g. load batch id)
+        """
+        self.conn = conn
+        self.table = table
+        self.plan = plan
+        self.settings = settings
+        self.throttle = throttle
+        self.throttled = 0.0
+        self.dialect = conn.dialect.name
+        self.names = plan.column_names()
+        self.constants = constants or {}
+        self.staging = Table("sdp_staging_{}".format(table.name), MetaData(),
+                             *[Column(name, Text) for name in self.names], prefixes=["TEMPORARY"])
+        self.rows = 0
+        self.batches = 0
+
+    def _copy(self) -> bool:
+        return self.dialect == "postgresql" and self.conn.dialect.driver == "psycopg2"
+
+    def stage(self, batch: list):
+        if self.throttle is not None:
+            self.throttled += self.throttle.acquire(len(batch), estimate_size(batch))
+        if self._copy():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+            for row in batch:
+                writer.writerow([row.get(name) for name in self.names])
+            buffer.seek(0)
+            preparer = self.conn.dialect.identifier_preparer
+            statement = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+                preparer.format_table(self.staging), ", ".join(preparer.quote(name) for name in self.names))
+            with self.conn.connection.cursor() as cursor:
+                cursor.copy_expert(statement, buffer)
+        else:
+            self.conn.execute(insert(self.staging), [{name: row.get(name) for name in self.names} for row in batch])
+        self.rows += len(batch)
+        self.batches += 1
+
+    def move(self):
+        columns = []
+        for column in self.plan.columns:
+            name = column.name
+            columns.append(cast_expression(self.dialect, self.staging.c[name], column, self.table.c[name]).label(name))
+        for name, value in self.constants.items():
+            columns.append(literal(value).label(name))
+        statement = insert(self.table).from_select(self.names + list(self.constants), select(columns))
+        self.conn.execute(statement)
+        self.conn.execute(self.staging.delete())
+
+    def write(self, batches: Iterable[list]):
+        self.staging.create(self.conn)
+        try:
+            if self.settings.transaction == TransactionMode.CHUNK:
+                for batch in batches:
+                    with self.conn.begin():
+                        self.stage(batch)
+                        self.move()
+            else:
+                with self.conn.begin():
+                    for batch in batches:
+                        self.stage(batch)
+                    self.move()
+        finally:
+            self.staging.drop(self.conn)
+
+    def statistics(self) -> dict:
+        statistics = {"rows": self.rows, "batches": self.batches, "conversion": "server"}
+        if self.throttle is not None:
+            statistics["throttled_seconds"] = round(self.throttled, 3)
+        return statistics
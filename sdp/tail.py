@@ -0,0 +1,122 @@
+"""Incremental loading of files which grow by appending records (e.g. DAQ logs).
+
+State file stores for every pair of file and description the offset after the last loaded complete record,
+inode and size of file and digest of bytes before the offset. Next loading reads only new complete records
+after the offset. If file was rotated (other inode) or truncated (smaller size or other bytes before
+the offset), it is loaded from the beginning.
+"""
+import dataclasses
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import pathlib
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from sdp.description import Description, DescriptionEncoder
+
+DEFAULT_STATE_FILE = ".sdp_tail.json"
+DIGEST_BYTES = 4096  # Number of bytes before offset which are checked for detecting rewritten file
+
+
+@dataclass
+class TailState:
+    offset: int = 0
+    inode: int = 0
+    size: int = 0
+    digest: str = ""
+
+
+@dataclass
+class TailRange:
+    """Byte range of new complete records of file"""
+    key: str
+    start: int
+    end: int
+    state: TailState
+
+    @property
+    def empty(self) -> bool:
+        return self.start >= self.end
+
+
+def _digest(mm: mmap.mmap, offset: int) -> str:
+    return hashlib.sha1(mm[max(0, offset - DIGEST_BYTES): offset]).hexdigest()
+
+
+def state_key(path: pathlib.Path, description: Description) -> str:
+    data = json.dumps(description, cls=DescriptionEncoder, sort_keys=True)
+    return "{}:{}".format(path.resolve(), hashlib.sha1(data.encode("utf-8")).hexdigest()[:16])
+
+
+class RangeReader(io.RawIOBase):
+    """Raw binary stream of byte range of file"""
+
+    def __init__(self, path: Union[str, pathlib.Path], start: int, end: int):
+        super(RangeReader, self).__init__()
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._remaining)])
+        self._remaining -= size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super(RangeReader, self).close()
+
+
+class TailStore:
+    """JSON file with states of incrementally loaded files"""
+
+    def __init__(self, path: Union[str, pathlib.Path] = DEFAULT_STATE_FILE):
+        self.path = pathlib.Path(path)
+        self.states = {}
+        if self.path.exists():
+            with open(self.path) as fin:
+                self.states = {key: TailState(**value) for key, value in json.load(fin).items()}
+
+    def save(self):
+        temp = self.path.with_name(self.path.name + ".tmp")
+        with open(temp, "w") as fout:
+            json.dump({key: dataclasses.asdict(value) for key, value in self.states.items()}, fout, indent=2)
+        os.replace(temp, self.path)  # Atomic replace, state isn't lost if process is killed
+
+    def new_range(self, path: pathlib.Path, description: Description, reader) -> TailRange:
+        """Find range of new complete records of file after previously loaded offset"""
+        key = state_key(path, description)
+        previous = self.states.get(key, TailState())
+        with open(path, "rb") as fin:
+            stat = os.fstat(fin.fileno())
+            if stat.st_size == 0:
+                return TailRange(key, 0, 0, TailState(0, stat.st_ino, 0, ""))
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = previous.offset
+                if start > 0 and (previous.inode != stat.st_ino or stat.st_size < start
+                                  or _digest(mm, start) != previous.digest):
+                    logging.info("File {} was rotated or truncated, it is loaded from the beginning".format(path))
+                    start = 0
+                end = reader.record_end(mm, start)
+                state = TailState(end, stat.st_ino, stat.st_size, _digest(mm, end))
+        return TailRange(key, start, end, state)
+
+    def open_range(self, path: pathlib.Path, tail_range: TailRange, encoding: Optional[str] = None,
+                   binary: bool = False):
+        stream = io.BufferedReader(RangeReader(path, tail_range.start, tail_range.end))
+        if binary:
+            return stream
+        return io.TextIOWrapper(stream, encoding=encoding, newline="")
+
+    def commit(self, tail_range: TailRange):
+        """Store state after records of range were loaded"""
+        self.states[tail_range.key] = tail_range.state
+        self.save()
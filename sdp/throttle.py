@@ -0,0 +1,133 @@
+"""Rate limiting of inserts for protection of shared database.
+
+Limits in rows/s and bytes/s are token buckets shared by all writers of one process
+(all connections to the same database with the same settings use one ``Throttle``).
+Optional probe periodically measures server metric (replication lag, latency of trivial query
+or value of custom query) and decreases rates while metric exceeds threshold.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sdp.load_settings import LoadSettings
+
+PROBE_QUERIES = {
+    "replication_lag": "SELECT COALESCE(EXTRACT(EPOCH FROM max(replay_lag)), 0) FROM pg_stat_replication",
+}
+MIN_FACTOR = 0.05
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Request larger than bucket capacity is allowed and paid by waiting"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else rate
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float, factor: float = 1.0) -> float:
+        """Take tokens and return time to wait before using them"""
+        rate = self.rate * factor
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * rate)
+            self.last = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / rate
+
+
+class LoadProbe:
+    """Measure server metric not often than once per ``interval`` and control factor of rates:
+    halve it while metric exceeds threshold, restore it by steps otherwise
+    """
+
+    def __init__(self, engine: Engine, probe: str, threshold: float, interval: float):
+        self.engine = engine
+        self.probe = probe
+        self.threshold = threshold
+        self.interval = interval
+        self.factor = 1.0
+        self.value = None
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def measure(self) -> float:
+        with self.engine.connect() as conn:
+            if self.probe == "latency":
+                start = time.perf_counter()
+                conn.execute(text("SELECT 1")).scalar()
+                return time.perf_counter() - start
+            value = conn.execute(text(PROBE_QUERIES.get(self.probe, self.probe))).scalar()
+            return float(value or 0)
+
+    def current_factor(self) -> float:
+        now = time.monotonic()
+        if now < self._next or not self._lock.acquire(blocking=False):
+            return self.factor
+        try:
+            self._next = now + self.interval
+            try:
+                self.value = self.measure()
+            except Exception as e:
+                logging.warning("Throttle probe {} failed: {}".format(self.probe, e))
+                return self.factor
+            if self.value > self.threshold:
+                self.factor = max(self.factor / 2, MIN_FACTOR)
+                logging.info("Throttle probe {} = {:.3f} exceeds {}, rates are decreased to {:.0%}".format(
+                    self.probe, self.value, self.threshold, self.factor))
+            elif self.factor < 1.0:
+                self.factor = min(self.factor + 0.1, 1.0)
+            return self.factor
+        finally:
+            self._lock.release()
+
+
+class Throttle:
+
+    def __init__(self, rows_per_second: Optional[float] = None, bytes_per_second: Optional[float] = None,
+                 probe: Optional[LoadProbe] = None):
+        self.buckets = []
+        if rows_per_second:
+            self.buckets.append(("rows", TokenBucket(rows_per_second)))
+        if bytes_per_second:
+            self.buckets.append(("bytes", TokenBucket(bytes_per_second)))
+        self.probe = probe
+
+    def acquire(self, rows: int, size: int) -> float:
+        """Wait until batch can be inserted, return waiting time"""
+        factor = self.probe.current_factor() if self.probe is not None else 1.0
+        amounts = {"rows": rows, "bytes": size}
+        wait = max([bucket.reserve(amounts[kind], factor) for kind, bucket in self.buckets], default=0.0)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_THROTTLES = {}
+_THROTTLES_LOCK = threading.Lock()
+
+
+def shared_throttle(engine: Engine, settings: LoadSettings) -> Optional[Throttle]:
+    """Return throttle shared by all writers of the process to the database, None if rates aren't limited"""
+    if not settings.throttle_rows and not settings.throttle_bytes:
+        return None
+    key = (repr(engine.url), settings.throttle_rows, settings.throttle_bytes, settings.throttle_probe,
+           settings.throttle_threshold, settings.throttle_interval)
+    with _THROTTLES_LOCK:
+        throttle = _THROTTLES.get(key)
+        if throttle is None:
+            probe = None
+            if settings.throttle_probe:
+                probe = LoadProbe(engine, settings.throttle_probe, settings.throttle_threshold,
+                                  settings.throttle_interval)
+            throttle = Throttle(settings.throttle_rows, settings.throttle_bytes, probe)
+            _THROTTLES[key] = throttle
+        return throttle
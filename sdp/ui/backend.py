@@ -22,6 +22,7 @@ class Backend(QObject):
         super(Backend, self).__init__(parent=None)
         self.settings = settings
         self.database = database_factory(self.settings.database_settings)
+        self.database.start_heartbeat()
         settings.update_database.connect(self.update_settings)
 
     def update_settings(self):
@@ -33,7 +34,7 @@ class Backend(QObject):
 
     @Slot(result=bool)
     def check_connection_status(self):
-        status = self.database.test_connect()
+        status = self.database.connection_status()
         self.connection_status.emit(status.success)
         if not status.success:
             self.connection_error.emit(status.error)
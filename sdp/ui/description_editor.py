@@ -3,6 +3,7 @@ from PySide2.QtWidgets import QWidget, QLabel, QVBoxLayout, QLineEdit, QComboBox
     QScrollArea, QCheckBox, QStackedLayout, QSpinBox
 
 from sdp.description import Description
+from sdp.reader_registry import READERS
 from sdp.ui.backend import Backend
 from sdp.ui.description_model import FDItem, FDFilesTree, PathItem
 from sdp.ui.utils import hbox
@@ -139,6 +140,7 @@ class ParserSettings(QWidget):
         self.stack = QStackedLayout(self)
 
     def change_format(self, new_format):
+        READERS.get(new_format)  # Import reader and add its settings to schema
         settings = self.description["parser_settings"][new_format]
         indx = self._pages.get(new_format, None)
         if indx is None:
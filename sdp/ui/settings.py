@@ -79,7 +79,7 @@ class ConnectionDock(QDockWidget):
 
         for field in dataclasses.fields(database_settings):
             editor = FieldEditor.create_field_editor(database_settings, field)
-            hbox((QLabel(self.tr(field.name).title() + ":"), 1), editor.widget, parent=vbox)
+            hbox((QLabel(self.tr(field.name.replace("_", " ")).title() + ":"), 1), editor.widget, parent=vbox)
             editor.updated.connect(lambda : settings.update_database_settings())
 
         error_label = QLabel("")
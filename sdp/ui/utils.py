@@ -8,7 +8,8 @@ from typing import Optional
 
 from PySide2.QtCore import QUrl, QStandardPaths, QObject, Signal
 from PySide2.QtGui import QIcon
-from PySide2.QtWidgets import QHBoxLayout, QWidget, QLayout, QBoxLayout, QLineEdit, QPushButton, QComboBox, QVBoxLayout
+from PySide2.QtWidgets import QHBoxLayout, QWidget, QLayout, QBoxLayout, QLineEdit, QPushButton, QComboBox, QVBoxLayout, \
+    QCheckBox
 
 ORGANIZATION_NAME = "NPM_Group"
 ORGANIZATION_DOMAIN = "npm.mipt.ru"
@@ -51,6 +52,8 @@ class FieldEditor(QObject):
     def create_field_editor(obj, field: dataclasses.Field):
         if field.type == str:
             return StrFieldEditor(obj, field)
+        if field.type == bool:
+            return BoolFieldEditor(obj, field)
         if field.type == Optional[int] or field.type == int:
             return IntFieldEditor(obj, field)
         if issubclass(field.type, Enum):
@@ -70,6 +73,20 @@ class StrFieldEditor(FieldEditor):
         self._editor.editingFinished.connect(finish)
 
 
+class BoolFieldEditor(FieldEditor):
+
+    def __init__(self, obj, field):
+        super(BoolFieldEditor, self).__init__()
+        self._editor = QCheckBox()
+        self._editor.setChecked(obj.__getattribute__(field.name))
+
+        def toggle(checked):
+            obj.__setattr__(field.name, checked)
+            self.updated.emit()
+
+        self._editor.toggled.connect(toggle)
+
+
 class EnumFieldEditor(FieldEditor):
 
     def __init__(self, obj, field):
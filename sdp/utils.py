@@ -2,6 +2,7 @@ import json
 import logging
 import os.path
 import pathlib
+import tempfile
 import webbrowser
 
 import jsonschema
@@ -12,8 +13,12 @@ JSON_SCHEMA = ROOT_DIR / "resources" / "schema.json"
 
 
 def get_json_schema_docs(output: pathlib.Path):
-    with JSON_SCHEMA.open() as fin, output.open("w") as fout:
-        generate_from_file_object(fin, fout)
+    from sdp.description import Description  # Schema with parser settings of registered readers
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as fin, output.open("w") as fout:
+        json.dump(Description.load_scheme(), fin, indent=2)
+        fin.flush()
+        with open(fin.name) as schema_file:
+            generate_from_file_object(schema_file, fout)
     return output
 
 
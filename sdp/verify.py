@@ -0,0 +1,305 @@
+"""Integrity verification of loaded data.
+
+Loader computes order-independent checksum of converted rows while streaming (``LoadSettings.checksum``):
+number of rows and aggregates of every column, which database can compute too:
+number of not null values, sum for numbers, sum of lengths for strings and binaries,
+number of true values for booleans, minimum, maximum and sum of epoch seconds for datetimes
+(naive datetimes are taken as UTC).
+``server_checksum`` computes the same aggregates by one query over loaded rows
+(selected by load batch id column or any SQL condition), ``compare`` reports mismatches.
+Sums are compared with tolerance scaled by precision of target column type and number of rows.
+Checksum of every load batch is stored in checksum table of target database (``LoadSettings.checksum_table``),
+so loaded rows are verified against checksum of rows which were actually loaded without reading file again.
+"""
+import datetime
+import decimal
+import json
+import logging
+import math
+import pathlib
+from typing import Iterable, Iterator, List, Optional, Union
+
+from sqlalchemy import (BigInteger, Column, DateTime, Integer, MetaData, String, Table, Text, case, func, insert,
+                        literal, literal_column, select, text)
+from sqlalchemy.types import Float, Numeric, REAL
+
+from sdp.compression import open_source
+from sdp.description import Description
+from sdp.load_plan import LoadPlan
+from sdp.load_settings import LoadSettings
+from sdp.pipeline import Pipeline
+from sdp.reader_registry import Capability
+from sdp.source_readers import SourceReader
+
+FLOAT_TOLERANCE = 1e-9  # Tolerance of float values which aren't sums
+DOUBLE_EPSILON = 2.0 ** -53  # Rounding error of one addition of double precision sum
+SINGLE_EPSILON = 2.0 ** -24  # Rounding error of value stored in single precision column (REAL, float4)
+EPOCH = datetime.datetime(1970, 1, 1)
+# Error of epoch seconds of one value computed by database (SQLite julianday is double of days)
+EPOCH_ERRORS = {"sqlite": 1e-4}
+
+
+def aggregates(type_name: str) -> tuple:
+    if type_name in ("integer", "float", "decimal"):
+        return "count", "sum"
+    if type_name in ("string", "binary"):
+        return "count", "length"
+    if type_name == "boolean":
+        return "count", "true"
+    if type_name == "datetime":
+        return "count", "min", "max", "epoch"
+    return "count",
+
+
+def epoch_seconds(value: datetime.datetime) -> float:
+    if value.tzinfo is not None:
+        return value.timestamp()
+    return (value - EPOCH).total_seconds()
+
+
+class Checksum:
+    """Order-independent checksum of converted rows"""
+
+    def __init__(self, plan: LoadPlan):
+        self.rows = 0
+        self.columns = [(column.name, aggregates(column.type_name)) for column in plan.columns]
+        self.values = {name: {aggregate: None if aggregate in ("min", "max") else 0 for aggregate in names}
+                       for name, names in self.columns}
+        for name, names in self.columns:
+            if "epoch" in names:
+                self.values[name]["epoch"] = 0.0
+
+    def update(self, batch: List[dict]):
+        self.rows += len(batch)
+        for name, names in self.columns:
+            values = [row.get(name) for row in batch]
+            values = [value for value in values if value is not None]
+            if not values:
+                continue
+            result = self.values[name]
+            result["count"] += len(values)
+            if "sum" in names:
+                result["sum"] += sum(values)
+            elif "length" in names:
+                result["length"] += sum(map(len, values))
+            elif "true" in names:
+                result["true"] += sum(1 for value in values if value)
+            elif "min" in names:
+                low, high = min(values), max(values)
+                result["min"] = low if result["min"] is None else min(result["min"], low)
+                result["max"] = high if result["max"] is None else max(result["max"], high)
+                result["epoch"] += math.fsum(map(epoch_seconds, values))
+
+    def track(self, batches: Iterable[list]) -> Iterator[list]:
+        """Update checksum by batches passed to writer"""
+        for batch in batches:
+            self.update(batch)
+            yield batch
+
+    def result(self) -> dict:
+        return {"rows": self.rows, "columns": self.values}
+
+
+def _length(dialect: str, column):
+    if dialect == "mysql":
+        return func.char_length(column)
+    return func.length(column)
+
+
+def _epoch(dialect: str, column):
+    """Epoch seconds of datetime column, naive values are taken as UTC"""
+    if dialect == "sqlite":
+        return (func.julianday(column) - 2440587.5) * 86400.0
+    if dialect == "mysql":
+        if type(column.type).__name__ == "TIMESTAMP":  # Returned in session time zone
+            column = func.convert_tz(column, literal_column("@@session.time_zone"), "+00:00")
+        return func.timestampdiff(literal_column("MICROSECOND"), "1970-01-01 00:00:00", column) / 1000000.0
+    if dialect == "mssql":
+        return func.datediff_big(literal_column("microsecond"), "1970-01-01", column) / 1000000.0
+    return func.extract("epoch", column)  # PostgreSQL takes timestamp without time zone as UTC
+
+
+def sum_tolerances(dialect: str, table: Table, plan: LoadPlan, rows: int) -> dict:
+    """Relative and absolute tolerance of sums by precision of column types and number of rows"""
+    result = {}
+    summation = max(rows, 1) * DOUBLE_EPSILON
+    for column in plan.columns:
+        type_ = table.c[column.name].type
+        names = aggregates(column.type_name)
+        if "sum" in names:
+            if isinstance(type_, Float):
+                # SQLite stores REAL as double, FLOAT of MySQL without precision is single
+                precision = type_.precision
+                single = dialect != "sqlite" and (isinstance(type_, REAL) or (precision or 53) <= 24
+                                                   or dialect == "mysql" and precision is None)
+                result[(column.name, "sum")] = (summation + (SINGLE_EPSILON if single else DOUBLE_EPSILON),
+                                                FLOAT_TOLERANCE)
+            elif isinstance(type_, Numeric) and type_.scale is not None:
+                result[(column.name, "sum")] = (summation, max(rows, 1) * 0.5 * 10.0 ** -type_.scale)
+        if "epoch" in names:
+            result[(column.name, "epoch")] = (summation, max(rows, 1) * EPOCH_ERRORS.get(dialect, 1e-6))
+    return result
+
+
+def server_checksum(conn, table: Table, plan: LoadPlan, where: Optional[str] = None,
+                    batch_id_column: Optional[str] = None, batch_id=None) -> dict:
+    """Compute checksum of rows of table by database.
+
+    :param where: SQL condition selecting loaded rows
+    :param batch_id: id of load batch stored by loader in ``batch_id_column``
+    """
+    dialect = conn.dialect.name
+    expressions = [func.count()]
+    keys = []
+    for column in plan.columns:
+        sql_column = table.c[column.name]
+        for aggregate in aggregates(column.type_name):
+            if aggregate == "count":
+                expression = func.count(sql_column)
+            elif aggregate == "sum":
+                expression = func.sum(sql_column)
+            elif aggregate == "length":
+                expression = func.sum(_length(dialect, sql_column))
+            elif aggregate == "true":
+                expression = func.sum(case([(sql_column, literal(1))], else_=literal(0)), type_=Integer)
+            elif aggregate == "min":
+                expression = func.min(sql_column)
+            elif aggregate == "epoch":
+                expression = func.sum(_epoch(dialect, sql_column))
+            else:
+                expression = func.max(sql_column)
+            expressions.append(expression)
+            keys.append((column.name, aggregate))
+    statement = select(expressions).select_from(table)
+    if batch_id_column is not None and batch_id is not None:
+        statement = statement.where(table.c[batch_id_column] == batch_id)
+    if where:
+        statement = statement.where(text(where))
+    row = conn.execute(statement).fetchone()
+    values = {column.name: {} for column in plan.columns}
+    for (name, aggregate), value in zip(keys, row[1:]):
+        if value is None and aggregate not in ("min", "max"):
+            value = 0
+        values[name][aggregate] = value
+    return {"rows": row[0], "columns": values}
+
+
+def _equal(expected, actual, tolerance: tuple = (FLOAT_TOLERANCE, FLOAT_TOLERANCE)) -> bool:
+    if isinstance(expected, float) or isinstance(actual, float):
+        try:
+            return math.isclose(float(expected), float(actual), rel_tol=tolerance[0], abs_tol=tolerance[1])
+        except (TypeError, ValueError):
+            return False
+    if hasattr(actual, "tzinfo") and hasattr(expected, "tzinfo") and \
+            (actual.tzinfo is None) != (expected.tzinfo is None):
+        return actual.replace(tzinfo=None) == expected.replace(tzinfo=None)
+    return expected == actual
+
+
+def compare(expected: dict, actual: dict, tolerances: Optional[dict] = None) -> List[str]:
+    """Return descriptions of mismatches between checksums of file and of database
+
+    :param tolerances: relative and absolute tolerances of aggregates by (column name, aggregate)
+    """
+    tolerances = tolerances or {}
+    mismatches = []
+    if expected["rows"] != actual["rows"]:
+        mismatches.append("rows: file {}, database {}".format(expected["rows"], actual["rows"]))
+    for name, values in expected["columns"].items():
+        for aggregate, value in values.items():
+            server_value = actual["columns"].get(name, {}).get(aggregate)
+            tolerance = tolerances.get((name, aggregate), (FLOAT_TOLERANCE, FLOAT_TOLERANCE))
+            if not _equal(value, server_value, tolerance):
+                mismatches.append("column {} {}: file {}, database {}".format(name, aggregate, value, server_value))
+    return mismatches
+
+
+def checksum_table(name: str, metadata: Optional[MetaData] = None) -> Table:
+    return Table(name, metadata if metadata is not None else MetaData(),
+                 Column("loaded_at", DateTime),
+                 Column("table_name", String(128)),
+                 Column("source", String(1024)),
+                 Column("batch_id", String(64)),
+                 Column("rows", BigInteger),
+                 Column("checksum", Text))
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"$decimal": str(value)}
+    raise TypeError("Value {!r} isn't serializable".format(value))
+
+
+def _decode(value: dict):
+    if "$datetime" in value:
+        return datetime.datetime.fromisoformat(value["$datetime"])
+    if "$decimal" in value:
+        return decimal.Decimal(value["$decimal"])
+    return value
+
+
+def store_checksum(conn, name: str, table_name: str, source: str, batch_id, checksum: dict):
+    """Append checksum of load batch to checksum table ``name`` (it's created if it doesn't exist)"""
+    table = checksum_table(name)
+    row = {"loaded_at": datetime.datetime.now(), "table_name": table_name, "source": source,
+           "batch_id": str(batch_id), "rows": checksum["rows"], "checksum": json.dumps(checksum, default=_encode)}
+    with conn.begin():
+        table.create(conn, checkfirst=True)
+        conn.execute(insert(table), [row])
+
+
+def stored_checksum(conn, name: str, table_name: str, batch_id) -> Optional[dict]:
+    """Return checksum stored by the last load of batch to table, None if it isn't stored"""
+    if not conn.dialect.has_table(conn, name):
+        return None
+    table = checksum_table(name)
+    statement = select([table.c.checksum]).where(table.c.table_name == table_name) \
+        .where(table.c.batch_id == str(batch_id)).order_by(table.c.loaded_at.desc()).limit(1)
+    value = conn.execute(statement).scalar()
+    if value is None:
+        return None
+    return json.loads(value, object_hook=_decode)
+
+
+def file_checksum(plan: LoadPlan, path: Union[str, pathlib.Path], settings: Optional[LoadSettings] = None) -> dict:
+    """Compute checksum of converted rows of file, the same as loader computes"""
+    settings = settings if settings is not None else LoadSettings()
+    reader = SourceReader.get_reader(plan, settings.parse_workers)
+    checksum = Checksum(plan)
+    with open_source(path, binary=Capability.BINARY in reader.capabilities, threaded=settings.threaded) as fin:
+        for batch in Pipeline(reader, settings).batches(fin):
+            checksum.update(batch)
+    return checksum.result()
+
+
+def verify_load(database, description: Description, path: Optional[Union[str, pathlib.Path]] = None,
+                where: Optional[str] = None, batch_id=None) -> List[str]:
+    """Compare checksum of loaded rows computed by database with expected checksum, return mismatches.
+
+    Expected checksum of load batch is read from checksum table, checksum of file ``path`` is computed
+    only if batch isn't set or its checksum isn't stored.
+    """
+    plan = description.compile(database.type_peeker)
+    with database.engine.connect() as conn:
+        table = database.reflect_table(conn, plan.table)
+        if table is None:
+            raise Exception("Table {} doesn't exist in database {}".format(plan.table, database.url))
+        batch_id_column = database.load_settings.batch_id_column
+        if batch_id is not None and batch_id_column is None:
+            raise Exception("Load batch id column isn't set in configuration (load.batch_id_column)")
+        expected = None
+        checksums = database.load_settings.checksum_table
+        if batch_id is not None and checksums is not None:
+            expected = stored_checksum(conn, checksums, plan.table, batch_id)
+            if expected is None and path is not None:
+                logging.warning("Checksum of load batch {} isn't stored, file {} is read again".format(batch_id,
+                                                                                                       path))
+        if expected is None:
+            if path is None:
+                raise Exception("Checksum of load batch {} of table {} isn't stored in table {}".format(
+                    batch_id, plan.table, checksums))
+            expected = file_checksum(plan, path, database.load_settings)
+        actual = server_checksum(conn, table, plan, where, batch_id_column, batch_id)
+    return compare(expected, actual, sum_tolerances(conn.dialect.name, table, plan, expected["rows"]))
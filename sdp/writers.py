@@ -0,0 +1,389 @@
+import dataclasses
+import logging
+import re
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from sdp.load_plan import TargetPlan
+from sdp.load_settings import LoadSettings, TransactionMode
+from sdp.pipeline import BoundedQueue, PipelineAborted, estimate_size, stage_thread
+from sdp.retry import RetryPolicy
+from sdp.throttle import Throttle
+
+MIN_BATCH_SIZE = 16
+# Errors of databases and drivers for statements exceeding limits of parameters number or packet size
+LIMIT_ERRORS = re.compile(r"too many (sql variables|parameters)|max_allowed_packet|packet .*(too large|bigger)"
+                          r"|cannot exceed \d+ parameters|number of parameters must be", re.IGNORECASE)
+
+
+def is_limit_error(error: DBAPIError) -> bool:
+    return LIMIT_ERRORS.search(str(error.orig)) is not None
+
+
+def add_constants(batches: Iterable[list], constants: dict) -> Iterator[list]:
+    """Set values of columns which are the same for all rows (e.g. load batch id)"""
+    if not constants:
+        yield from batches
+        return
+    for batch in batches:
+        for row in batch:
+            row.update(constants)
+        yield batch
+
+
+class AdaptiveBatchSize:
+    """Batch size tuned by hill climbing on measured insert latency per row.
+
+    Latency is averaged over ``window`` batches of the same size. Size is changed twice in the same direction
+    while latency per row improves, direction is reversed when latency becomes worse
+    (larger batches stopped paying off or commits slowed down). Size is limited by ``ceiling``,
+    which is lowered when database rejects batch by parameters or packet limits.
+    """
+
+    def __init__(self, initial: int, maximum: int, max_bytes: int, window: int = 3, tolerance: float = 0.05):
+        self.maximum = max(maximum, MIN_BATCH_SIZE)
+        self.size = min(max(initial, MIN_BATCH_SIZE), self.maximum)
+        self.max_bytes = max_bytes
+        self.window = window
+        self.tolerance = tolerance
+        self.ceiling = self.maximum
+        self.safe = 0  # The largest size accepted by database
+        self.direction = 1
+        self.previous = None
+        self._rows = 0
+        self._seconds = 0.0
+        self._batches = 0
+        self.sizes = [self.size]
+        self._row_bytes = None
+
+    def limit_by_memory(self, row_bytes: int):
+        self._row_bytes = row_bytes
+        if row_bytes > 0:
+            self.ceiling = min(self.ceiling, max(self.max_bytes // row_bytes, MIN_BATCH_SIZE))
+            self._resize(self.size)
+
+    def _resize(self, size: int):
+        size = min(max(size, MIN_BATCH_SIZE), self.ceiling)
+        if size != self.size:
+            self.size = size
+            self.sizes.append(size)
+        self._rows = 0
+        self._seconds = 0.0
+        self._batches = 0
+
+    def record(self, rows: int, seconds: float):
+        self._rows += rows
+        self._seconds += seconds
+        self._batches += 1
+        if self._batches < self.window or self._rows == 0:
+            return
+        latency = self._seconds / self._rows
+        if self.previous is not None:
+            if latency > self.previous * (1 + self.tolerance):
+                self.direction = -self.direction
+            elif latency >= self.previous * (1 - self.tolerance):
+                self.previous = latency  # Plateau: keep current size
+                self._resize(self.size)
+                return
+        self.previous = latency
+        size = self.size * 2 if self.direction > 0 else self.size // 2
+        if size > self.ceiling or size < MIN_BATCH_SIZE:
+            self.direction = -self.direction
+            size = self.size
+        self._resize(size)
+
+    def rejected(self, rows: int):
+        """Database rejected batch of ``rows`` by parameters or packet limit"""
+        self.ceiling = max(min(self.ceiling, rows // 2), MIN_BATCH_SIZE)
+        self.direction = -1
+        self.previous = None
+        self._resize(rows // 2)
+
+    def rebatch(self, batches: Iterable[list]) -> Iterator[list]:
+        """Split and merge batches to current size"""
+        buffer = []
+        for batch in batches:
+            if self._row_bytes is None and len(batch) > 0:
+                self.limit_by_memory(estimate_size(batch[:1]))
+            buffer.extend(batch)
+            while len(buffer) >= self.size:
+                size = self.size
+                yield buffer[:size]
+                buffer = buffer[size:]
+        if len(buffer) > 0:
+            yield buffer
+
+
+class BatchWriter:
+    """Insert batches of rows to the table using one connection.
+
+    In ``TransactionMode.FILE`` all batches are inserted in one transaction,
+    in ``TransactionMode.CHUNK`` every batch is committed separately.
+    With ``LoadSettings.adaptive_batch`` batches are resized by ``AdaptiveBatchSize``.
+    In ``TransactionMode.CHUNK`` batch failed by transient error is retried on fresh connection from pool,
+    already committed batches aren't repeated.
+    """
+
+    def __init__(self, conn, table: Table, settings: LoadSettings, throttle: Optional[Throttle] = None):
+        self.conn = conn
+        self.table = table
+        self.settings = settings
+        self.throttle = throttle
+        self.statement = insert(table)
+        self.rows = 0
+        self.batches = 0
+        self.throttled = 0.0
+        self.retries = 0
+        self.retry_policy = RetryPolicy(settings.retry_attempts, settings.retry_delay, settings.retry_max_delay)
+        self._origin = conn
+        self.adaptive = None
+        if settings.adaptive_batch:
+            self.adaptive = AdaptiveBatchSize(settings.batch_size, settings.max_batch_size, settings.batch_bytes)
+
+    def insert(self, batch: list):
+        if self.throttle is not None:
+            self.throttled += self.throttle.acquire(len(batch), estimate_size(batch))
+        self.conn.execute(self.statement, batch)
+        self.rows += len(batch)
+        self.batches += 1
+
+    def _insert_checked(self, batch: list):
+        # Batch larger than accepted before can exceed limits of database, savepoint keeps transaction usable
+        if self.adaptive is None or len(batch) <= self.adaptive.safe or self.conn.dialect.name == "sqlite":
+            self.insert(batch)
+            return
+        try:
+            with self.conn.begin_nested():
+                self.insert(batch)
+            self.adaptive.safe = len(batch)
+        except DBAPIError as e:
+            if not is_limit_error(e) or len(batch) <= MIN_BATCH_SIZE:
+                raise
+            self.adaptive.rejected(len(batch))
+            half = len(batch) // 2
+            self._insert_checked(batch[:half])
+            self._insert_checked(batch[half:])
+
+    def _reconnect(self):
+        if self.conn is not self._origin:
+            self.conn.close()
+        self.conn = self._origin.engine.connect()
+
+    def close(self):
+        """Close connection opened by writer for retries"""
+        if self.conn is not self._origin:
+            self.conn.close()
+            self.conn = self._origin
+
+    def _commit_batch(self, batch: list):
+        attempt = 0
+        while True:
+            try:
+                with self.conn.begin():
+                    self._insert_checked(batch)
+                return
+            except DBAPIError as e:
+                if not self.retry_policy.should_retry(e, self.conn.dialect.name, attempt):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                logging.warning("Batch failed by transient error, retry in {:.1f} s: {}".format(delay, e.orig))
+                time.sleep(delay)
+                attempt += 1
+                self.retries += 1
+                self._reconnect()
+
+    def write_batch(self, batch: list):
+        start = time.perf_counter()
+        throttled = self.throttled
+        if self.settings.transaction == TransactionMode.CHUNK:
+            self._commit_batch(batch)
+        else:
+            self._insert_checked(batch)
+        if self.adaptive is not None:
+            self.adaptive.record(len(batch), time.perf_counter() - start - self.throttled + throttled)
+
+    def resized(self, batches: Iterable[list]) -> Iterable[list]:
+        if self.adaptive is None:
+            return batches
+        return self.adaptive.rebatch(batches)
+
+    def write(self, batches: Iterable[list]):
+        batches = self.resized(batches)
+        if self.settings.transaction == TransactionMode.CHUNK:
+            try:
+                for batch in batches:
+                    self.write_batch(batch)
+            finally:
+                self.close()
+        else:
+            with self.conn.begin():
+                for batch in batches:
+                    self.write_batch(batch)
+
+    def statistics(self) -> dict:
+        statistics = {"rows": self.rows, "batches": self.batches, "retries": self.retries}
+        if self.adaptive is not None:
+            statistics["batch_sizes"] = self.adaptive.sizes
+        if self.throttle is not None:
+            statistics["throttled_seconds"] = round(self.throttled, 3)
+        return statistics
+
+
+class MultiTableWriter:
+    """Dispatch batches of one source to several tables using one connection.
+
+    Every batch is filtered and projected by targets and inserted by ``BatchWriter`` of each table.
+    With ``convert`` batches contain raw rows, which are converted by targets after filtering.
+    In ``TransactionMode.FILE`` all tables are filled in one transaction,
+    in ``TransactionMode.CHUNK`` rows of every source batch are committed to all tables together.
+    Batches aren't resized and failed batches aren't retried: part of batch would be committed to other tables.
+    """
+
+    def __init__(self, conn, targets: List[Tuple[TargetPlan, Table]], settings: LoadSettings,
+                 throttle: Optional[Throttle] = None, constants: Optional[dict] = None, convert: bool = False):
+        self.conn = conn
+        self.settings = settings
+        self.constants = constants or {}
+        self.convert = convert
+        table_settings = dataclasses.replace(settings, transaction=TransactionMode.FILE, adaptive_batch=False)
+        self.targets = [(target, BatchWriter(conn, table, table_settings, throttle)) for target, table in targets]
+
+    def write_batch(self, batch: list):
+        for target, writer in self.targets:
+            rows = target.select(batch, self.convert)
+            if len(rows) > 0:
+                for row in rows:
+                    row.update(self.constants)
+                writer.write_batch(rows)
+
+    def write(self, batches: Iterable[list]):
+        if self.settings.transaction == TransactionMode.CHUNK:
+            for batch in batches:
+                with self.conn.begin():
+                    self.write_batch(batch)
+        else:
+            with self.conn.begin():
+                for batch in batches:
+                    self.write_batch(batch)
+
+    def statistics(self) -> dict:
+        writers = [writer for target, writer in self.targets]
+        statistics = {
+            "rows": sum(writer.rows for writer in writers),
+            "batches": sum(writer.batches for writer in writers),
+            "tables": {},
+        }
+        for target, writer in self.targets:
+            tables = statistics["tables"]
+            tables[target.table] = tables.get(target.table, 0) + writer.rows
+        if any(writer.throttle is not None for writer in writers):
+            statistics["throttled_seconds"] = round(sum(writer.throttled for writer in writers), 3)
+        return statistics
+
+
+class ParallelWriter:
+    """Fan out batches of one file to several connections from the engine pool.
+
+    Every writer thread opens own connection. In ``TransactionMode.FILE`` writers hold own transactions
+    and commit them only after all batches were inserted by all writers, otherwise transactions are rolled back
+    (commit of several connections isn't atomic, failure between commits leaves part of the file).
+    In ``TransactionMode.CHUNK`` every batch is committed by its writer separately.
+    Order of inserted rows isn't preserved.
+    """
+
+    def __init__(self, engine: Engine, table: Table, settings: LoadSettings, writers: Optional[int] = None,
+                 throttle: Optional[Throttle] = None):
+        self.engine = engine
+        self.table = table
+        self.settings = settings
+        self.throttle = throttle
+        self.writers_number = writers if writers is not None else settings.writers
+        self.writers = []
+        self._lock = threading.Lock()
+        self._commit = False
+        self._barrier = None
+
+    def _consume(self, queue: BoundedQueue):
+        try:
+            self._write(queue)
+        except BaseException:
+            self._barrier.abort()  # Release other writers waiting for commit
+            raise
+
+    def _write(self, queue: BoundedQueue):
+        with self.engine.connect() as conn:
+            writer = BatchWriter(conn, self.table, self.settings, self.throttle)
+            with self._lock:
+                self.writers.append(writer)
+            batches = writer.resized(batch for batch, size in queue)
+            if self.settings.transaction == TransactionMode.CHUNK:
+                try:
+                    for batch in batches:
+                        writer.write_batch(batch)
+                finally:
+                    writer.close()
+                return
+
+            transaction = conn.begin()
+            try:
+                for batch in batches:
+                    writer.write_batch(batch)
+            except BaseException:
+                transaction.rollback()
+                raise
+            try:
+                self._barrier.wait()  # Wait other writers
+            except threading.BrokenBarrierError:
+                transaction.rollback()
+                return
+            if self._commit:
+                transaction.commit()
+            else:
+                transaction.rollback()
+
+    def write(self, batches: Iterable[list]):
+        queue = BoundedQueue(max(self.settings.queue_rows // 2, 1), max(self.settings.queue_bytes // 2, 1))
+
+        def decide():
+            self._commit = queue.error is None
+
+        self._barrier = threading.Barrier(self.writers_number + 1, action=decide)
+        threads = [stage_thread(self._consume, [queue], queue) for _ in range(self.writers_number)]
+        for thread in threads:
+            thread.start()
+        try:
+            for batch in batches:
+                queue.put(batch)
+            queue.close()
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            queue.abort(e)
+
+        if self.settings.transaction == TransactionMode.FILE:
+            try:
+                self._barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+        for thread in threads:
+            thread.join()
+        if queue.error is not None:
+            raise queue.error
+
+    def statistics(self) -> dict:
+        statistics = {
+            "rows": sum(writer.rows for writer in self.writers),
+            "batches": sum(writer.batches for writer in self.writers),
+            "retries": sum(writer.retries for writer in self.writers),
+            "writers": self.writers_number,
+        }
+        if self.settings.adaptive_batch:
+            statistics["batch_sizes"] = [writer.adaptive.sizes for writer in self.writers]
+        if self.throttle is not None:
+            statistics["throttled_seconds"] = round(sum(writer.throttled for writer in self.writers), 3)
+        return statistics
@@ -45,6 +45,11 @@ setuptools.setup(
         "json_schema_for_humans",
         "PySide2",
         "qt-material"
-    ]
+    ],
+    extras_require={
+        "zstd": ["zstandard"],
+        "arrow": ["pyarrow"],
+        "json": ["orjson"],
+    }
     # test_suite='tests'
 )
@@ -0,0 +1,102 @@
+import gzip
+import pathlib
+import tempfile
+import unittest
+from unittest import TestCase
+
+from sdp.check import check_files, check_source
+from sdp.description import Description
+from sdp.source_readers import SourceReader
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ModuleNotFoundError:
+    pyarrow = None
+
+
+class CheckTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.description = Description({
+            "table": "test", "format": "CSV", "parser_settings": {"CSV": {"header": True}},
+            "columns": [
+                {"name": "id", "type": "integer"},
+                {"name": "value", "type": "float"},
+                {"name": "time", "type": "datetime"},
+            ]
+        }, Description.load_scheme())
+        rows = ["id,value,time"] + ["{},{}.5,2021-01-01T00:00:{:02d}".format(i, i, i % 60) for i in range(100)]
+        self.good = self.write("good.csv", rows)
+        rows[11] = "ten,10.5,2021-01-01T00:00:10"
+        rows[21] = "20,x,yesterday"
+        self.bad = self.write("bad.csv", rows)
+        with gzip.open(str(self.path("good.csv.gz")), "wt") as fout:
+            fout.write(self.good.read_text())
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def path(self, name):
+        return pathlib.Path(self.tempdir.name) / name
+
+    def write(self, name, rows):
+        path = self.path(name)
+        path.write_text("\n".join(rows) + "\n")
+        return path
+
+    def test_errors(self):
+        reader = SourceReader.get_reader(self.description.compile())
+        result = check_source(reader, self.good)
+        self.assertTrue(result.success)
+        self.assertEqual(result.records, 100)
+
+        result = check_source(reader, self.bad)
+        self.assertFalse(result.success)
+        self.assertEqual(result.records, 100)
+        self.assertEqual([(error.record, error.line, error.column, error.value) for error in result.errors],
+                         [(11, 12, "id", "ten"), (21, 22, "value", "x"), (21, 22, "time", "yesterday")])
+        self.assertIn("line 12, column id", result.to_string())
+
+        result = check_source(reader, self.bad, max_errors=1)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.error_count, 3)
+
+    def test_line_numbers(self):
+        self.description["parser_settings"]["CSV"]["skipinitialrow"] = 1
+        rows = ["# comment", "id,value,time", "skipped", "1,1.5,2021-01-01T00:00:01", "# comment",
+                "x,2.5,2021-01-01T00:00:02"]
+        reader = SourceReader.get_reader(self.description.compile())
+        result = check_source(reader, self.write("lines.csv", rows))
+        self.assertEqual(result.records, 2)
+        self.assertEqual([(error.record, error.line) for error in result.errors], [(2, 6)])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow isn't installed")
+    def test_columnar(self):
+        path = self.path("bad.parquet")
+        pyarrow.parquet.write_table(pyarrow.table({"id": list(range(10)), "value": ["1.5"] * 9 + ["x"],
+                                                   "time": ["2021-01-01T00:00:00"] * 10}), path)
+        self.description.data["format"] = "PARQUET"
+        result = check_source(SourceReader.get_reader(self.description.compile()), path)
+        self.assertEqual([(error.record, error.line, error.column) for error in result.errors], [(1, None, "value")])
+        self.assertIn("record 1, column value: ", result.to_string())
+        self.assertIn("(records 1-10)", result.to_string())
+
+    def test_missing_file(self):
+        reader = SourceReader.get_reader(self.description.compile())
+        result = check_source(reader, self.path("missing.csv"))
+        self.assertFalse(result.success)
+        self.assertIn("FileNotFoundError", result.exception)
+
+    def test_parallel(self):
+        paths = [self.good, self.bad, self.path("good.csv.gz")]
+        results = list(check_files(self.description, paths, workers=2))
+        self.assertEqual([result.path for result in results], [str(path) for path in paths])
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertEqual(results[1].error_count, 3)
+        self.assertEqual(results[2].records, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import datetime
+import os
+import pathlib
+import random
+import statistics
+import subprocess
+import sys
+from unittest import TestCase
+
+from sqlalchemy import Column, Float, Integer, String, Table, select
+
+from sdp.column_stats import ColumnStatistics, HyperLogLog, hash64, statistics_table
+from sdp.description import Description
+from sdp.file_status import LoadStatus
+from sdp.load_settings import LoadSettings
+from sdp.tail import TailStore
+from test_writers import SQLiteTestCase
+
+
+class HyperLogLogTest(TestCase):
+
+    def test_estimate(self):
+        for count in (0, 10, 1000, 200000):
+            hll = HyperLogLog()
+            hll.update(range(count))
+            hll.update(range(count // 2))  # Repeated values
+            self.assertLessEqual(abs(hll.estimate() - count), max(count * 0.05, 1), count)
+
+    def test_merge(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update("a{}".format(i) for i in range(5000))
+        second.update("a{}".format(i) for i in range(2500, 7500))
+        first.merge(second)
+        self.assertLessEqual(abs(first.estimate() - 7500), 7500 * 0.05)
+
+    def test_stable_hash(self):
+        self.assertNotEqual(hash64(-1), hash64(-2))
+        code = "from sdp.column_stats import hash64; print(hash64('run 1'))"
+        values = set()
+        for seed in ("1", "2"):
+            env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=os.pathsep.join(sys.path))
+            values.add(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                                      check=True).stdout.strip())
+        self.assertEqual(values, {str(hash64("run 1"))})
+
+
+class ColumnStatisticsTest(TestCase):
+
+    def test_numeric(self):
+        rng = random.Random(1)
+        values = [rng.gauss(100, 15) for _ in range(10000)]
+        column = ColumnStatistics("value", numeric=True)
+        for i in range(0, len(values), 333):
+            column.update(values[i: i + 333] + [None])
+        result = column.result()
+        self.assertEqual(result["count"], 10000)
+        self.assertEqual(result["nulls"], 31)
+        self.assertEqual((result["min"], result["max"]), (min(values), max(values)))
+        self.assertAlmostEqual(result["mean"], statistics.mean(values), places=9)
+        self.assertAlmostEqual(result["variance"], statistics.variance(values), places=6)
+
+    def test_strings(self):
+        column = ColumnStatistics("name", numeric=False)
+        column.update(["b", "a", None, "c", "a"])
+        self.assertEqual(column.result(), {"count": 4, "nulls": 1, "min": "a", "max": "c", "distinct": 3})
+
+    def test_mixed_datetimes(self):
+        column = ColumnStatistics("time", numeric=False)
+        naive = datetime.datetime(2021, 1, 1, 12)
+        aware = datetime.datetime(2021, 1, 1, 13, tzinfo=datetime.timezone(datetime.timedelta(hours=3)))
+        column.update([naive, aware])
+        column.update([datetime.datetime(2021, 1, 1, 11)])
+        self.assertEqual((column.result()["min"], column.result()["max"]), (aware, naive))
+
+        column = ColumnStatistics("value", numeric=False)
+        column.update(["a", 1])  # Values which can't be compared don't fail load
+        self.assertEqual(column.result()["count"], 2)
+        self.assertIsNone(column.result()["min"])
+
+
+class LoadStatisticsTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(LoadStatisticsTest, self).setUp()
+        Table("runs", self.metadata, Column("id", Integer), Column("energy", Float), Column("note", String(8)))
+        self.metadata.create_all(self.database.engine)
+        self.database.load_settings = LoadSettings(statistics_table="sdp_column_statistics", batch_size=10)
+        self.description = Description({
+            "table": "runs", "format": "CSV",
+            "columns": [{"name": "id", "type": "integer"}, {"name": "energy", "type": "float"},
+                        {"name": "note", "type": "string"}]
+        }, Description.load_scheme())
+        self.path = pathlib.Path(self.tempdir.name) / "runs.csv"
+        self.path.write_text("".join("{},{},n{}\n".format(i, i / 2, i % 3) for i in range(100)))
+
+    def stored_rows(self):
+        table = statistics_table("sdp_column_statistics")
+        with self.database.engine.connect() as conn:
+            rows = conn.execute(select([table.c.column_name, table.c.max_value, table.c.distinct_estimate])
+                                .order_by(table.c.loaded_at, table.c.column_name)).fetchall()
+        return [tuple(row) for row in rows]
+
+    def test_load(self):
+        path = self.path
+        result = self.database.load_data(self.description, path)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(path))
+        columns = result.statistics["column_statistics"]
+        self.assertEqual((columns["id"]["min"], columns["id"]["max"], columns["id"]["distinct"]), (0, 99, 100))
+        self.assertAlmostEqual(columns["energy"]["mean"], 24.75)
+        self.assertEqual(columns["note"]["distinct"], 3)
+
+        self.assertEqual(self.stored_rows(), [("energy", "49.5", 100), ("id", "99", 100), ("note", "n2", 3)])
+
+    def test_incremental(self):
+        tail = TailStore(pathlib.Path(self.tempdir.name) / "tail.json")
+        result = self.database.load_data(self.description, self.path, tail=tail)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(self.path))
+        with open(self.path, "a") as fout:
+            fout.write("100,50.0,n9\n")
+        result = self.database.load_data(self.description, self.path, tail=tail)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(self.path))
+        self.assertEqual(self.stored_rows()[3:], [("energy", "50.0", 1), ("id", "100", 1), ("note", "n9", 1)])
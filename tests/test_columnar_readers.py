@@ -0,0 +1,79 @@
+import datetime
+import pathlib
+import tempfile
+import unittest
+from unittest import TestCase
+
+from sdp.description import Description
+from sdp.source_readers import SourceReader
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ModuleNotFoundError:
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow isn't installed")
+class ColumnarReaderTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.tempdir.name)
+        self.table = pyarrow.table({
+            "id": pyarrow.array(range(100), pyarrow.int32()),
+            "value": [i * 0.5 for i in range(100)],
+            "time": ["2021-01-01T00:00:{:02d}".format(i % 60) for i in range(100)],
+            "unused": ["x"] * 100,
+        })
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def description(self, format_):
+        return Description({"table": "test", "format": format_, "columns": [
+            {"name": "number", "source": "id", "type": "integer"},
+            {"name": "value", "type": "float"},
+            {"name": "time", "type": "datetime"},
+        ]}, Description.load_scheme())
+
+    def check(self, reader, path):
+        with open(path, "rb") as fin:
+            batches = list(reader.parse_batches(fin, 30))
+        self.assertEqual([len(batch) for batch in batches], [30, 30, 30, 10])
+        self.assertEqual(batches[0][1], {"number": 1, "value": 0.5, "time": datetime.datetime(2021, 1, 1, 0, 0, 1)})
+
+    def test_parquet(self):
+        path = self.root / "test.parquet"
+        pyarrow.parquet.write_table(self.table, path, row_group_size=40)
+        self.check(SourceReader.get_reader(self.description("PARQUET")), path)
+
+    def write_arrow(self):
+        path = self.root / "test.arrow"
+        with pyarrow.OSFile(str(path), "wb") as sink:
+            with pyarrow.ipc.new_file(sink, self.table.schema) as writer:
+                writer.write_table(self.table)
+        return path
+
+    def test_arrow(self):
+        path = self.write_arrow()
+        self.check(SourceReader.get_reader(self.description("ARROW")), path)
+
+    def test_missing_column(self):
+        parquet = self.root / "test.parquet"
+        pyarrow.parquet.write_table(self.table, parquet)
+        for format_, path in (("PARQUET", parquet), ("ARROW", self.write_arrow())):
+            description = self.description(format_)
+            description.data["columns"][1]["name"] = "typo"
+            with open(path, "rb") as fin:
+                with self.assertRaisesRegex(Exception, "Columns typo don't exist in file"):
+                    list(SourceReader.get_reader(description).parse_batches(fin, 30))
+
+    def test_abstract(self):
+        from sdp.columnar_readers import ColumnarReader
+
+        class IncompleteReader(ColumnarReader):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteReader(self.description("PARQUET"))
@@ -0,0 +1,41 @@
+import bz2
+import gzip
+import lzma
+import pathlib
+import tempfile
+from unittest import TestCase
+
+from sdp.compression import detect_compression, open_source
+
+
+class CompressionTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.tempdir.name)
+        self.text = "".join("{},value {}\n".format(i, i) for i in range(100000))
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def check(self, name, open_function, compression):
+        path = self.root / name
+        with open_function(path, "wt") as fout:
+            fout.write(self.text)
+        self.assertEqual(detect_compression(path), compression)
+        for threaded in (True, False):
+            with open_source(path, threaded=threaded) as fin:
+                self.assertEqual(fin.read(), self.text)
+
+    def test_gzip(self):
+        self.check("data.csv.gz", gzip.open, "gzip")
+
+    def test_xz(self):
+        self.check("data.xml.xz", lzma.open, "xz")
+
+    def test_magic_bytes(self):
+        # Extension isn't used when magic bytes are found
+        self.check("data.csv", bz2.open, "bz2")
+
+    def test_plain(self):
+        self.check("data.csv", open, None)
@@ -0,0 +1,76 @@
+import datetime
+import unittest
+from unittest import TestCase
+
+from sdp.datetime_parsing import compile_format, create_parser, parse_many
+from sdp.description import Description
+from sdp.description_typing import DEFAULT_PEEKER
+
+try:
+    import pyarrow
+except ModuleNotFoundError:
+    pyarrow = None
+
+TIME = datetime.datetime(2021, 3, 4, 5, 6, 7)
+
+
+def column(flavour, date_format=None):
+    data = {"name": "time", "type": "datetime", "type_properties": {"datetime_flavour": flavour}}
+    if date_format is not None:
+        data["type_properties"]["datetime_format"] = date_format
+    description = Description({"table": "test", "format": "CSV", "columns": [data]}, Description.load_scheme())
+    return description["columns"][0]
+
+
+class DatetimeParsingTest(TestCase):
+
+    def test_flavours(self):
+        self.assertEqual(create_parser("iso")("2021-03-04T05:06:07"), TIME)
+        self.assertEqual(create_parser("iso"), datetime.datetime.fromisoformat)  # Without Python wrapper
+        self.assertEqual(create_parser("sql")("2021-03-04 05:06:07"), TIME)
+        self.assertEqual(create_parser("unixtime")("1614834367.5"), TIME.replace(microsecond=500000))
+        self.assertEqual(create_parser("unixtime")(1614834367), TIME)
+        with self.assertRaises(ValueError):
+            create_parser("custom")
+
+    def test_custom(self):
+        parse = compile_format("%d.%m.%Y %H:%M:%S")
+        self.assertEqual(parse("04.03.2021 05:06:07"), TIME)
+        self.assertEqual(parse("04.03.2021 23:59:59"), datetime.datetime(2021, 3, 4, 23, 59, 59))
+        with self.assertRaises(ValueError):
+            parse("04/03/2021 05:06:07")
+        self.assertEqual(parse("4.3.2021 5:06:07"), TIME)  # Not padded values are parsed by strptime
+        self.assertEqual(compile_format("%Y%m%d%H%M")("202103040506"), TIME.replace(second=0))
+        self.assertEqual(compile_format("%Y-%m-%d %H:%M:%S.%f")("2021-03-04 05:06:07.25"),
+                         TIME.replace(microsecond=250000))
+        self.assertEqual(compile_format("%d %b %Y")("04 Mar 2021"), datetime.datetime(2021, 3, 4))  # strptime
+
+    def test_custom_separators(self):
+        parse = compile_format("%d.%m.%Y %H:%M:%S")
+        parse("04.03.2021 05:06:07")  # Date prefix is cached
+        for value in ("04.03.2021X05:06:07", "04.03.2021 05-06-07"):
+            with self.assertRaises(ValueError):
+                parse(value)
+        parse = compile_format("%Y%m%d %H.%M.%S")
+        self.assertEqual(parse("20210304 05.06.07"), TIME)
+        with self.assertRaises(ValueError):
+            parse("20210304 05x06x07")
+        parse = compile_format("%Y-%m-%d %H:%M:%S.%f")
+        for value in ("2021-03-04 05:06:07.25Z", "2021-03-04 05:06:07.1234567"):
+            with self.assertRaises(ValueError):
+                parse(value)
+
+    def test_peeker(self):
+        type_ = DEFAULT_PEEKER.peek_from_column(column("custom", "%d.%m.%Y %H:%M:%S"))
+        self.assertEqual(type_.convert_many(["04.03.2021 05:06:07", None]), [TIME, None])
+        self.assertEqual(DEFAULT_PEEKER.peek_from_column(column("unixtime"))("1614834367"), TIME)
+        self.assertEqual(parse_many(DEFAULT_PEEKER.peek_from_column(column("sql")), ["2021-03-04 05:06:07"]), [TIME])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow isn't installed")
+    def test_arrow(self):
+        from sdp.columnar_readers import arrow_datetime
+        unixtime = DEFAULT_PEEKER.peek_from_column(column("unixtime"))
+        self.assertEqual(arrow_datetime(pyarrow, pyarrow.array([1614834367.5]), unixtime).to_pylist(),
+                         [TIME.replace(microsecond=500000)])
+        custom = DEFAULT_PEEKER.peek_from_column(column("custom", "%d.%m.%Y %H:%M:%S"))
+        self.assertEqual(arrow_datetime(pyarrow, pyarrow.array(["04.03.2021 05:06:07"]), custom).to_pylist(), [TIME])
@@ -0,0 +1,56 @@
+import unittest
+from unittest import TestCase, mock
+
+from sqlalchemy import DateTime, Integer, String
+
+from sdp.description import Description
+from sdp.description_typing import (ConverterRegistry, ListTypePeeker, PrimitiveTypePeeker, DatetimePeeker,
+                                    freeze)
+
+
+class ConverterRegistryTest(TestCase):
+
+    def setUp(self) -> None:
+        self.registry = ConverterRegistry(ListTypePeeker(PrimitiveTypePeeker(), DatetimePeeker()))
+
+    def test_cached(self):
+        string = self.registry.peek("string", {"length": 10})
+        self.assertIs(self.registry.peek("string", {"length": 10}), string)
+        self.assertIsNot(self.registry.peek("string", {"length": 20}), string)
+        custom = self.registry.peek("datetime", {"datetime_flavour": "custom", "datetime_format": "%Y%m%d"})
+        self.assertIs(self.registry.peek("datetime", {"datetime_format": "%Y%m%d", "datetime_flavour": "custom"}),
+                      custom)
+        self.assertIsNone(self.registry.peek("unknown"))
+
+    def test_descriptions(self):
+        plans = [Description.load("data/detector_.json").compile(self.registry) for _ in range(2)]
+        for first, second in zip(plans[0].columns, plans[1].columns):
+            self.assertIs(first.type, second.type)
+
+    def test_is_target(self):
+        integer = self.registry.peek("integer")
+        with mock.patch.object(integer, "is_target", wraps=integer.is_target) as is_target:
+            self.assertTrue(self.registry.is_target(integer, Integer()))
+            self.assertTrue(self.registry.is_target(integer, Integer()))
+            self.assertFalse(self.registry.is_target(integer, DateTime()))
+            self.assertEqual(is_target.call_count, 2)
+        self.assertTrue(self.registry.is_target(self.registry.peek("string"), String(10)))
+
+    def test_freeze(self):
+        self.assertEqual(freeze({"b": [1, {"c": 2}], "a": None}), (("a", None), ("b", (1, (("c", 2),)))))
+        with self.assertRaises(TypeError):
+            freeze({"a": {1, 2}})
+
+    def test_register(self):
+        self.registry.peek("integer")
+        peeker = mock.Mock()
+        peeker.peek.return_value = None
+        self.registry.register(peeker)
+        self.registry.peek("integer")
+        peeker.peek.assert_not_called()  # Builtin peekers go first
+        self.registry.peek("custom")
+        peeker.peek.assert_called_once_with("custom", None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import datetime
+import gzip
+import pathlib
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, Table, insert, select
+
+from sdp.description import Description
+from sdp.description_typing import DEFAULT_PEEKER
+from sdp.dump import dump_table
+from sdp.file_status import LoadStatus
+from test_writers import SQLiteTestCase
+
+TIME = datetime.datetime(2021, 3, 4, 5, 6, 7)
+
+
+class DumpTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(DumpTest, self).setUp()
+        self.runs = Table("runs", self.metadata, Column("id", Integer), Column("energy", Float),
+                          Column("note", String(32)), Column("start", DateTime))
+        self.metadata.create_all(self.database.engine)
+        self.rows = [{"id": i, "energy": i + 0.25, "note": "run, \"{}\"".format(i) if i % 5 else None,
+                      "start": TIME + datetime.timedelta(minutes=i)} for i in range(100)]
+        with self.database.engine.connect() as conn:
+            conn.execute(insert(self.runs), self.rows)
+        self.description = Description({
+            "table": "runs", "format": "CSV", "parser_settings": {"CSV": {"header": True, "delimiter": ";"}},
+            "columns": [
+                {"name": "id", "type": "integer"},
+                {"name": "energy", "type": "float"},
+                {"name": "note", "type": "string"},
+                {"name": "start", "type": "datetime",
+                 "type_properties": {"datetime_flavour": "custom", "datetime_format": "%d.%m.%Y %H:%M:%S"}},
+            ]
+        }, Description.load_scheme())
+
+    def select_rows(self):
+        with self.database.engine.connect() as conn:
+            result = conn.execute(select([self.runs]).order_by(self.runs.c.id))
+            return [dict(zip(result.keys(), row)) for row in result]
+
+    def test_dump(self):
+        path = pathlib.Path(self.tempdir.name) / "runs.csv.gz"
+        statistics = dump_table(self.database, self.description, path, batch_size=30)
+        self.assertEqual(statistics["rows"], 100)
+        self.assertEqual(statistics["method"], "cursor")
+        with gzip.open(str(path), "rt") as fin:
+            lines = fin.read().splitlines()
+        self.assertEqual(lines[0], "id;energy;note;start")
+        self.assertEqual(lines[2], "1;1.25;\"run, \"\"1\"\"\";04.03.2021 05:07:07")
+        self.assertEqual(len(lines), 101)
+
+        with self.database.engine.connect() as conn:
+            conn.execute(self.runs.delete())
+        result = self.database.load_data(self.description, path)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(path))
+        self.assertEqual(self.select_rows(), [dict(row, note=row["note"] or "") for row in self.rows])
+
+    def test_nulls(self):
+        self.description.data["parser_settings"]["CSV"]["null"] = "\\N"
+        with self.database.engine.connect() as conn:
+            conn.execute(self.runs.update().where(self.runs.c.id % 7 == 0).values(energy=None, start=None))
+        expected = self.select_rows()
+        path = pathlib.Path(self.tempdir.name) / "runs.csv"
+        dump_table(self.database, self.description, path)
+        self.assertEqual(path.read_text().splitlines()[1], "0;\\N;\\N;\\N")
+
+        with self.database.engine.connect() as conn:
+            conn.execute(self.runs.delete())
+        result = self.database.load_data(self.description, path)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(path))
+        self.assertEqual(self.select_rows(), expected)
+
+    def test_other_format(self):
+        self.description.data["format"] = "XML"
+        del self.description.data["parser_settings"]
+        path = pathlib.Path(self.tempdir.name) / "runs.csv"
+        self.assertEqual(dump_table(self.database, self.description.compile(), path)["rows"], 100)
+        self.assertEqual(path.read_text().splitlines()[1], "1,1.25,\"run, \"\"1\"\"\",04.03.2021 05:07:07")
+
+    def test_format_value(self):
+        for properties, text in (({"datetime_flavour": "iso"}, "2021-03-04T05:06:07"),
+                                 ({"datetime_flavour": "sql"}, "2021-03-04 05:06:07"),
+                                 ({"datetime_flavour": "unixtime"}, "1614834367.0"),
+                                 ({"datetime_flavour": "custom", "datetime_format": "%Y%m%d%H%M%S"},
+                                  "20210304050607")):
+            type_ = DEFAULT_PEEKER.peek("datetime", properties)
+            self.assertEqual(type_.format_value(TIME), text)
+            self.assertEqual(type_(type_.format_value(TIME)), TIME)
+        boolean = DEFAULT_PEEKER.peek("boolean")
+        self.assertEqual([boolean(boolean.format_value(value)) for value in (True, False)], [True, False])
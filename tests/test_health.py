@@ -0,0 +1,46 @@
+import time
+from unittest import TestCase
+
+from sdp.database import DatabaseSettings, Drivers
+from sdp.health import HealthMonitor
+from test_writers import SQLiteTestCase
+
+
+class HealthMonitorTest(TestCase):
+
+    def setUp(self) -> None:
+        self.checks = 0
+
+    def check(self):
+        self.checks += 1
+        return self.checks
+
+    def test_ttl(self):
+        health = HealthMonitor(self.check, ttl=0.2)
+        self.assertEqual(health.status(), 1)
+        self.assertEqual(health.status(), 1)
+        health.invalidate()
+        self.assertEqual(health.status(), 2)
+        time.sleep(0.25)
+        self.assertEqual(health.status(), 3)
+
+    def test_heartbeat(self):
+        health = HealthMonitor(self.check, ttl=0.2)
+        health.start()
+        time.sleep(0.35)
+        health.stop()
+        self.assertGreaterEqual(self.checks, 2)
+        self.assertEqual(health.status(), self.checks)
+
+
+class DatabaseSettingsTest(SQLiteTestCase):
+
+    def test_url(self):
+        settings = DatabaseSettings(pool_size=20, statement_timeout=1000)
+        self.assertNotIn("pool", str(settings.to_url()))
+        self.assertEqual(settings.engine_args()["pool_size"], 20)
+        self.assertNotIn("pool_size", DatabaseSettings(driver=Drivers.SQLITE).engine_args())
+
+    def test_connection_status(self):
+        self.assertTrue(self.database.connection_status().success)
+        self.assertIs(self.database.connection_status(), self.database.connection_status())
@@ -0,0 +1,71 @@
+import gzip
+import pathlib
+import tempfile
+import unittest
+from unittest import TestCase
+
+from sdp.check import check_source
+from sdp.description import Description
+from sdp.infer import infer_description, infer_type, sample_lines
+from sdp.source_readers import SourceReader
+
+ROWS = ["Run ID;Energy;Start time;Detector;Code;Finished"] + [
+    "{};{}.25;{:02d}.03.2021 10:00:00;det {};0{};{}".format(
+        i, i, i % 28 + 1, "x" * (i % 20), i % 10, "2021-03-04 05:06:07" if i % 3 else "")
+    for i in range(5000)
+]
+
+
+class InferTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tempdir.name) / "runs.csv"
+        self.path.write_text("\n".join(ROWS) + "\n")
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_types(self):
+        self.assertEqual(infer_type(["1", "-2"]), {"type": "integer"})
+        self.assertEqual(infer_type(["1", ""]), {"type": "string", "type_properties": {"length": 8}})
+        self.assertEqual(infer_type(["1", "2.5"]), {"type": "float"})
+        self.assertEqual(infer_type(["01", "2"]), {"type": "string", "type_properties": {"length": 8}})
+        self.assertEqual(infer_type(["2021-03-04T05:06:07"])["type_properties"], {"datetime_flavour": "iso"})
+        self.assertEqual(infer_type(["04/03/2021"])["type_properties"],
+                         {"datetime_flavour": "custom", "datetime_format": "%d/%m/%Y"})
+        self.assertEqual(infer_type(["x" * 20]), {"type": "string", "type_properties": {"length": 32}})
+
+    def test_sample(self):
+        head, sampled = sample_lines(self.path, head=100, size=100)
+        self.assertEqual(head, [row + "\n" for row in ROWS[:100]])
+        self.assertGreater(len(sampled), 50)
+        self.assertTrue(set(sampled) <= {row + "\n" for row in ROWS[100:]})
+
+        compressed = self.path.with_suffix(".csv.gz")
+        with gzip.open(str(compressed), "wt") as fout:
+            fout.write(self.path.read_text())
+        head, sampled = sample_lines(compressed, head=100, size=100)
+        self.assertEqual(len(head), 100)
+        self.assertEqual(len(sampled), 100)
+
+    def test_infer(self):
+        inference = infer_description(self.path, head=200, size=200)
+        description = inference.description
+        self.assertEqual(description["table"], "runs")
+        self.assertEqual(description["parser_settings"], {"CSV": {"delimiter": ";", "header": True}})
+        self.assertEqual([(column["name"], column["type"]) for column in description["columns"]], [
+            ("run_id", "integer"), ("energy", "float"), ("start_time", "datetime"), ("detector", "string"),
+            ("code", "string"), ("finished", "string"),
+        ])
+        self.assertEqual(description["columns"][2]["type_properties"]["datetime_format"], "%d.%m.%Y %H:%M:%S")
+        self.assertIn("detector VARCHAR(32)", inference.ddl("postgresql"))
+
+        reader = SourceReader.get_reader(Description(description, Description.load_scheme()).compile())
+        result = check_source(reader, self.path)
+        self.assertTrue(result.success, result.to_string())
+        self.assertEqual(result.records, 5000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest import TestCase
+
+from sdp.description import Description
+from sdp.load_plan import LoadPlan
+from sdp.source_readers import CSVReader
+
+
+class LoadPlanTest(TestCase):
+
+    def setUp(self) -> None:
+        self.description = Description.load("data/detector_.json")
+        self.plan = self.description.compile()
+
+    def test_defaults(self):
+        self.assertIsInstance(self.plan, LoadPlan)
+        self.assertEqual(self.plan.table, "detector_")
+        self.assertEqual(self.plan.format, "CSV")
+        self.assertEqual(self.plan.ordered, self.description["ordered"])
+        self.assertEqual(self.plan.settings["delimiter"], self.description["parser_settings"]["CSV"]["delimiter"])
+        self.assertEqual(self.plan.column_names(), ["detector_name", "description"])
+        column = self.plan.columns[0]
+        self.assertIsNone(column.source)
+        self.assertEqual(column.type_name, "string")
+        self.assertEqual(column.type_properties["length"], 10)
+        self.assertEqual(column.type("value"), "value")
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.plan.table = "other"
+        with self.assertRaises(AttributeError):
+            self.plan.columns[0].name = "other"
+        with self.assertRaises(TypeError):
+            self.plan.settings["delimiter"] = ";"
+        with self.assertRaises(TypeError):
+            self.plan.columns[0].type_properties["length"] = 1
+        self.assertFalse(hasattr(self.plan, "__dict__"))
+
+    def test_reader(self):
+        with open("data/detector_.csv") as fin:
+            expected = list(CSVReader(self.description).parse_source(fin))
+        with open("data/detector_.csv") as fin:
+            rows = list(CSVReader(self.plan).parse_source(fin))
+        self.assertEqual(rows, expected)
+        self.assertGreater(len(rows), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
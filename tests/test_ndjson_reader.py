@@ -0,0 +1,69 @@
+import datetime
+import mmap
+import tempfile
+from unittest import TestCase
+
+from sdp.description import Description
+from sdp.source_readers import SourceReader
+
+NDJSON_DATA = "".join(
+    '{{"id": {0}, "run": {{"energy": {0}.5, "channels": [{0}, 7]}}, "time": "2021-01-01T00:00:{1:02d}",'
+    ' "note": {2}}}\n\n'.format(i, i % 60, "null" if i % 2 else '"x"')
+    for i in range(100)
+)
+
+
+class NDJSONReaderTest(TestCase):
+
+    def setUp(self) -> None:
+        self.file = tempfile.NamedTemporaryFile("w", suffix=".ndjson")
+        self.file.write(NDJSON_DATA)
+        self.file.flush()
+        self.description = Description({
+            "table": "test", "format": "NDJSON", "ordered": True,
+            "columns": [
+                {"name": "id", "type": "integer"},
+                {"name": "energy", "source": "run.energy", "type": "float"},
+                {"name": "channel", "source": "run.channels.1", "type": "integer"},
+                {"name": "time", "type": "datetime"},
+                {"name": "note", "type": "string"},
+                {"name": "missing", "source": "run.channels.5", "type": "integer"},
+            ]
+        }, Description.load_scheme())
+
+    def tearDown(self) -> None:
+        self.file.close()
+
+    def test_settings(self):
+        # Section of format is used by description editor even if format doesn't have any settings
+        settings = self.description["parser_settings"]["NDJSON"]
+        self.assertEqual(list(settings.available_keys()), [])
+        self.assertEqual(dict(self.description.compile().parser_settings["NDJSON"]), {})
+
+    def test_read(self):
+        reader = SourceReader.get_reader(self.description)
+        with open(self.file.name) as fin:
+            rows = list(reader.parse_source(fin))
+        self.assertEqual(len(rows), 100)
+        self.assertEqual(rows[1], {"id": 1, "energy": 1.5, "channel": 7,
+                                   "time": datetime.datetime(2021, 1, 1, 0, 0, 1), "note": None})
+        self.assertEqual(rows[2]["note"], "x")
+
+    def test_parallel(self):
+        serial_reader = SourceReader.get_reader(self.description)
+        with open(self.file.name) as fin:
+            serial = list(serial_reader.parse_source(fin))
+        reader = SourceReader.get_reader(self.description, workers=2)
+        reader.chunk_bytes = 500
+        with open(self.file.name) as fin:
+            parallel = [row for batch in reader.parse_batches(fin, 7) for row in batch]
+        self.assertEqual(serial, parallel)
+
+    def test_record_end(self):
+        reader = SourceReader.get_reader(self.description)
+        with open(self.file.name, "a") as fout:
+            fout.write('{"id": 100, "run"')
+        with open(self.file.name, "rb") as fin:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.assertEqual(reader.record_end(mm, 0), len(NDJSON_DATA.encode()))
+                self.assertEqual(reader.record_end(mm, len(NDJSON_DATA)), len(NDJSON_DATA))
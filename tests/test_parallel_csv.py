@@ -0,0 +1,90 @@
+import gzip
+import mmap
+import pathlib
+import tempfile
+from unittest import TestCase, mock
+
+from sdp.compression import open_source
+from sdp.description import Description
+from sdp import parallel_csv
+from sdp.parallel_csv import is_mappable, last_record_end, record_ranges
+from sdp.source_readers import CSVReader
+
+CSV_DATA = 'name,value\n' + '"multi\nline, with comma",1\n"quote "" inside",2\nplain,3\n# comment,4\n' * 50
+
+
+class ParallelCSVTest(TestCase):
+
+    def setUp(self) -> None:
+        self.file = tempfile.NamedTemporaryFile("w", suffix=".csv")
+        self.file.write(CSV_DATA)
+        self.file.flush()
+        self.description = Description({
+            "table": "test", "format": "CSV", "ordered": True,
+            "parser_settings": {"CSV": {"header": True}},
+            "columns": [{"name": "name", "type": "string"}, {"name": "value", "type": "integer"}]
+        }, Description.load_scheme())
+
+    def tearDown(self) -> None:
+        self.file.close()
+
+    def test_ranges(self):
+        with open(self.file.name, "rb") as fin:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                ranges = list(record_ranges(mm, 0, 37, b'"'))
+                self.assertEqual(ranges[0][0], 0)
+                self.assertEqual(ranges[-1][1], len(mm))
+                for start, end in ranges:
+                    self.assertEqual(mm[start:end].count(b'"') % 2, 0)
+
+    def test_count_windows(self):
+        with open(self.file.name, "a") as fout:
+            fout.write('"unfinished\nrecord')
+        with open(self.file.name, "rb") as fin:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                expected = (list(record_ranges(mm, 0, 37, b'"')), last_record_end(mm, 0, b'"'))
+                with mock.patch.object(parallel_csv, "COUNT_WINDOW", 5):
+                    self.assertEqual(parallel_csv._count(mm, b'"', 3, len(mm)), mm[3:].count(b'"'))
+                    self.assertEqual((list(record_ranges(mm, 0, 37, b'"')), last_record_end(mm, 0, b'"')), expected)
+                self.assertEqual(expected[1], len(CSV_DATA))
+
+    def test_parallel(self):
+        serial_reader = CSVReader(self.description)
+        with open(self.file.name, newline="") as fin:
+            serial = list(serial_reader.parse_source(fin))
+        self.assertEqual(len(serial), 50 * 3)
+        self.assertEqual(serial[0], {"name": "multi\nline, with comma", "value": 1})
+
+        reader = CSVReader(self.description, workers=2)
+        reader.chunk_bytes = 100
+        with open(self.file.name, newline="") as fin:
+            parallel = [row for batch in reader.parse_batches(fin, 7) for row in batch]
+        self.assertEqual(serial, parallel)
+
+    def test_leading_comments(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("# comment\n# second comment\n" + CSV_DATA)
+            file.flush()
+            with open(file.name, newline="") as fin:
+                serial = list(CSVReader(self.description).parse_source(fin))
+            reader = CSVReader(self.description, workers=2)
+            reader.chunk_bytes = 100
+            with open(file.name, newline="") as fin:
+                parallel = [row for batch in reader.parse_batches(fin, 7) for row in batch]
+        self.assertEqual(len(serial), 50 * 3)
+        self.assertEqual(serial, parallel)
+
+    def test_compressed(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = pathlib.Path(tempdir) / "data.csv.gz"
+            with gzip.open(str(path), "wt") as fout:
+                fout.write(CSV_DATA)
+            reader = CSVReader(self.description, workers=2)
+            with open_source(path, threaded=False, newline="") as fin:
+                self.assertFalse(is_mappable(fin))
+                self.assertIsNone(reader.parse_batches(fin, 7))
+                self.assertEqual(len(list(reader.parse_source(fin))), 50 * 3)
+            with open_source(path, threaded=True, newline="") as fin:
+                self.assertFalse(is_mappable(fin))
+        with open(self.file.name, newline="") as fin:
+            self.assertTrue(is_mappable(fin))
@@ -0,0 +1,80 @@
+import pathlib
+import threading
+import time
+from unittest import TestCase
+
+from sqlalchemy import Column, Integer, Table
+
+from sdp.description import Description
+from sdp.file_status import LoadStatus
+from sdp.load_settings import LoadSettings
+from sdp.pipeline import BoundedQueue, Pipeline
+from sdp.source_readers import CSVReader
+from test_writers import SQLiteTestCase
+
+
+class BoundedQueueTest(TestCase):
+
+    def test_back_pressure(self):
+        queue = BoundedQueue(max_rows=2, max_bytes=10 ** 6)
+        queue.put([{"a": 1}, {"a": 2}])
+        finished = threading.Event()
+
+        def producer():
+            queue.put([{"a": 3}])
+            finished.set()
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        time.sleep(0.1)
+        self.assertFalse(finished.is_set())
+        self.assertEqual(len(queue.get()[0]), 2)
+        thread.join(1)
+        self.assertTrue(finished.is_set())
+
+    def test_abort(self):
+        queue = BoundedQueue(max_rows=2, max_bytes=10 ** 6)
+        queue.abort(ValueError())
+        with self.assertRaises(Exception):
+            queue.get()
+
+
+class PipelineTest(TestCase):
+
+    def setUp(self) -> None:
+        self.reader = CSVReader(Description.load("data/detector_.json"))
+
+    def load(self, settings):
+        pipeline = Pipeline(self.reader, settings)
+        with open("data/detector_.csv") as fin:
+            result = [row for batch in pipeline.batches(fin) for row in batch]
+        self.assertEqual(pipeline.rows, len(result))
+        return result
+
+    def test_threaded(self):
+        serial = self.load(LoadSettings(batch_size=3, threaded=False))
+        threaded = self.load(LoadSettings(batch_size=3, queue_rows=4, queue_bytes=256))
+        self.assertEqual(serial, threaded)
+        self.assertEqual(len(threaded), 10)
+
+    def test_reader_error(self):
+        pipeline = Pipeline(self.reader, LoadSettings(batch_size=3))
+        with self.assertRaises(ZeroDivisionError):
+            for batch in pipeline.batches(map(lambda x: str(1 / x), [1, 0])):
+                pass
+
+
+class PipelineShutdownTest(SQLiteTestCase):
+
+    def test_writer_error(self):
+        Table("unique_numbers", self.metadata, Column("value", Integer, primary_key=True))
+        self.metadata.create_all(self.database.engine)
+        path = pathlib.Path(self.tempdir.name) / "numbers.csv"
+        path.write_text("1\n1\n" + "".join("{}\n".format(i) for i in range(2, 20000)))
+        description = Description({"table": "unique_numbers", "format": "CSV",
+                                   "columns": [{"name": "value", "type": "integer"}]}, Description.load_scheme())
+        self.database.load_settings = LoadSettings(batch_size=10, queue_rows=20)
+        result = self.database.load_data(description, path)
+        self.assertEqual(result.status, LoadStatus.REJECTED)
+        threads = [thread.name for thread in threading.enumerate() if thread.name.startswith("sdp-pipeline")]
+        self.assertEqual(threads, [])
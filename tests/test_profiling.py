@@ -0,0 +1,55 @@
+import pathlib
+import pstats
+
+from sqlalchemy import Column, Integer, String, Table
+
+from sdp.description import Description
+from sdp.file_status import LoadStatus
+from sdp.profiling import LoadProfiler
+from test_writers import SQLiteTestCase
+
+
+class ProfilingTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(ProfilingTest, self).setUp()
+        Table("runs", self.metadata, Column("id", Integer), Column("note", String(16)))
+        self.metadata.create_all(self.database.engine)
+        self.description = Description({
+            "table": "runs", "format": "CSV",
+            "columns": [{"name": "id", "type": "integer"}, {"name": "note", "type": "string"}]
+        }, Description.load_scheme())
+        self.root = pathlib.Path(self.tempdir.name)
+        self.paths = []
+        for directory in ("first", "second"):
+            path = self.root / directory / "runs.csv"
+            path.parent.mkdir()
+            path.write_text("".join("{},note {}\n".format(i, i) for i in range(500)))
+            self.paths.append(path)
+
+    def load(self, profiler, path):
+        with profiler.profile(path) as summary:
+            result = self.database.load_data(self.description, path)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(path))
+        return summary
+
+    def test_profile(self):
+        profiler = LoadProfiler(self.root / "profiles")
+        summaries = [self.load(profiler, path) for path in self.paths]
+        pstats_paths = {summary["pstats"] for summary in summaries}
+        self.assertEqual(len(pstats_paths), 2)  # Files with the same name don't overwrite profiles
+        for summary in summaries:
+            self.assertGreater(len(pstats.Stats(summary["pstats"]).stats), 0)
+            self.assertGreater(pathlib.Path(summary["collapsed_stacks"]).stat().st_size, 0)
+            self.assertEqual(len(summary["top_functions"]), 10)
+
+    def test_trace_memory(self):
+        profiler = LoadProfiler(trace_memory=True)
+        try:
+            summary = self.load(profiler, self.paths[0])
+        finally:
+            profiler.stop()
+        self.assertIn("MiB", summary["peak_memory"])
+        sites = [site.split(": ")[-1].split(":")[0] for site in summary["allocation_sites"]]
+        self.assertGreater(len(sites), 0)
+        self.assertTrue(set(sites) - {"database.py"}, sites)
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from sdp.description import Description
+from sdp.reader_registry import ReaderRegistry, READERS, Capability
+from sdp.source_readers import SourceReader, CSVReader
+
+
+class DummyReader(SourceReader):
+    parser_settings_schema = {
+        "type": "object",
+        "properties": {"separator": {"type": "string", "default": "|"}}
+    }
+    capabilities = Capability.STREAMING
+
+    def read_source(self, source):
+        for line in source:
+            yield dict(zip([column.name for column in self.columns], line.split(self.parser_settings["DUMMY"]["separator"])))
+
+
+class ReaderRegistryTest(TestCase):
+
+    def test_builtin(self):
+        self.assertIs(READERS.get("CSV"), CSVReader)
+        schema = Description.load_scheme()
+        self.assertIn("CSV", schema["properties"]["format"]["enum"])
+        self.assertIn("delimiter", schema["properties"]["parser_settings"]["properties"]["CSV"]["properties"])
+
+    def test_lazy_import(self):
+        registry = ReaderRegistry()
+        registry.register("LAZY", "sdp.source_readers:XMLReader")
+        self.assertIn("LAZY", registry.names())
+        self.assertFalse(registry.is_loaded("LAZY"))
+        self.assertEqual(registry.get("LAZY").__name__, "XMLReader")
+        self.assertTrue(registry.is_loaded("LAZY"))
+        self.assertIsNone(registry.get("UNKNOWN"))
+
+    def test_lazy_schema(self):
+        registry = ReaderRegistry()
+        registry.register("LAZY", "test_reader_registry:DummyReader")
+        schema = {"properties": {"format": {"enum": []}, "parser_settings": {"properties": {}}}}
+        registry.update_schema(schema)
+        self.assertEqual(schema["properties"]["format"]["enum"], ["LAZY"])
+        self.assertFalse(registry.is_loaded("LAZY"))  # Schema update doesn't import readers
+        registry.add_settings_schema(schema, "LAZY")
+        self.assertIn("separator", schema["properties"]["parser_settings"]["properties"]["LAZY"]["properties"])
+
+        description = Description({"table": "test", "format": "XML", "columns": [{"name": "a", "type": "string"}]},
+                                  Description.load_scheme())
+        self.assertFalse(description.compile().settings["header"])  # Settings of format are resolved on compile
+
+    def test_builtin_settings(self):
+        # Settings of built-in formats are validated and resolved in fresh process without importing any reader
+        code = ("import json, sys, jsonschema; from sdp.description import Description; "
+                "settings = Description.load('data/detector_.json')['parser_settings']['CSV']; "
+                "data = json.load(open('data/detector_.json')); "
+                "data['parser_settings'] = {'CSV': {'skipinitialrow': -5, 'header': 'yes'}}; "
+                "errors = list(jsonschema.Draft202012Validator(Description.load_scheme()).iter_errors(data)); "
+                "print(repr(settings['delimiter']), len(errors), 'sdp.source_readers' in sys.modules)")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.split(), ["','", "2", "False"])
+
+    def test_plugin(self):
+        READERS.register("DUMMY", DummyReader)
+        description = Description({"table": "test", "format": "DUMMY",
+                                   "columns": [{"name": "a", "type": "integer"}, {"name": "b", "type": "string"}]},
+                                  Description.load_scheme())
+        reader = SourceReader.get_reader(description, workers=4)
+        self.assertEqual(reader.workers, 1)
+        self.assertEqual(list(reader.parse_source(["1|x"])), [{"a": 1, "b": "x"}])
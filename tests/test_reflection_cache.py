@@ -0,0 +1,73 @@
+import pathlib
+from unittest import mock
+
+from sqlalchemy import ARRAY, Column, DateTime, Integer, MetaData, Numeric, String, Table, text
+
+from sqlalchemy.dialects import mysql, postgresql
+
+from sdp.reflection_cache import ReflectionCache, dump_table, load_table, load_type
+from test_writers import SQLiteTestCase
+
+
+class ReflectionCacheTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(ReflectionCacheTest, self).setUp()
+        self.path = pathlib.Path(self.tempdir.name) / "cache" / "reflection.json"
+
+    def cached_table(self, cache):
+        with self.database.engine.connect() as conn:
+            return cache.table(conn, repr(self.database.url), "numbers")
+
+    def test_cache(self):
+        table = self.cached_table(ReflectionCache(self.path))
+        self.assertEqual(table.c.keys(), ["value"])
+        self.assertTrue(self.path.exists())
+
+        with mock.patch("sdp.reflection_cache.reflect_table") as reflect:
+            table = self.cached_table(ReflectionCache(self.path))
+            reflect.assert_not_called()
+        self.assertEqual(table.c.keys(), ["value"])
+        self.assertIsInstance(table.c.value.type, Integer)
+
+    def test_schema_change(self):
+        cache = ReflectionCache(self.path)
+        self.cached_table(cache)
+        with self.database.engine.connect() as conn:
+            conn.execute(text("ALTER TABLE numbers ADD COLUMN other INTEGER"))
+        self.assertEqual(self.cached_table(ReflectionCache(self.path)).c.keys(), ["value", "other"])
+        self.assertEqual(self.cached_table(cache).c.keys(), ["value", "other"])
+
+    def test_missing_table(self):
+        with self.database.engine.connect() as conn:
+            self.assertIsNone(ReflectionCache(self.path).table(conn, repr(self.database.url), "missing"))
+
+    def test_type_arguments(self):
+        table = Table("runs", MetaData(), Column("channels", ARRAY(Integer)), Column("energy", Numeric(10, 2)),
+                      Column("note", String(16)), Column("start", DateTime(timezone=True)),
+                      Column("stop", postgresql.TIMESTAMP(timezone=True, precision=3)),
+                      Column("flags", postgresql.ARRAY(mysql.INTEGER(display_width=4), dimensions=2)))
+        restored = load_table("runs", dump_table(table))
+        self.assertEqual([repr(column.type) for column in restored.columns],
+                         [repr(column.type) for column in table.columns])
+        self.assertEqual(restored.c.energy.type.scale, 2)
+
+    def test_outdated_entry(self):
+        cache = ReflectionCache(self.path)
+        self.cached_table(cache)
+        for entry in cache.entries.values():
+            entry["columns"] = [{"name": "value", "type": "Integer", "nullable": True, "primary_key": False}]
+        cache.save()
+        table = self.cached_table(ReflectionCache(self.path))  # Reflected again
+        self.assertIsInstance(table.c.value.type, Integer)
+        self.assertEqual(ReflectionCache(self.path).entries.popitem()[1]["columns"][0]["type"],
+                         {"class": "sqlalchemy.sql.sqltypes:INTEGER", "args": {}})
+
+    def test_untrusted_type(self):
+        with self.assertRaisesRegex(ValueError, "isn't SQLAlchemy type"):
+            load_type({"class": "os:system", "args": {"command": "true"}})
+        with self.assertRaisesRegex(ValueError, "isn't SQLAlchemy type"):
+            load_type({"class": "sqlalchemy.engine:create_engine", "args": {"url": "sqlite://"}})
+        columns = [{"name": "value", "type": {"class": "subprocess:Popen", "args": {"args": "true"}},
+                    "nullable": True, "primary_key": False}]
+        self.assertIsNone(load_table("numbers", columns))
@@ -0,0 +1,86 @@
+import sqlite3
+from unittest import TestCase
+
+from sqlalchemy.exc import OperationalError, IntegrityError
+
+from sdp.load_settings import LoadSettings
+from sdp.retry import RetryPolicy, is_transient
+from sdp.writers import BatchWriter
+from test_writers import SQLiteTestCase, make_batches
+
+
+def locked_error():
+    return OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+
+
+class FlakyWriter(BatchWriter):
+    """Fail every second batch once by transient error"""
+
+    def __init__(self, *args, error=locked_error):
+        super(FlakyWriter, self).__init__(*args)
+        self.error = error
+        self.failed = set()
+
+    def insert(self, batch: list):
+        key = batch[0]["value"]
+        if key % 20 == 10 and key not in self.failed:
+            self.failed.add(key)
+            super(FlakyWriter, self).insert(batch)  # Part of transaction which will be rolled back
+            raise self.error()
+        super(FlakyWriter, self).insert(batch)
+
+
+class RetryTest(SQLiteTestCase):
+
+    def test_classification(self):
+        self.assertTrue(is_transient(locked_error(), "sqlite"))
+        error = IntegrityError("INSERT", {}, sqlite3.IntegrityError("UNIQUE constraint failed"))
+        self.assertFalse(is_transient(error, "sqlite"))
+        self.assertFalse(RetryPolicy(attempts=0).should_retry(locked_error(), "sqlite", 0))
+
+    def test_mssql_classification(self):
+        def error(*args):
+            return OperationalError("INSERT", {}, Exception(*args))
+
+        deadlock = "Transaction (Process ID 52) was deadlocked on lock resources. Rerun the transaction."
+        # pymssql: (number, message)
+        self.assertTrue(is_transient(error(1205, deadlock.encode()), "mssql"))
+        self.assertTrue(is_transient(error(-2, b"Timeout expired"), "mssql"))
+        self.assertFalse(is_transient(error(2627, b"Violation of PRIMARY KEY constraint 'PK_1205'"), "mssql"))
+        # pyodbc: (sqlstate, message)
+        self.assertTrue(is_transient(error("40001", "[40001] " + deadlock + " (1205) (SQLExecDirectW)"), "mssql"))
+        self.assertTrue(is_transient(error("08S01", "[08S01] Communication link failure (10054) (SQLExecDirectW)"),
+                                     "mssql"))
+        self.assertTrue(is_transient(error("HY000", "[HY000] Database is not available (40613) (SQLExecute)"),
+                                     "mssql"))
+        self.assertFalse(is_transient(error("23000", "[23000] Cannot insert duplicate key 40613 in object "
+                                                     "'dbo.runs' (2627) (SQLExecDirectW)"), "mssql"))
+        self.assertFalse(is_transient(error("42000", "[42000] Invalid column name 'deadlock_1205'. (207) "
+                                                     "(SQLExecDirectW)"), "mssql"))
+
+    def test_retry_chunk(self):
+        settings = LoadSettings(transaction="chunk", retry_delay=0)
+        with self.database.engine.connect() as conn:
+            writer = FlakyWriter(conn, self.table, settings)
+            writer.write(make_batches(10))
+            self.assertIs(writer.conn, conn)
+        self.assertEqual(self.count(), 100)
+        self.assertEqual(writer.statistics()["retries"], 5)
+
+    def test_permanent_error(self):
+        settings = LoadSettings(transaction="chunk", retry_delay=0)
+        error = lambda: IntegrityError("INSERT", {}, sqlite3.IntegrityError("UNIQUE constraint failed"))
+        with self.database.engine.connect() as conn:
+            writer = FlakyWriter(conn, self.table, settings, error=error)
+            with self.assertRaises(IntegrityError):
+                writer.write(make_batches(10))
+        self.assertEqual(self.count(), 10)
+        self.assertEqual(writer.retries, 0)
+
+
+class RetryPolicyTest(TestCase):
+
+    def test_delay(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        for attempt in range(10):
+            self.assertLessEqual(policy.delay(attempt), min(5, 2 ** attempt))
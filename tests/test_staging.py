@@ -0,0 +1,82 @@
+import datetime
+import pathlib
+
+from sqlalchemy import MetaData, Table, Column, Integer, Float, Boolean, DateTime, String, Text, select
+from sqlalchemy.dialects import mysql, postgresql
+
+from sdp.database import Database, DatabaseSettings, Drivers
+from sdp.description import Description
+from sdp.file_status import LoadStatus
+from sdp.load_settings import LoadSettings
+from sdp.staging import cast_expression
+from test_writers import SQLiteTestCase
+
+CSV_DATA = "1,0.5,true,2021-01-01T00:00:01.250000,one\n2,1.5,,2021-01-02 10:00:00,two\n"
+
+
+class StagingTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(StagingTest, self).setUp()
+        root = pathlib.Path(self.tempdir.name)
+        self.data = root / "events.csv"
+        self.data.write_text(CSV_DATA)
+        self.events = Table("events", self.metadata, Column("id", Integer), Column("value", Float),
+                            Column("flag", Boolean), Column("time", DateTime), Column("name", String))
+        self.metadata.create_all(self.database.engine)
+        self.description = Description({
+            "table": "events", "format": "CSV",
+            "columns": [
+                {"name": "id", "type": "integer"},
+                {"name": "value", "type": "float"},
+                {"name": "flag", "type": "boolean"},
+                {"name": "time", "type": "datetime"},
+                {"name": "name", "type": "string"},
+            ]
+        }, Description.load_scheme())
+
+    def load(self, conversion="server", **settings):
+        database = Database(self.database.settings, load_settings=LoadSettings(conversion=conversion, **settings))
+        result = database.load_data(self.description, self.data)
+        database.engine.dispose()
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(self.data))
+        self.assertEqual(result.statistics.get("conversion"), "server" if conversion == "server" else None)
+        with self.database.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(select([self.events]).order_by(self.events.c.id))]
+
+    def test_server_conversion(self):
+        rows = self.load()
+        self.assertEqual(rows, [
+            (1, 0.5, True, datetime.datetime(2021, 1, 1, 0, 0, 1, 250000), "one"),
+            (2, 1.5, False, datetime.datetime(2021, 1, 2, 10, 0, 0), "two"),
+        ])
+
+    def test_boolean_modes(self):
+        flags = ["true", "false", "no", "0", "1", "", " ", "on"]
+        self.data.write_text("".join("{},0,{},2021-01-01 00:00:00,x\n".format(i, flag) for i, flag in enumerate(flags)))
+        server = self.load()
+        with self.database.engine.begin() as conn:
+            conn.execute(self.events.delete())
+        self.assertEqual(self.load(conversion="python"), server)
+        self.assertEqual([row[2] for row in server], [flag != "" for flag in flags])
+
+    def test_chunk_transaction(self):
+        self.assertEqual(len(self.load(transaction="chunk", batch_size=1)), 2)
+
+    def test_dialect_expressions(self):
+        self.description.data["columns"][3]["type_properties"] = {"datetime_flavour": "unixtime"}
+        plan = self.description.compile()
+        staging = Table("staging", MetaData(), *[Column(column.name, Text) for column in plan.columns])
+        target = Table("events", MetaData(), Column("time", DateTime), Column("name", String(4)))
+
+        def compile_(dialect, name):
+            column = next(column for column in plan.columns if column.name == name)
+            expression = cast_expression(dialect.name, staging.c[name], column, target.c[name])
+            return str(expression.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+        # Unix time is converted to UTC regardless of session time zone, as by loader
+        self.assertIn("timezone('UTC', to_timestamp(", compile_(postgresql.dialect(), "time"))
+        self.assertIn("convert_tz(from_unixtime(", compile_(mysql.dialect(), "time"))
+        self.assertIn("@@session.time_zone, '+00:00')", compile_(mysql.dialect(), "time"))
+        # Strings aren't cast to VARCHAR(n), which truncates them, length is checked on assignment to column
+        self.assertEqual(compile_(postgresql.dialect(), "name"), "staging.name")
@@ -0,0 +1,58 @@
+import pathlib
+
+from sdp.description import Description
+from sdp.file_status import LoadStatus
+from sdp.tail import TailStore
+from test_writers import SQLiteTestCase
+
+
+class TailLoadingTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(TailLoadingTest, self).setUp()
+        root = pathlib.Path(self.tempdir.name)
+        self.data = root / "numbers.csv"
+        self.tail = TailStore(root / "state.json")
+        self.description = Description({
+            "table": "numbers", "format": "CSV", "parser_settings": {"CSV": {"header": True}},
+            "columns": [{"name": "value", "type": "integer"}]
+        }, Description.load_scheme())
+
+    def write(self, text, mode="a"):
+        with open(self.data, mode) as fout:
+            fout.write(text)
+
+    def load(self):
+        result = self.database.load_data(self.description, self.data, TailStore(self.tail.path))
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(self.data))
+        return result
+
+    def test_append(self):
+        self.write("value\n1\n2\n3", mode="w")  # Last record is incomplete
+        self.load()
+        self.assertEqual(self.count(), 2)
+        self.write("\n4\n")
+        result = self.load()
+        self.assertEqual(self.count(), 4)
+        self.assertEqual(result.statistics["offset"], len("value\n1\n2\n"))
+        self.load()
+        self.assertEqual(self.count(), 4)
+
+    def test_rotation(self):
+        self.write("value\n1\n2\n", mode="w")
+        self.load()
+        self.data.unlink()
+        self.write("value\n5\n", mode="w")
+        result = self.load()
+        self.assertEqual(result.statistics["offset"], 0)
+        self.assertEqual(self.count(), 3)
+
+    def test_truncation(self):
+        self.write("value\n1\n2\n", mode="w")
+        self.load()
+        with open(self.data, "r+") as fout:
+            fout.truncate(0)
+        self.write("value\n7\n8\n9\n")
+        result = self.load()
+        self.assertEqual(result.statistics["offset"], 0)
+        self.assertEqual(self.count(), 5)
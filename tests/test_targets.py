@@ -0,0 +1,89 @@
+import pathlib
+import unittest
+
+from sqlalchemy import Column, Float, Integer, String, Table, select
+
+from sdp.description import Description
+from sdp.file_status import LoadStatus
+from sdp.load_settings import LoadSettings, TransactionMode
+from test_writers import SQLiteTestCase
+
+ROWS = ["kind;run;energy;note"] + ["H;{};;run {}".format(run, run) for run in range(3)] + [
+    "E;{};{}.5;".format(i % 3, i) for i in range(10)]
+
+
+class TargetsTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(TargetsTest, self).setUp()
+        self.runs = Table("runs", self.metadata, Column("run", Integer), Column("note", String(16)))
+        self.events = Table("events", self.metadata, Column("run", Integer), Column("energy", Float))
+        self.metadata.create_all(self.database.engine)
+        self.path = pathlib.Path(self.tempdir.name) / "runs.csv"
+        self.path.write_text("\n".join(ROWS) + "\n")
+        self.description = Description({
+            "table": "runs", "format": "CSV", "parser_settings": {"CSV": {"header": True, "delimiter": ";"}},
+            "columns": [
+                {"name": "kind", "type": "string"},
+                {"name": "run", "type": "integer"},
+                {"name": "energy", "type": "float"},
+                {"name": "note", "type": "string"},
+            ],
+            "targets": [
+                {"columns": ["run", "note"], "filter": {"column": "kind", "equals": "H"}},
+                {"table": "events", "columns": ["run", "energy"], "filter": {"column": "kind", "in": ["E"]}},
+            ]
+        }, Description.load_scheme())
+
+    def select_rows(self, table):
+        with self.database.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(select([table]))]
+
+    def test_plan(self):
+        plan = self.description.compile()
+        self.assertEqual([target.table for target in plan.targets], ["runs", "events"])
+        self.assertEqual(plan.targets[0].select([{"kind": "H", "run": 1, "note": "x"}, {"kind": "E", "run": 2}]),
+                         [{"run": 1, "note": "x"}])
+        self.assertEqual(plan.targets[1].select([{"kind": "H", "run": "1", "energy": ""},
+                                                 {"kind": "E", "run": "2", "energy": "2.5"}], convert=True),
+                         [{"run": 2, "energy": 2.5}])
+        self.assertEqual(Description.load("data/detector_.json").compile().targets, ())
+
+    def test_load(self):
+        result = self.database.load_data(self.description, self.path)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(self.path))
+        self.assertEqual(result.statistics["tables"], {"runs": 3, "events": 10})
+        self.assertEqual(result.statistics["rows"], 13)
+        self.assertEqual(self.select_rows(self.runs), [(0, "run 0"), (1, "run 1"), (2, "run 2")])
+        self.assertEqual(sorted(self.select_rows(self.events))[:2], [(0, 0.5), (0, 3.5)])
+
+    def test_empty_fields(self):
+        # Empty energy of header records isn't float, but it isn't inserted to any table
+        self.database.load_settings = LoadSettings(threaded=False)
+        result = self.database.load_data(self.description, self.path)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(self.path))
+        self.assertEqual(result.statistics["tables"], {"runs": 3, "events": 10})
+
+        self.description.data["targets"][0]["columns"] = ["run", "energy"]
+        self.description.data["targets"][0]["table"] = "events"
+        result = self.database.load_data(self.description, self.path)
+        self.assertEqual(result.status, LoadStatus.REJECTED)
+        self.assertIn("could not convert string to float", str(result.exceptions[0]))
+
+    def test_rollback(self):
+        self.database.load_settings = LoadSettings(transaction=TransactionMode.FILE)
+        self.description.data["targets"][1]["columns"] = ["run", "note"]
+        result = self.database.load_data(self.description, self.path)
+        self.assertEqual(result.status, LoadStatus.REJECTED)
+        self.assertIn("Column note doesn't exist in table events", result.errors)
+
+        self.path.write_text("\n".join(ROWS) + "\nE;x;1;\n")
+        self.description.data["targets"][1]["columns"] = ["run", "energy"]
+        result = self.database.load_data(self.description, self.path)
+        self.assertEqual(result.status, LoadStatus.REJECTED)
+        self.assertEqual(self.select_rows(self.runs), [])
+        self.assertEqual(self.select_rows(self.events), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
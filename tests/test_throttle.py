@@ -0,0 +1,45 @@
+import time
+from unittest import TestCase
+
+from sdp.load_settings import LoadSettings
+from sdp.throttle import TokenBucket, Throttle, LoadProbe, shared_throttle
+from sdp.writers import BatchWriter
+from test_writers import SQLiteTestCase, make_batches
+
+
+class TokenBucketTest(TestCase):
+
+    def test_rate(self):
+        bucket = TokenBucket(1000)
+        self.assertEqual(bucket.reserve(1000), 0)
+        self.assertAlmostEqual(bucket.reserve(500), 0.5, delta=0.05)
+        self.assertAlmostEqual(bucket.reserve(100, factor=0.5), 1.2, delta=0.05)
+
+    def test_throttle(self):
+        throttle = Throttle(rows_per_second=2000, bytes_per_second=10 ** 9)
+        start = time.monotonic()
+        for _ in range(4):
+            throttle.acquire(500, 1000)
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertGreater(throttle.acquire(200, 1000), 0.05)
+
+
+class ThrottleDatabaseTest(SQLiteTestCase):
+
+    def test_probe(self):
+        probe = LoadProbe(self.database.engine, "SELECT 5", threshold=1.0, interval=0)
+        self.assertEqual(probe.current_factor(), 0.5)
+        self.assertEqual(probe.current_factor(), 0.25)
+        probe.probe = "latency"
+        self.assertAlmostEqual(probe.current_factor(), 0.35)
+
+    def test_shared(self):
+        settings = LoadSettings(throttle_rows=1000)
+        throttle = shared_throttle(self.database.engine, settings)
+        self.assertIs(throttle, shared_throttle(self.database.engine, LoadSettings(throttle_rows=1000)))
+        self.assertIsNone(shared_throttle(self.database.engine, LoadSettings()))
+        with self.database.engine.connect() as conn:
+            writer = BatchWriter(conn, self.table, settings, throttle)
+            writer.write(make_batches(12))
+        self.assertEqual(self.count(), 120)
+        self.assertIn("throttled_seconds", writer.statistics())
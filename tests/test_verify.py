@@ -0,0 +1,91 @@
+import datetime
+import math
+import pathlib
+import struct
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, REAL, String, Table, update
+
+from sdp.description import Description
+from sdp.file_status import LoadStatus
+from sdp.load_settings import LoadSettings
+from sdp.verify import compare, sum_tolerances, verify_load
+from test_writers import SQLiteTestCase
+
+
+def single(value: float) -> float:
+    """Value rounded to single precision as stored in REAL column"""
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class VerifyTest(SQLiteTestCase):
+
+    def setUp(self) -> None:
+        super(VerifyTest, self).setUp()
+        self.runs = Table("runs", self.metadata, Column("id", Integer), Column("energy", Float),
+                          Column("note", String(32)), Column("start", DateTime), Column("load_id", Integer))
+        self.metadata.create_all(self.database.engine)
+        self.database.load_settings = LoadSettings(checksum=True, batch_id_column="load_id", batch_size=7)
+        self.description = Description({
+            "table": "runs", "format": "CSV",
+            "columns": [
+                {"name": "id", "type": "integer"},
+                {"name": "energy", "type": "float"},
+                {"name": "note", "type": "string"},
+                {"name": "start", "type": "datetime", "type_properties": {"datetime_flavour": "sql"}},
+            ]
+        }, Description.load_scheme())
+        self.path = pathlib.Path(self.tempdir.name) / "runs.csv"
+        self.text = "".join("{},{}.1,run {},2021-03-{:02d} 05:06:07\n".format(i, i, "x" * (i % 7), i % 28 + 1)
+                            for i in range(100))
+        self.path.write_text(self.text)
+
+    def test_verify(self):
+        result = self.database.load_data(self.description, self.path, batch_id=1)
+        self.assertEqual(result.status, LoadStatus.SUCCESS, result.to_string(self.path))
+        self.assertEqual(result.statistics["batch_id"], 1)
+        checksum = result.statistics["checksum"]
+        self.assertEqual(checksum["rows"], 100)
+        self.assertEqual(checksum["columns"]["id"], {"count": 100, "sum": 4950})
+        self.assertEqual(checksum["columns"]["start"]["max"], datetime.datetime(2021, 3, 28, 5, 6, 7))
+        self.assertEqual(verify_load(self.database, self.description, self.path, batch_id=1), [])
+        self.path.write_text("changed after loading\n")
+        self.assertEqual(verify_load(self.database, self.description, batch_id=1), [])  # Stored checksum
+
+        self.path.write_text(self.text)
+        self.assertEqual(self.database.load_data(self.description, self.path, batch_id=2).status, LoadStatus.SUCCESS)
+        self.assertEqual(verify_load(self.database, self.description, self.path, batch_id=2), [])
+        self.assertEqual(verify_load(self.database, self.description, self.path, where="load_id = 2"), [])
+        # Rows, counts, sums, length and epoch seconds
+        self.assertEqual(len(verify_load(self.database, self.description, self.path)), 1 + 4 + 4)
+
+        with self.database.engine.connect() as conn:
+            conn.execute(update(self.runs).where(self.runs.c.id == 5).values(
+                energy=0.0, note="changed", start=datetime.datetime(2021, 3, 6, 5, 6, 8)))
+        mismatches = verify_load(self.database, self.description, self.path, batch_id=1)
+        self.assertEqual([mismatch.split(":")[0] for mismatch in mismatches],
+                         ["column energy sum", "column note length", "column start epoch"])
+
+    def test_tolerances(self):
+        plan = self.description.compile()
+        table = Table("runs", MetaData(), Column("id", Integer), Column("energy", REAL),
+                      Column("note", String(32)), Column("start", DateTime))
+        tolerances = sum_tolerances("postgresql", table, plan, 1000)
+        # Values rounded to single precision by REAL column
+        expected = {"rows": 1000, "columns": {"energy": {"sum": math.fsum(i + 0.1 for i in range(1000))}}}
+        actual = {"rows": 1000, "columns": {"energy": {"sum": math.fsum(single(i + 0.1) for i in range(1000))}}}
+        self.assertEqual(compare(expected, actual, tolerances), [])
+        self.assertEqual(len(compare(expected, actual)), 1)
+        self.assertEqual(sum_tolerances("sqlite", table, plan, 1000)[("energy", "sum")][0], 1001 * 2.0 ** -53)
+
+    def test_not_stored(self):
+        self.database.load_settings = LoadSettings(checksum=True, batch_id_column="load_id", checksum_table=None)
+        self.database.load_data(self.description, self.path, batch_id=1)
+        self.assertEqual(verify_load(self.database, self.description, self.path, batch_id=1), [])
+        with self.assertRaisesRegex(Exception, "isn't stored"):
+            verify_load(self.database, self.description, batch_id=1)
+
+    def test_missing_batch_column(self):
+        self.database.load_settings = LoadSettings(batch_id_column="batch")
+        result = self.database.load_data(self.description, self.path)
+        self.assertEqual(result.status, LoadStatus.REJECTED)
+        self.assertIn("batch", result.errors[0])
@@ -0,0 +1,104 @@
+import pathlib
+import tempfile
+from unittest import TestCase
+
+from sqlalchemy import MetaData, Table, Column, Integer, select, func
+
+from sdp.database import Database, DatabaseSettings, Drivers
+from sdp.load_settings import LoadSettings, TransactionMode
+from sdp.writers import AdaptiveBatchSize, BatchWriter, ParallelWriter
+
+
+class SQLiteTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        settings = DatabaseSettings(driver=Drivers.SQLITE, host=None, port=None, username=None, password=None,
+                                    database=str(pathlib.Path(self.tempdir.name) / "test.db"))
+        self.database = Database(settings)
+        self.metadata = MetaData()
+        self.table = Table("numbers", self.metadata, Column("value", Integer))
+        self.metadata.create_all(self.database.engine)
+
+    def tearDown(self) -> None:
+        self.database.engine.dispose()
+        self.tempdir.cleanup()
+
+    def count(self):
+        with self.database.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(self.table)).scalar()
+
+
+def make_batches(n_batches, fail_on=None):
+    for n in range(n_batches):
+        if n == fail_on:
+            raise ValueError("Broken input")
+        yield [{"value": n * 10 + i} for i in range(10)]
+
+
+class WritersTest(SQLiteTestCase):
+
+    def test_file_transaction_rollback(self):
+        with self.database.engine.connect() as conn:
+            writer = BatchWriter(conn, self.table, LoadSettings())
+            with self.assertRaises(ValueError):
+                writer.write(make_batches(5, fail_on=3))
+        self.assertEqual(self.count(), 0)
+
+    def test_chunk_transaction(self):
+        with self.database.engine.connect() as conn:
+            writer = BatchWriter(conn, self.table, LoadSettings(transaction="chunk"))
+            with self.assertRaises(ValueError):
+                writer.write(make_batches(5, fail_on=3))
+        self.assertEqual(self.count(), 30)
+
+    def test_parallel(self):
+        settings = LoadSettings(transaction=TransactionMode.CHUNK, writers=3)
+        writer = ParallelWriter(self.database.engine, self.table, settings)
+        writer.write(make_batches(20))
+        self.assertEqual(self.count(), 200)
+        self.assertEqual(writer.statistics()["rows"], 200)
+
+    def test_parallel_rollback(self):
+        settings = LoadSettings(writers=2)
+        writer = ParallelWriter(self.database.engine, self.table, settings)
+        with self.assertRaises(ValueError):
+            writer.write(make_batches(5, fail_on=3))
+        self.assertEqual(self.count(), 0)
+
+    def test_adaptive(self):
+        with self.database.engine.connect() as conn:
+            writer = BatchWriter(conn, self.table, LoadSettings(batch_size=16, adaptive_batch=True))
+            writer.write(make_batches(50))
+        self.assertEqual(self.count(), 500)
+        self.assertEqual(writer.statistics()["batch_sizes"][0], 16)
+
+
+class AdaptiveBatchSizeTest(TestCase):
+
+    @staticmethod
+    def run_batches(adaptive, latency, n_batches=60):
+        for _ in range(n_batches):
+            size = adaptive.size
+            adaptive.record(size, latency(size) * size)
+
+    def test_grow(self):
+        adaptive = AdaptiveBatchSize(100, 10000, 2 ** 30)
+        self.run_batches(adaptive, lambda size: 0.001 + 1.0 / size)  # Per-statement overhead dominates
+        self.assertEqual(max(adaptive.sizes), 6400)
+        self.assertGreater(adaptive.size, 1600)
+
+    def test_optimum(self):
+        adaptive = AdaptiveBatchSize(100, 100000, 2 ** 30)
+        self.run_batches(adaptive, lambda size: 0.001 + 1.0 / size + size / 1e6)  # Optimum near 1000 rows
+        self.assertIn(adaptive.size, (400, 800, 1600))
+
+    def test_limits(self):
+        adaptive = AdaptiveBatchSize(1000, 100000, 64 * 1000)
+        batches = list(adaptive.rebatch([[{"value": i} for i in range(500)]] * 10))
+        self.assertEqual(sum(map(len, batches)), 5000)
+        self.assertLessEqual(adaptive.size, 1000)
+        adaptive.rejected(adaptive.size)
+        self.assertEqual(adaptive.size, adaptive.ceiling)
+        self.run_batches(adaptive, lambda size: 1.0 / size)
+        self.assertLessEqual(max(adaptive.sizes[2:]), adaptive.ceiling)